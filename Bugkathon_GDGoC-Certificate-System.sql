@@ -25,18 +25,28 @@ CREATE TABLE events (
 );
 GO
 
+CREATE INDEX IX_events_created_at ON events (created_at, id);
+GO
+
 -- 4. Tạo bảng templates (Mẫu SVG)
 CREATE TABLE templates (
     id UNIQUEIDENTIFIER PRIMARY KEY DEFAULT NEWID(),
     event_id UNIQUEIDENTIFIER NOT NULL,
     name NVARCHAR(255) NOT NULL,
     svg_content NVARCHAR(MAX) NOT NULL, -- Sử dụng NVARCHAR(MAX) để lưu chuỗi XML/SVG không giới hạn độ dài
+    svg_optimized NVARCHAR(MAX) NULL, -- SVG đã tối ưu (bỏ metadata, defs thừa, ảnh down-sample) dùng để render
+    content_hash VARCHAR(64) NULL, -- sha256 của svg_content, client so sánh để khỏi tải lại body
     variables NVARCHAR(MAX) NOT NULL, -- SQL Server lưu JSON dưới dạng chuỗi text
+    fonts NVARCHAR(MAX) NULL, -- JSON list file font bundle (FONTS_DIR) template sử dụng
     created_at DATETIME DEFAULT GETDATE(),
     CONSTRAINT FK_Templates_Events FOREIGN KEY (event_id) REFERENCES events(id) ON DELETE CASCADE
 );
 GO
 
+CREATE INDEX IX_templates_created_at ON templates (created_at, id);
+CREATE INDEX IX_templates_event_created_at ON templates (event_id, created_at, id);
+GO
+
 -- 5. Tạo bảng generation_log (Tiến trình xử lý hàng loạt)
 CREATE TABLE generation_log (
     id UNIQUEIDENTIFIER PRIMARY KEY DEFAULT NEWID(),
@@ -52,6 +62,11 @@ CREATE TABLE generation_log (
 );
 GO
 
+CREATE INDEX IX_generation_log_created_at ON generation_log (created_at, id);
+CREATE INDEX IX_generation_log_status_created_at ON generation_log (status, created_at, id);
+CREATE INDEX IX_generation_log_template_created_at ON generation_log (template_id, created_at, id);
+GO
+
 -- 6. Tạo bảng generated_assets (Ấn phẩm chi tiết)
 CREATE TABLE generated_assets (
     id UNIQUEIDENTIFIER PRIMARY KEY DEFAULT NEWID(),
@@ -61,10 +76,64 @@ CREATE TABLE generated_assets (
     drive_file_id VARCHAR(255) NULL,
     email_status VARCHAR(50) NOT NULL DEFAULT 'PENDING', -- PENDING, SENT, FAILED
     created_at DATETIME DEFAULT GETDATE(),
+    updated_at DATETIME NULL, -- UTC, lần đổi email_status gần nhất (thống kê throughput)
+    row_index INT NULL, -- Số dòng trong Google Sheet (checkpoint để resume)
+    row_hash VARCHAR(64) NULL, -- SHA-256 nội dung dòng
+    row_data NVARCHAR(MAX) NULL, -- JSON dòng sheet (render lại khi PDF không còn trong kho)
+    pdf_key VARCHAR(64) NULL, -- Key của PDF trong kho content-addressed (PDF_STORE_DIR)
     CONSTRAINT FK_GeneratedAssets_GenerationLog FOREIGN KEY (generation_log_id) REFERENCES generation_log(id) ON DELETE CASCADE
 );
 GO
 
+CREATE INDEX IX_generated_assets_log_row ON generated_assets (generation_log_id, row_index)
+    INCLUDE (row_hash, email_status, pdf_key);
+CREATE INDEX IX_generated_assets_created_at ON generated_assets (created_at, id);
+CREATE INDEX IX_generated_assets_log_created_at ON generated_assets (generation_log_id, created_at, id);
+CREATE INDEX IX_generated_assets_status_created_at ON generated_assets (email_status, created_at, id);
+CREATE INDEX IX_generated_assets_email_created_at ON generated_assets (participant_email, created_at, id);
+CREATE INDEX IX_generated_assets_log_status_row ON generated_assets (generation_log_id, email_status, row_index);
+CREATE INDEX IX_generated_assets_log_updated_at ON generated_assets (generation_log_id, updated_at)
+    INCLUDE (email_status);
+GO
+
+-- 7. Tạo bảng generation_jobs (Hàng đợi job cho worker)
+CREATE TABLE generation_jobs (
+    id UNIQUEIDENTIFIER NOT NULL DEFAULT NEWID(),
+    generation_log_id UNIQUEIDENTIFIER NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT 'QUEUED', -- QUEUED, RUNNING, DONE, FAILED
+    kind VARCHAR(50) NOT NULL DEFAULT 'GENERATE', -- GENERATE (đọc sheet), RESEND_FAILED (gửi lại asset FAILED)
+    attempts INT NOT NULL DEFAULT 0,
+    column_mapping NVARCHAR(MAX) NULL, -- JSON: {"name": "A", "participant_email": "C"}
+    lease_owner VARCHAR(255) NULL, -- hostname:pid của worker đang giữ job
+    lease_expires_at DATETIME NULL, -- UTC
+    heartbeat_at DATETIME NULL, -- UTC
+    available_at DATETIME NULL, -- UTC, job bị hoãn (hết quota Gmail) chỉ được claim sau mốc này
+    last_error NVARCHAR(MAX) NULL,
+    created_at DATETIME DEFAULT GETDATE(),
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT PK_generation_jobs PRIMARY KEY (id),
+    CONSTRAINT FK_GenerationJobs_GenerationLog FOREIGN KEY (generation_log_id) REFERENCES generation_log(id) ON DELETE CASCADE
+);
+GO
+
+CREATE INDEX IX_generation_jobs_status_created_at ON generation_jobs (status, created_at);
+CREATE INDEX IX_generation_jobs_log_kind_created_at ON generation_jobs (generation_log_id, kind, created_at)
+    INCLUDE (status);
+GO
+
+-- 8. Tạo bảng gmail_send_quota (Token bucket dùng chung cho mọi worker)
+CREATE TABLE gmail_send_quota (
+    sender VARCHAR(255) NOT NULL,
+    tokens FLOAT NOT NULL DEFAULT 0,
+    refilled_at DATETIME NULL, -- UTC
+    quota_day DATE NULL, -- ngày (UTC) của sent_today
+    sent_today INT NOT NULL DEFAULT 0,
+    blocked_until DATETIME NULL, -- UTC, Gmail trả 429 → tạm dừng gửi tới mốc này
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT PK_gmail_send_quota PRIMARY KEY (sender)
+);
+GO
+
 USE GDGoCCertificateSystemDb;
 GO
 
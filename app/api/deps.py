@@ -10,14 +10,19 @@ Flow:
 
 import uuid
 from typing import AsyncGenerator, Optional
-from fastapi import Depends, Request
+from fastapi import Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import decode_token
 from app.core.exceptions import UnauthorizedException
+from app.core.config import settings
+from app.core.fonts import FontRegistry, get_font_registry
+from app.core.user_cache import UserCache, shared_user_cache
 
 from app.models.user import Users
+from app.schemas.auth import TokenClaims
+from app.schemas.pagination import PageParams
 
 from app.core.database import AsyncSessionFactory
 
@@ -30,6 +35,7 @@ from app.repositories.user_repository import UserRepository
 from app.repositories.event_repository import EventRepository
 from app.repositories.template_repository import TemplateRepository
 from app.repositories.generation_log_repository import GenerationLogRepository
+from app.repositories.generation_job_repository import GenerationJobRepository
 from app.repositories.generated_asset_repository import GeneratedAssetRepository
 
 # ── Services ──────────────────────────────────────────────────────────────────
@@ -42,6 +48,10 @@ from app.services.svg_service import SvgService
 from app.services.pdf_service import PdfService
 from app.services.google_sheets_service import GoogleSheetsService
 from app.services.gmail_service import GmailService
+from app.services.gmail_rate_limiter import GmailRateLimiter
+from app.services.pdf_store import PdfStore, shared_pdf_store
+from app.services.preview_cache import PreviewCache, shared_preview_cache
+from app.services.progress_hub import ProgressHub, shared_progress_hub
 from app.services.generated_asset_service import GeneratedAssetService
 
 
@@ -94,6 +104,12 @@ def get_generation_log_repository(
     return GenerationLogRepository(db)
 
 
+def get_generation_job_repository(
+    db: AsyncSession = Depends(get_db),
+) -> GenerationJobRepository:
+    return GenerationJobRepository(db)
+
+
 def get_generated_asset_repository(
     db: AsyncSession = Depends(get_db),
 ) -> GeneratedAssetRepository:
@@ -121,6 +137,36 @@ def get_gmail_service() -> GmailService:
     return GmailService()
 
 
+def get_gmail_rate_limiter() -> GmailRateLimiter:
+    # Mỗi lần lấy token dùng session riêng (transaction ngắn, nhả khoá ngay)
+    return GmailRateLimiter(AsyncSessionFactory)
+
+
+def get_pdf_store() -> PdfStore:
+    # Một instance cho cả process → giữ bộ đếm dung lượng dùng cho LRU eviction
+    return shared_pdf_store()
+
+
+def get_preview_cache() -> PreviewCache:
+    # Cache preview trong RAM của API process, dùng chung giữa các request
+    return shared_preview_cache()
+
+
+def get_progress_hub() -> ProgressHub:
+    # Một hub cho cả process → mọi SSE watcher của một log dùng chung một poller
+    return shared_progress_hub()
+
+
+def get_user_cache() -> UserCache:
+    # Cache user theo id của process → get_current_user không SELECT users mỗi request
+    return shared_user_cache()
+
+
+def get_fonts() -> FontRegistry:
+    # Registry dùng chung, chỉ quét lại FONTS_DIR khi thư mục thay đổi
+    return get_font_registry()
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # LAYER 2B — Business Logic Services (cần db + các service khác)
 # ══════════════════════════════════════════════════════════════════════════════
@@ -146,6 +192,8 @@ def get_generated_asset_service(
     svg_service: SvgService = Depends(get_svg_service),
     pdf_service: PdfService = Depends(get_pdf_service),
     gmail_service: GmailService = Depends(get_gmail_service),
+    rate_limiter: GmailRateLimiter = Depends(get_gmail_rate_limiter),
+    pdf_store: PdfStore = Depends(get_pdf_store),
 ) -> GeneratedAssetService:
     return GeneratedAssetService(
         asset_repo=asset_repo,
@@ -154,33 +202,52 @@ def get_generated_asset_service(
         svg_service=svg_service,
         pdf_service=pdf_service,
         gmail_service=gmail_service,
+        rate_limiter=rate_limiter,
+        pdf_store=pdf_store,
     )
 
 def get_template_service(
     template_repo: TemplateRepository = Depends(get_template_repository),
     event_repo: EventRepository = Depends(get_event_repository),
+    font_registry: FontRegistry = Depends(get_fonts),
+    svg_service: SvgService = Depends(get_svg_service),
+    preview_cache: PreviewCache = Depends(get_preview_cache),
+    pdf_store: PdfStore = Depends(get_pdf_store),
 ) -> TemplateService:
-    return TemplateService(template_repo, event_repo)
+    return TemplateService(
+        template_repo,
+        event_repo,
+        font_registry,
+        svg_service=svg_service,
+        preview_cache=preview_cache,
+        pdf_store=pdf_store,
+    )
 
 
 def get_generation_log_service(
     db: AsyncSession = Depends(get_db),
     log_repo: GenerationLogRepository = Depends(get_generation_log_repository),
+    job_repo: GenerationJobRepository = Depends(get_generation_job_repository),
     asset_repo: GeneratedAssetRepository = Depends(get_generated_asset_repository),
     template_repo: TemplateRepository = Depends(get_template_repository),
     svg_service: SvgService = Depends(get_svg_service),
     pdf_service: PdfService = Depends(get_pdf_service),
     sheets_service: GoogleSheetsService = Depends(get_google_sheets_service),
     gmail_service: GmailService = Depends(get_gmail_service),
+    rate_limiter: GmailRateLimiter = Depends(get_gmail_rate_limiter),
+    pdf_store: PdfStore = Depends(get_pdf_store),
 ) -> GenerationLogService:
     return GenerationLogService(
         generation_log_repo=log_repo,
+        generation_job_repo=job_repo,
         generated_asset_repo=asset_repo,
         template_repo=template_repo,
         svg_service=svg_service,
         pdf_service=pdf_service,
         sheets_service=sheets_service,
         gmail_service=gmail_service,
+        rate_limiter=rate_limiter,
+        pdf_store=pdf_store,
         db=db,
     )
 
@@ -191,11 +258,10 @@ def get_auth_service(
     return AuthService(user_repo)
 
 
-async def get_current_user(
+def _access_token_claims(
     request: Request,
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-    user_repo: UserRepository = Depends(get_user_repository),
-) -> Users:
+    credentials: Optional[HTTPAuthorizationCredentials],
+) -> TokenClaims:
     """
     Read token in priority order:
     1. HttpOnly Cookie 'access_token'  ← FE embedded (production)
@@ -213,7 +279,51 @@ async def get_current_user(
         user_id = uuid.UUID(str(payload["sub"]))
     except (JWTError, ValueError, KeyError) as exc:
         raise UnauthorizedException("Token không hợp lệ hoặc đã hết hạn.") from exc
-    user = await user_repo.get_by_id(user_id)
-    if not user:
-        raise UnauthorizedException("User không tồn tại.")
-    return user
\ No newline at end of file
+    return TokenClaims(user_id=user_id, role=payload.get("role"))
+
+
+async def _load_user(claims: TokenClaims, user_repo: UserRepository, user_cache: UserCache) -> Users:
+    user = user_cache.get(claims.user_id)
+    if user is None:
+        user = await user_repo.get_by_id(claims.user_id)
+        if not user:
+            raise UnauthorizedException("User không tồn tại.")
+        user_cache.put(user)
+    return user
+
+
+async def get_current_user(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    user_repo: UserRepository = Depends(get_user_repository),
+    user_cache: UserCache = Depends(get_user_cache),
+) -> Users:
+    """User của access token; chỉ SELECT users khi cache miss (USER_CACHE_TTL_SECONDS)."""
+    return await _load_user(_access_token_claims(request, credentials), user_repo, user_cache)
+
+
+async def get_token_claims(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    user_repo: UserRepository = Depends(get_user_repository),
+    user_cache: UserCache = Depends(get_user_cache),
+) -> TokenClaims:
+    """
+    Cho các route chỉ đọc, không cần tới Users object.
+    AUTH_CLAIMS_ONLY_READS=true → chỉ verify chữ ký + hạn token, không đụng DB/cache.
+    Mặc định vẫn kiểm tra user còn tồn tại (qua cache) như get_current_user.
+    """
+    claims = _access_token_claims(request, credentials)
+    if not settings.AUTH_CLAIMS_ONLY_READS:
+        await _load_user(claims, user_repo, user_cache)
+    return claims
+
+# ══════════════════════════════════════════════════════════════════════════════
+# Pagination — ?cursor=&limit= dùng chung cho các list endpoint
+# ══════════════════════════════════════════════════════════════════════════════
+
+def get_page_params(
+    cursor: Optional[str] = Query(default=None, description="Giá trị header X-Next-Cursor của trang trước"),
+    limit: int = Query(default=settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
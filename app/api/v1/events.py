@@ -1,16 +1,18 @@
 import uuid
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
-from app.api.deps import get_current_user, get_event_service
+from app.api.deps import get_current_user, get_event_service, get_page_params, get_token_claims
 from app.models.user import Users
+from app.schemas.auth import TokenClaims
 from app.schemas.event import (
     EventCreate,
     EventResponse,
     EventUpdate,
 )
-from app.schemas.template import TemplateResponse
+from app.schemas.pagination import PageParams
+from app.schemas.template import TemplateSummaryResponse
 from app.services.event_service import EventService
 
 router = APIRouter(prefix="/events", tags=["Events"])
@@ -28,17 +30,20 @@ async def create_event(
 
 @router.get("", response_model=List[EventResponse])
 async def list_events(
-    current_user: Users = Depends(get_current_user),
+    response: Response,
+    page: PageParams = Depends(get_page_params),
+    claims: TokenClaims = Depends(get_token_claims),
     event_service: EventService = Depends(get_event_service),
 ) -> List[EventResponse]:
-    events = await event_service.get_all()
-    return [EventResponse.model_validate(e) for e in events]
+    result = await event_service.get_page(page)
+    result.set_cursor_header(response)
+    return [EventResponse.model_validate(e) for e in result.items]
 
 
 @router.get("/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: uuid.UUID,
-    current_user: Users = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims),
     event_service: EventService = Depends(get_event_service),
 ) -> EventResponse:
     event = await event_service.get_by_id(event_id)
@@ -65,11 +70,11 @@ async def delete_event(
     await event_service.delete(event_id)
 
 
-@router.get("/{event_id}/templates", response_model=List[TemplateResponse])
+@router.get("/{event_id}/templates", response_model=List[TemplateSummaryResponse])
 async def list_event_templates(
     event_id: uuid.UUID,
-    current_user: Users = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims),
     event_service: EventService = Depends(get_event_service),
-) -> List[TemplateResponse]:
+) -> List[TemplateSummaryResponse]:
     templates = await event_service.get_templates(event_id)
-    return [TemplateResponse.model_validate(t) for t in templates]
+    return [TemplateSummaryResponse.model_validate(t) for t in templates]
@@ -1,10 +1,14 @@
 import uuid
+from urllib.parse import quote
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
 
-from app.api.deps import get_current_user, get_generated_asset_service
+from app.api.deps import get_current_user, get_generated_asset_service, get_page_params, get_token_claims
 from app.models.user import Users
+from app.schemas.auth import TokenClaims
 from app.schemas.generated_asset import GeneratedAssetResponse
+from app.schemas.pagination import PageParams
 from app.services.generated_asset_service import GeneratedAssetService
 
 router = APIRouter(prefix="/generated-assets", tags=["GeneratedAssets"])
@@ -12,23 +16,44 @@ router = APIRouter(prefix="/generated-assets", tags=["GeneratedAssets"])
 
 @router.get("", response_model=list[GeneratedAssetResponse])
 async def list_assets(
-    current_user: Users = Depends(get_current_user),
+    response: Response,
+    status: str | None = Query(default=None, description="email_status: PENDING / SENT / FAILED"),
+    log_id: uuid.UUID | None = Query(default=None),
+    email: str | None = Query(default=None),
+    page: PageParams = Depends(get_page_params),
+    claims: TokenClaims = Depends(get_token_claims),
     asset_service: GeneratedAssetService = Depends(get_generated_asset_service),
 ) -> list[GeneratedAssetResponse]:
-    assets = await asset_service.get_all()
-    return [GeneratedAssetResponse.model_validate(a) for a in assets]
+    """Mới nhất trước; còn trang sau thì header X-Next-Cursor chứa cursor cho ?cursor=."""
+    result = await asset_service.get_page(page, email_status=status, log_id=log_id, email=email)
+    result.set_cursor_header(response)
+    return [GeneratedAssetResponse.model_validate(a) for a in result.items]
 
 
 @router.get("/{asset_id}", response_model=GeneratedAssetResponse)
 async def get_asset(
     asset_id: uuid.UUID,
-    current_user: Users = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims),
     asset_service: GeneratedAssetService = Depends(get_generated_asset_service),
 ) -> GeneratedAssetResponse:
     asset = await asset_service.get_by_id(asset_id)
     return GeneratedAssetResponse.model_validate(asset)
 
 
+@router.get("/{asset_id}/pdf", response_class=Response)
+async def download_pdf(
+    asset_id: uuid.UUID,
+    claims: TokenClaims = Depends(get_token_claims),
+    asset_service: GeneratedAssetService = Depends(get_generated_asset_service),
+) -> Response:
+    pdf_bytes, filename = await asset_service.get_pdf(asset_id)
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"},
+    )
+
+
 @router.post("/{asset_id}/resend-email", response_model=GeneratedAssetResponse)
 async def resend_email(
     asset_id: uuid.UUID,
@@ -1,16 +1,29 @@
 import uuid
 
-from fastapi import APIRouter, BackgroundTasks, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 
-from app.api.deps import get_current_user, get_generation_log_service
+from app.api.deps import (
+	get_current_user,
+	get_generation_log_service,
+	get_page_params,
+	get_progress_hub,
+	get_token_claims,
+)
+from app.core.config import settings
 from app.models.user import Users
+from app.schemas.auth import TokenClaims
 from app.schemas.generated_asset import GeneratedAssetResponse
 from app.schemas.generation_log import (
 	GenerationLogCreate,
 	GenerationLogResponse,
+	GenerationLogStatsResponse,
 	GenerationLogStatusResponse,
+	GenerationQuotaResponse,
 )
+from app.schemas.pagination import PageParams
 from app.services.generation_log_service import GenerationLogService
+from app.services.progress_hub import ProgressHub
 
 router = APIRouter(prefix="/generation-log", tags=["Generation Log"])
 
@@ -18,32 +31,73 @@ router = APIRouter(prefix="/generation-log", tags=["Generation Log"])
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=GenerationLogResponse)
 async def trigger_generation(
 	payload: GenerationLogCreate,
-	background_tasks: BackgroundTasks,
 	current_user: Users = Depends(get_current_user),
 	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
 ) -> GenerationLogResponse:
 	_ = current_user
-	log = await generation_log_service.trigger(payload, background_tasks)
+	log = await generation_log_service.trigger(payload)
 	return GenerationLogResponse.model_validate(log)
 
 
+@router.post("/{log_id}/resume", response_model=GenerationLogResponse)
+async def resume_generation(
+	log_id: uuid.UUID,
+	current_user: Users = Depends(get_current_user),
+	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
+) -> GenerationLogResponse:
+	_ = current_user
+	log = await generation_log_service.resume(log_id)
+	return GenerationLogResponse.model_validate(log)
+
+
+@router.post("/{log_id}/resend-failed", response_model=GenerationLogStatusResponse)
+async def resend_failed(
+	log_id: uuid.UUID,
+	current_user: Users = Depends(get_current_user),
+	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
+) -> GenerationLogStatusResponse:
+	"""Gửi lại mọi asset FAILED của log (chạy trong worker). Theo dõi tiến độ qua /status."""
+	_ = current_user
+	log = await generation_log_service.resend_failed(log_id)
+	return GenerationLogStatusResponse.model_validate(log)
+
+
 @router.get("", response_model=list[GenerationLogResponse])
 async def get_generation_logs(
-	current_user: Users = Depends(get_current_user),
+	response: Response,
+	status_filter: str | None = Query(default=None, alias="status"),
+	template_id: uuid.UUID | None = Query(default=None),
+	event_id: uuid.UUID | None = Query(default=None),
+	page: PageParams = Depends(get_page_params),
+	claims: TokenClaims = Depends(get_token_claims),
 	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
 ) -> list[GenerationLogResponse]:
-	_ = current_user
-	logs = await generation_log_service.get_all()
-	return [GenerationLogResponse.model_validate(log) for log in logs]
+	_ = claims
+	result = await generation_log_service.get_page(
+		page, status=status_filter, template_id=template_id, event_id=event_id
+	)
+	result.set_cursor_header(response)
+	return [GenerationLogResponse.model_validate(log) for log in result.items]
+
+
+@router.get("/stats", response_model=list[GenerationLogStatsResponse])
+async def get_generation_logs_stats(
+	ids: list[uuid.UUID] = Query(min_length=1, max_length=settings.PAGE_SIZE_MAX),
+	claims: TokenClaims = Depends(get_token_claims),
+	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
+) -> list[GenerationLogStatsResponse]:
+	"""Stats của nhiều log (?ids=a&ids=b), dùng cho trang danh sách log."""
+	_ = claims
+	return await generation_log_service.get_stats_bulk(ids)
 
 
 @router.get("/{log_id}", response_model=GenerationLogResponse)
 async def get_generation_log(
 	log_id: uuid.UUID,
-	current_user: Users = Depends(get_current_user),
+	claims: TokenClaims = Depends(get_token_claims),
 	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
 ) -> GenerationLogResponse:
-	_ = current_user
+	_ = claims
 	log = await generation_log_service.get_by_id(log_id)
 	return GenerationLogResponse.model_validate(log)
 
@@ -51,20 +105,66 @@ async def get_generation_log(
 @router.get("/{log_id}/status", response_model=GenerationLogStatusResponse)
 async def get_generation_log_status(
 	log_id: uuid.UUID,
-	current_user: Users = Depends(get_current_user),
+	claims: TokenClaims = Depends(get_token_claims),
 	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
 ) -> GenerationLogStatusResponse:
-	_ = current_user
+	_ = claims
 	log = await generation_log_service.get_by_id(log_id)
 	return GenerationLogStatusResponse.model_validate(log)
 
 
+@router.get("/{log_id}/events", response_class=StreamingResponse)
+async def stream_generation_log_events(
+	log_id: uuid.UUID,
+	claims: TokenClaims = Depends(get_token_claims),
+	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
+	progress_hub: ProgressHub = Depends(get_progress_hub),
+) -> StreamingResponse:
+	"""
+	Server-Sent Events: `progress`, `asset` (mỗi lần asset đổi trạng thái) và `complete`
+	(log COMPLETED / FAILED, stream đóng — client nên gọi EventSource.close()).
+	Thay cho việc poll /status mỗi giây: auth một lần, người xem cùng log dùng chung một poller.
+	"""
+	_ = claims
+	log = await generation_log_service.get_by_id(log_id)
+	return StreamingResponse(
+		progress_hub.sse(log),
+		media_type="text/event-stream",
+		# X-Accel-Buffering: nginx không gom buffer, event tới client ngay
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+	)
+
+
+@router.get("/{log_id}/stats", response_model=GenerationLogStatsResponse)
+async def get_generation_log_stats(
+	log_id: uuid.UUID,
+	bucket_minutes: int | None = Query(
+		default=None, ge=1, le=1440, description="Kèm throughput SENT/FAILED theo bucket N phút"
+	),
+	claims: TokenClaims = Depends(get_token_claims),
+	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
+) -> GenerationLogStatsResponse:
+	"""Số asset SENT / FAILED / PENDING của log, đếm phía DB thay vì tải mọi asset."""
+	_ = claims
+	return await generation_log_service.get_stats(log_id, bucket_minutes)
+
+
+@router.get("/{log_id}/quota", response_model=GenerationQuotaResponse)
+async def get_generation_log_quota(
+	log_id: uuid.UUID,
+	claims: TokenClaims = Depends(get_token_claims),
+	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
+) -> GenerationQuotaResponse:
+	_ = claims
+	return await generation_log_service.get_quota_status(log_id)
+
+
 @router.get("/{log_id}/assets", response_model=list[GeneratedAssetResponse])
 async def get_generated_assets(
 	log_id: uuid.UUID,
-	current_user: Users = Depends(get_current_user),
+	claims: TokenClaims = Depends(get_token_claims),
 	generation_log_service: GenerationLogService = Depends(get_generation_log_service),
 ) -> list[GeneratedAssetResponse]:
-	_ = current_user
+	_ = claims
 	assets = await generation_log_service.get_assets_by_log_id(log_id)
 	return [GeneratedAssetResponse.model_validate(asset) for asset in assets]
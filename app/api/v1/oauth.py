@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import JSONResponse, RedirectResponse
 
-from app.api.deps import get_current_user
+from app.api.deps import get_token_claims
 from app.core.config import settings
+from app.core.google_clients import reset_gmail_client
 from app.core.google_oauth import (
     get_oauth_flow,
     is_drive_authorized,
@@ -11,14 +12,14 @@ from app.core.google_oauth import (
     is_gmail_authorized,
     save_gmail_credentials,
 )
-from app.models.user import Users
+from app.schemas.auth import TokenClaims
 
 router = APIRouter(prefix="/oauth", tags=["OAuth"])
 
 
 @router.get("/drive/status")
 async def drive_status(
-    current_user: Users = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims),
 ) -> JSONResponse:
     """Check if Google Drive has been authorized via OAuth 2.0."""
     authorized = is_drive_authorized()
@@ -74,7 +75,7 @@ async def drive_callback(
 
 @router.get("/gmail/status")
 async def gmail_status(
-    current_user: Users = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims),
 ) -> JSONResponse:
     """Check if Gmail has been authorized via OAuth 2.0."""
     authorized = is_gmail_authorized()
@@ -115,6 +116,7 @@ async def gmail_callback(
     flow.fetch_token(code=code)
     creds = flow.credentials
     save_gmail_credentials(creds)
+    reset_gmail_client()
     return JSONResponse(
         content={
             "message": "Gmail đã được authorize thành công!",
@@ -1,14 +1,21 @@
+import json
 import uuid
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, Header, Query, Response, status
 
-from app.api.deps import get_current_user, get_template_service
+from app.api.deps import get_current_user, get_page_params, get_template_service, get_token_claims
+from app.core.exceptions import BadRequestException
 from app.models.user import Users
+from app.schemas.auth import TokenClaims
+from app.schemas.pagination import PageParams
 from app.schemas.template import (
+    FontFileResponse,
     PreviewRequest,
     PreviewResponse,
     TemplateCreate,
     TemplateResponse,
+    TemplateSummaryResponse,
     TemplateUpdate,
 )
 from app.services.template_service import TemplateService
@@ -26,22 +33,46 @@ async def create_template(
     return TemplateResponse.model_validate(template)
 
 
-@router.get("", status_code=status.HTTP_200_OK, response_model=list[TemplateResponse])
+@router.get("", status_code=status.HTTP_200_OK, response_model=list[TemplateSummaryResponse])
 async def list_templates(
+    response: Response,
+    event_id: uuid.UUID | None = Query(default=None),
+    page: PageParams = Depends(get_page_params),
     template_service: TemplateService = Depends(get_template_service),
-    current_user: Users = Depends(get_current_user),
-) -> list[TemplateResponse]:
-    templates = await template_service.get_all()
-    return [TemplateResponse.model_validate(t) for t in templates]
+    claims: TokenClaims = Depends(get_token_claims),
+) -> list[TemplateSummaryResponse]:
+    """Không có svg_content — lấy body qua GET /templates/{id} khi content_hash đổi."""
+    result = await template_service.get_page(page, event_id=event_id)
+    result.set_cursor_header(response)
+    return [TemplateSummaryResponse.model_validate(t) for t in result.items]
+
+
+@router.get("/fonts", status_code=status.HTTP_200_OK, response_model=list[FontFileResponse])
+async def list_fonts(
+    template_service: TemplateService = Depends(get_template_service),
+    claims: TokenClaims = Depends(get_token_claims),
+) -> list[FontFileResponse]:
+    """Font bundle trong FONTS_DIR — giá trị hợp lệ cho `fonts` của template."""
+    return [
+        FontFileResponse(filename=filename, families=families)
+        for filename, families in template_service.get_fonts()
+    ]
 
 
 @router.get("/{template_id}", status_code=status.HTTP_200_OK, response_model=TemplateResponse)
 async def get_template(
     template_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
     template_service: TemplateService = Depends(get_template_service),
-    current_user: Users = Depends(get_current_user),
-) -> TemplateResponse:
-    template = await template_service.get_by_id(template_id)
+    claims: TokenClaims = Depends(get_token_claims),
+) -> TemplateResponse | Response:
+    """Body đầy đủ kèm ETag → gửi If-None-Match để nhận 304 khi template không đổi."""
+    etag, template = await template_service.get_with_etag(template_id, if_none_match)
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if template is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
     return TemplateResponse.model_validate(template)
 
 
@@ -75,6 +106,37 @@ async def preview_template(
     template_id: uuid.UUID,
     payload: PreviewRequest,
     template_service: TemplateService = Depends(get_template_service),
-    current_user: Users = Depends(get_current_user),
+    claims: TokenClaims = Depends(get_token_claims),
 ) -> PreviewResponse:
     return await template_service.preview(template_id, payload)
+
+
+@router.get("/{template_id}/preview/render", response_class=Response)
+async def render_preview(
+    template_id: uuid.UUID,
+    format: Literal["png", "pdf"] = "png",
+    width: int = Query(default=1200, ge=16, le=4096, description="Chiều rộng PNG (px)"),
+    data: str | None = Query(default=None, description='JSON sample data, vd. {"name": "Nguyễn Văn A"}'),
+    if_none_match: str | None = Header(default=None),
+    template_service: TemplateService = Depends(get_template_service),
+    claims: TokenClaims = Depends(get_token_claims),
+) -> Response:
+    """Preview PNG/PDF render như certificate thật; có ETag → gửi If-None-Match để nhận 304."""
+    try:
+        sample_data = json.loads(data) if data else {}
+    except json.JSONDecodeError:
+        raise BadRequestException("data phải là JSON object.")
+    if not isinstance(sample_data, dict):
+        raise BadRequestException("data phải là JSON object.")
+    sample_data = {str(k): "" if v is None else str(v) for k, v in sample_data.items()}
+
+    etag, content = await template_service.render_preview(
+        template_id, sample_data, format, width, if_none_match
+    )
+    # no-cache: browser luôn hỏi lại bằng If-None-Match, template sửa là thấy ngay
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+    if content is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    media_type = "image/png" if format == "png" else "application/pdf"
+    headers["Content-Disposition"] = f'inline; filename="preview.{format}"'
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -28,6 +28,13 @@ class Settings(BaseSettings):
     GOOGLE_SERVICE_ACCOUNT_FILE: str = Field(default="credentials/service_account.json")
     GMAIL_SENDER_EMAIL: str = Field(...)
 
+    # ── Google API HTTP (httpx, keep-alive + HTTP/2) ──────────
+    GOOGLE_HTTP_MAX_CONNECTIONS: int = Field(default=20)
+    GOOGLE_HTTP_TIMEOUT_SECONDS: float = Field(default=30.0)
+    # Để trống = Google thật; khi test trỏ sang scripts/google_api_standin.py
+    GOOGLE_SHEETS_API_ENDPOINT: str | None = Field(default=None)
+    GOOGLE_GMAIL_API_ENDPOINT: str | None = Field(default=None)
+
     # ── Google OAuth 2.0 (Drive) ──────────────────────────────
     GOOGLE_CLIENT_SECRET_FILE: str = Field(default="credentials/client_secret.json")
     GOOGLE_TOKEN_FILE: str = Field(default="credentials/token.json")
@@ -40,6 +47,85 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = Field(default="HS256")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60)
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=7)
+    # Cache user đã xác thực theo id (RAM của API process, 0 = tắt). Sửa/xoá user ở
+    # process khác chỉ có hiệu lực sau tối đa TTL này.
+    USER_CACHE_TTL_SECONDS: float = Field(default=60.0)
+    USER_CACHE_MAX_ENTRIES: int = Field(default=1024)
+    # true: các GET chỉ đọc xác thực thuần bằng claims (sub, role) đã ký, không kiểm tra
+    # user còn tồn tại → user bị xoá vẫn đọc được tới khi access token hết hạn
+    AUTH_CLAIMS_ONLY_READS: bool = Field(default=False)
+
+    # ── Password hashing (bcrypt) ─────────────────────────────
+    # Cost factor (2^N vòng). Đổi giá trị → hash cũ được hash lại ở lần login thành công kế tiếp
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31)
+    # Số thread hash/verify song song — login vượt quá thì xếp hàng, event loop không bị chặn
+    PASSWORD_HASH_WORKERS: int = Field(default=2)
+
+    # ── Generation Pipeline ───────────────────────────────────
+    # Render (SVG → PDF, CPU-bound) chạy trong process pool,
+    # Send (Gmail, I/O-bound) là các coroutine gửi song song qua httpx.
+    GENERATION_RENDER_WORKERS: int = Field(default=2)
+    # Recycle render worker sau N lần render hoặc khi RSS vượt ngưỡng (MB, 0 = không giới hạn)
+    RENDER_MAX_TASKS_PER_WORKER: int = Field(default=200)
+    RENDER_MAX_RSS_MB: int = Field(default=512)
+    # Một lần render quá thời gian này → kill worker, asset đó FAILED
+    RENDER_TIMEOUT_SECONDS: float = Field(default=60.0)
+    GENERATION_SEND_WORKERS: int = Field(default=8)
+    # Kích thước hàng đợi giữa các stage — giới hạn số PDF nằm trong RAM
+    GENERATION_STAGE_QUEUE_SIZE: int = Field(default=32)
+    # Render layer tĩnh của template một lần, mỗi certificate chỉ render text có placeholder
+    GENERATION_LAYERED_RENDER: bool = Field(default=True)
+    # Đọc Google Sheets theo trang N dòng (A2:Z1001, A1002:Z2001, ...)
+    SHEETS_PAGE_ROWS: int = Field(default=1000)
+    # Write-behind: gom status asset + processed, flush mỗi N dòng hoặc T ms
+    WRITE_BEHIND_MAX_ROWS: int = Field(default=100)
+    WRITE_BEHIND_FLUSH_MS: int = Field(default=1000)
+    # Kho PDF đã render (content-addressed, LRU) — API và worker phải dùng chung thư mục
+    PDF_STORE_DIR: str = Field(default="storage/pdf")
+    PDF_STORE_MAX_BYTES: int = Field(default=1024 * 1024 * 1024)
+    # Font bundle (.ttf/.otf/.ttc) template được phép dùng + cache fontconfig dùng chung
+    FONTS_DIR: str = Field(default="fonts")
+    FONTS_CACHE_DIR: str = Field(default="storage/fontconfig")
+    # Tối ưu SVG khi lưu template (app/services/svg_optimizer.py)
+    SVG_OPTIMIZE_ENABLED: bool = Field(default=True)
+    # Ảnh nhúng được down-sample về DPI này theo kích thước in trên certificate
+    SVG_IMAGE_DPI: int = Field(default=200)
+    SVG_IMAGE_JPEG_QUALITY: int = Field(default=85)
+    # Số chữ số thập phân giữ lại cho toạ độ path (-1 = không làm tròn)
+    SVG_PATH_PRECISION: int = Field(default=3)
+    # Cache preview PNG/PDF của template editor (RAM của API process)
+    PREVIEW_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024)
+
+    # ── List endpoints (keyset pagination, cursor trả qua header X-Next-Cursor) ──
+    PAGE_SIZE_DEFAULT: int = Field(default=50)
+    PAGE_SIZE_MAX: int = Field(default=500)
+
+    # ── Progress stream (SSE, GET /generation-log/{id}/events) ──
+    # Mỗi log đang có người xem: một poller chung đọc DB mỗi N giây (batch chạy ở worker process khác)
+    PROGRESS_POLL_SECONDS: float = Field(default=2.0)
+    # Không có event trong N giây → gửi comment keep-alive cho proxy không cắt kết nối
+    PROGRESS_HEARTBEAT_SECONDS: float = Field(default=15.0)
+    # Số event tối đa chờ gửi cho một client đọc chậm (đầy thì bỏ event cũ nhất)
+    PROGRESS_QUEUE_SIZE: int = Field(default=1000)
+
+    # ── Generation Worker (python -m app.worker) ──────────────
+    WORKER_POLL_INTERVAL_SECONDS: float = Field(default=2.0)
+    WORKER_LEASE_SECONDS: int = Field(default=60)
+    WORKER_HEARTBEAT_SECONDS: int = Field(default=15)
+    WORKER_MAX_ATTEMPTS: int = Field(default=3)
+    # Batch lỗi còn lượt thử → chạy lại sau N giây × số lần đã thử
+    WORKER_RETRY_BACKOFF_SECONDS: int = Field(default=30)
+
+    # ── Gmail Rate Limit (token bucket chung, bảng gmail_send_quota) ──
+    GMAIL_SEND_RATE_PER_SECOND: float = Field(default=1.0)
+    GMAIL_SEND_BURST: int = Field(default=10)
+    # Google Workspace: 2000 mail/ngày, tài khoản Gmail thường: 500
+    GMAIL_DAILY_QUOTA: int = Field(default=2000)
+    # Gmail trả 429 mà không có Retry-After → tạm dừng gửi bấy nhiêu giây
+    GMAIL_RATE_LIMIT_BACKOFF_SECONDS: int = Field(default=60)
+    # Phải chờ token lâu hơn mức này → hoãn job, trả về hàng đợi
+    GMAIL_MAX_WAIT_SECONDS: int = Field(default=300)
+    GMAIL_MAX_SEND_RETRIES: int = Field(default=3)
 
 # Singleton instance — import và dùng ở khắp nơi
 settings = Settings()
\ No newline at end of file
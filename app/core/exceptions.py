@@ -28,3 +28,8 @@ class BadRequestException(AppException):
 class ForbiddenException(AppException):
 	def __init__(self, detail: str = "Không có quyền truy cập.") -> None:
 		super().__init__(detail=detail, status_code=403)
+
+
+class TooManyRequestsException(AppException):
+	def __init__(self, detail: str = "Vượt quá giới hạn, vui lòng thử lại sau.") -> None:
+		super().__init__(detail=detail, status_code=429)
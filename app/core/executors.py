@@ -0,0 +1,84 @@
+"""
+App-scoped executors cho các công việc không được chạy trên event loop.
+
+- Render pool: process pool cho cairosvg/lxml (CPU-bound, giữ GIL), worker được
+  recycle theo số task / RSS và có timeout cho từng lần render (app/core/render_pool.py).
+  Trước khi tạo pool, fontconfig được cấu hình để thấy font bundle (FONTS_DIR); mỗi
+  worker warm-up font ngay khi khởi động.
+
+- Password pool: thread pool nhỏ (PASSWORD_HASH_WORKERS) cho bcrypt hash/verify của
+  login/register. bcrypt nhả GIL khi tính hash → một lần ~250ms không chặn event loop,
+  và số thread giới hạn nên một đợt login dồn dập không chiếm hết CPU của API process.
+
+Google APIs (Sheets/Gmail) đã chạy async qua httpx (app/core/google_http.py)
+nên không cần thread pool cho I/O.
+
+Pool được tạo (prestart) khi API / worker khởi động và đóng khi process dừng.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.fonts import configure_fontconfig, get_font_registry
+from app.core.render_pool import RenderPool
+from app.services.render_worker import warm_up
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_render_pool: RenderPool | None = None
+_password_pool: ThreadPoolExecutor | None = None
+
+
+def get_render_pool() -> RenderPool:
+    global _render_pool
+    with _lock:
+        if _render_pool is None:
+            # Process con (spawn) kế thừa FONTCONFIG_FILE → phải đặt trước khi tạo worker
+            try:
+                configure_fontconfig()
+            except OSError:
+                logger.warning("Cannot write fontconfig config, using system fonts only", exc_info=True)
+            families = sorted({
+                family
+                for font in get_font_registry().files().values()
+                for family in font.families
+            })
+            _render_pool = RenderPool(
+                size=settings.GENERATION_RENDER_WORKERS,
+                max_tasks_per_worker=settings.RENDER_MAX_TASKS_PER_WORKER,
+                max_rss_mb=settings.RENDER_MAX_RSS_MB,
+                timeout_seconds=settings.RENDER_TIMEOUT_SECONDS,
+                initializer=(warm_up, (families,)),
+            )
+        return _render_pool
+
+
+async def prestart_render_pool() -> None:
+    """Tạo sẵn render worker lúc process khởi động — font được warm-up trước request/job đầu."""
+    await asyncio.to_thread(lambda: get_render_pool().prestart())
+
+
+def get_password_pool() -> ThreadPoolExecutor:
+    global _password_pool
+    with _lock:
+        if _password_pool is None:
+            _password_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.PASSWORD_HASH_WORKERS),
+                thread_name_prefix="password-hash",
+            )
+        return _password_pool
+
+
+def shutdown_executors() -> None:
+    global _render_pool, _password_pool
+    with _lock:
+        if _render_pool is not None:
+            _render_pool.close()
+            _render_pool = None
+        if _password_pool is not None:
+            _password_pool.shutdown(wait=False, cancel_futures=True)
+            _password_pool = None
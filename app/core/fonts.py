@@ -0,0 +1,248 @@
+"""
+Registry font đóng gói kèm app (thư mục FONTS_DIR: .ttf / .otf / .ttc).
+
+- Đọc tên family trực tiếp từ bảng `name` của file font (không cần fontconfig)
+  → API validate được template khi lưu: mọi font-family template dùng phải thuộc
+  các file font template khai báo, là generic family (sans-serif, ...), hoặc được
+  fontconfig tìm thấy (font hệ thống như DejaVu Sans) — hỏi `fc-match` với cùng fonts.conf
+  của render worker và so family nó trả về, không chấp nhận font fallback.
+- configure_fontconfig() sinh fonts.conf trỏ tới FONTS_DIR + cache dir riêng và đặt
+  FONTCONFIG_FILE trước khi process render khởi động → cairo tìm thấy font bundle,
+  cache fontconfig được ghi một lần và dùng lại cho mọi worker.
+"""
+
+import logging
+import os
+import re
+import struct
+import subprocess
+import threading
+from dataclasses import dataclass
+from xml.sax.saxutils import escape
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+# cairosvg chỉ dùng family đầu tiên của font-family; generic family luôn resolve được
+GENERIC_FAMILIES = {"serif", "sans-serif", "monospace", "cursive", "fantasy", "system-ui"}
+
+# name ID 1 = Font Family, 16 = Typographic Family (fontconfig khớp cả hai)
+_FAMILY_NAME_IDS = (1, 16)
+_CSS_FONT_FAMILY_RE = re.compile(r"font-family\s*:\s*([^;}]+)", re.IGNORECASE)
+# Ký tự đặc biệt trong pattern của fontconfig ("Family-10:bold")
+_FC_PATTERN_SPECIAL_RE = re.compile(r"([\\\-:,])")
+FC_MATCH_TIMEOUT_SECONDS = 5
+
+
+@dataclass(frozen=True)
+class FontFile:
+    filename: str
+    families: frozenset[str]
+
+
+def _decode_name(platform_id: int, raw: bytes) -> str | None:
+    if platform_id in (0, 3):
+        return raw.decode("utf-16-be", errors="ignore")
+    if platform_id == 1:
+        return raw.decode("mac_roman", errors="ignore")
+    return None
+
+
+def _read_families(path: str) -> set[str]:
+    """Tên family trong bảng `name` của một file sfnt (TTF/OTF, kể cả collection .ttc)."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    offsets = [0]
+    if data[:4] == b"ttcf":
+        (count,) = struct.unpack_from(">I", data, 8)
+        offsets = list(struct.unpack_from(f">{count}I", data, 12))
+
+    families: set[str] = set()
+    for offset in offsets:
+        (num_tables,) = struct.unpack_from(">H", data, offset + 4)
+        for i in range(num_tables):
+            tag, _, table_offset, _ = struct.unpack_from(">4sIII", data, offset + 12 + 16 * i)
+            if tag != b"name":
+                continue
+            _, count, string_offset = struct.unpack_from(">HHH", data, table_offset)
+            for r in range(count):
+                platform_id, _, _, name_id, length, value_offset = struct.unpack_from(
+                    ">HHHHHH", data, table_offset + 6 + 12 * r
+                )
+                if name_id not in _FAMILY_NAME_IDS:
+                    continue
+                start = table_offset + string_offset + value_offset
+                name = _decode_name(platform_id, data[start:start + length])
+                if name and name.strip():
+                    families.add(name.strip())
+    return families
+
+
+def referenced_families(svg_tree) -> set[str]:
+    """Family đầu tiên của mọi khai báo font-family (attribute, style="...", <style>)."""
+    declarations: list[str] = []
+    for element in svg_tree.iter():
+        if not isinstance(element.tag, str):
+            continue
+        if element.get("font-family"):
+            declarations.append(element.get("font-family"))
+        if element.get("style"):
+            declarations.extend(_CSS_FONT_FAMILY_RE.findall(element.get("style")))
+        if element.tag.endswith("style") and element.text:
+            declarations.extend(_CSS_FONT_FAMILY_RE.findall(element.text))
+
+    families: set[str] = set()
+    for declaration in declarations:
+        first = declaration.split(",")[0].strip().strip("\"'").strip()
+        if first and first.lower() != "inherit":
+            families.add(first)
+    return families
+
+
+class FontRegistry:
+    def __init__(self, fonts_dir: str = settings.FONTS_DIR) -> None:
+        self.fonts_dir = os.path.abspath(fonts_dir)
+        self._lock = threading.Lock()
+        self._mtime: float | None = None
+        self._files: dict[str, FontFile] = {}
+        # family (casefold) → fontconfig có font đúng family đó không; xoá khi FONTS_DIR đổi
+        self._fontconfig: dict[str, bool] = {}
+
+    def files(self) -> dict[str, FontFile]:
+        """filename → FontFile. Quét lại thư mục khi có font được thêm/xoá."""
+        try:
+            mtime = os.stat(self.fonts_dir).st_mtime
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                self._files = self._scan()
+                self._fontconfig.clear()
+                self._mtime = mtime
+            return self._files
+
+    def unresolved(self, font_files: list[str], families: set[str]) -> tuple[list[str], list[str]]:
+        """
+        (file không có trong registry, family không resolve được): family phải thuộc các file
+        đã khai báo, là generic family, hoặc được fontconfig tìm thấy (font hệ thống / FONTS_DIR).
+        Gọi fc-match (subprocess) khi gặp family mới → không gọi trực tiếp trên event loop.
+        """
+        registered = self.files()
+        missing_files = [name for name in font_files if name not in registered]
+        available = {
+            family.casefold()
+            for name in font_files
+            if name in registered
+            for family in registered[name].families
+        }
+        missing_families = sorted(
+            family
+            for family in families
+            if family.casefold() not in available
+            and family.lower() not in GENERIC_FAMILIES
+            and not self._fontconfig_has(family)
+        )
+        return missing_files, missing_families
+
+    def _fontconfig_has(self, family: str) -> bool:
+        key = family.casefold()
+        with self._lock:
+            cached = self._fontconfig.get(key)
+        if cached is not None:
+            return cached
+        matched = fontconfig_match(family, self.fonts_dir)
+        if matched is None:
+            # Không hỏi được fontconfig → không cache, lần sau thử lại
+            return False
+        found = key in matched
+        with self._lock:
+            self._fontconfig[key] = found
+        return found
+
+    def _scan(self) -> dict[str, FontFile]:
+        files: dict[str, FontFile] = {}
+        for entry in sorted(os.scandir(self.fonts_dir), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.lower().endswith(FONT_EXTENSIONS):
+                continue
+            try:
+                families = _read_families(entry.path)
+            except (OSError, struct.error):
+                # File hỏng / không phải sfnt → không đăng ký
+                continue
+            files[entry.name] = FontFile(entry.name, frozenset(families))
+        return files
+
+
+def configure_fontconfig(
+    fonts_dir: str = settings.FONTS_DIR,
+    cache_dir: str = settings.FONTS_CACHE_DIR,
+) -> str:
+    """
+    Ghi fonts.conf (config hệ thống + FONTS_DIR + cache dir) và đặt FONTCONFIG_FILE.
+    Phải gọi trước khi cairo được load trong process (process con kế thừa biến môi trường).
+    """
+    fonts_dir = os.path.abspath(fonts_dir)
+    cache_dir = os.path.abspath(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    conf_path = os.path.join(cache_dir, "fonts.conf")
+    conf = (
+        '<?xml version="1.0"?>\n'
+        '<!DOCTYPE fontconfig SYSTEM "fonts.dtd">\n'
+        "<fontconfig>\n"
+        '  <include ignore_missing="yes">/etc/fonts/fonts.conf</include>\n'
+        f"  <dir>{escape(fonts_dir)}</dir>\n"
+        f"  <cachedir>{escape(cache_dir)}</cachedir>\n"
+        "</fontconfig>\n"
+    )
+    try:
+        with open(conf_path) as f:
+            unchanged = f.read() == conf
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        tmp_path = f"{conf_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(conf)
+        os.replace(tmp_path, conf_path)
+    os.environ["FONTCONFIG_FILE"] = conf_path
+    return conf_path
+
+
+def fontconfig_match(family: str, fonts_dir: str = settings.FONTS_DIR) -> set[str] | None:
+    """
+    Family (casefold) của font fontconfig chọn cho `family` — cùng fonts.conf với render worker.
+    fc-match luôn trả về một font (fallback) → caller so tên family. None nếu không chạy được fc-match.
+    """
+    env = dict(os.environ)
+    try:
+        env["FONTCONFIG_FILE"] = configure_fontconfig(fonts_dir)
+    except OSError:
+        logger.warning("Cannot write fontconfig config, matching against system fonts only", exc_info=True)
+    try:
+        result = subprocess.run(
+            ["fc-match", "--format=%{family}", _FC_PATTERN_SPECIAL_RE.sub(r"\\\1", family)],
+            capture_output=True,
+            text=True,
+            timeout=FC_MATCH_TIMEOUT_SECONDS,
+            env=env,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError) as exc:
+        logger.warning("fc-match failed for font-family %r: %s", family, exc)
+        return None
+    return {name.strip().casefold() for name in result.stdout.split(",") if name.strip()}
+
+
+_registry: FontRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_font_registry() -> FontRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = FontRegistry()
+        return _registry
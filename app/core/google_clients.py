@@ -0,0 +1,99 @@
+"""
+Google API clients dùng chung cho cả process (API và worker).
+
+- build() chỉ chạy một lần cho mỗi API, dùng discovery document đóng gói sẵn trong
+  google-api-python-client (static_discovery=True) → không gọi mạng, không ghi cache.
+  Resource chỉ dùng để dựng request; việc gửi do app/core/google_http.py (httpx) đảm nhận.
+- Credentials được giữ trong RAM và refresh khi hết hạn (google_http.execute).
+- Gmail: token file đổi (authorize lại, kể cả từ process khác) → client được tạo lại.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+
+from google.oauth2 import service_account
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import Resource, build
+
+from app.core.config import settings
+from app.core.google_oauth import get_gmail_credentials
+
+SHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+
+
+@dataclass(frozen=True)
+class GmailClient:
+    credentials: Credentials
+    resource: Resource
+    token_mtime: float
+
+
+_lock = threading.Lock()
+_sheets: tuple[service_account.Credentials, Resource] | None = None
+_gmail: GmailClient | None = None
+
+
+def _build(api: str, version: str, credentials, api_endpoint: str | None) -> Resource:
+    return build(
+        api,
+        version,
+        credentials=credentials,
+        cache_discovery=False,
+        static_discovery=True,
+        # Trỏ sang stand-in server khi test (scripts/google_api_standin.py)
+        client_options={"api_endpoint": api_endpoint} if api_endpoint else None,
+    )
+
+
+def get_sheets_client() -> tuple[service_account.Credentials, Resource]:
+    """(credentials, resource) của Sheets API — service account, tạo một lần."""
+    global _sheets
+    if _sheets is None:
+        with _lock:
+            if _sheets is None:
+                credentials = service_account.Credentials.from_service_account_file(
+                    settings.GOOGLE_SERVICE_ACCOUNT_FILE,
+                    scopes=SHEETS_SCOPES,
+                )
+                resource = _build("sheets", "v4", credentials, settings.GOOGLE_SHEETS_API_ENDPOINT)
+                _sheets = (credentials, resource)
+    return _sheets
+
+
+def _gmail_token_mtime() -> float | None:
+    try:
+        return os.stat(settings.GOOGLE_GMAIL_TOKEN_FILE).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def get_gmail_client() -> GmailClient | None:
+    """Gmail client dùng chung. None nếu Gmail chưa được authorize."""
+    global _gmail
+    mtime = _gmail_token_mtime()
+    if mtime is None:
+        return None
+    client = _gmail
+    if client is not None and client.token_mtime == mtime:
+        return client
+
+    with _lock:
+        if _gmail is not None and _gmail.token_mtime == _gmail_token_mtime():
+            return _gmail
+        # Đọc token file (refresh + ghi lại nếu đã hết hạn) — chỉ khi token đổi
+        creds = get_gmail_credentials()
+        if creds is None:
+            _gmail = None
+            return None
+        resource = _build("gmail", "v1", creds, settings.GOOGLE_GMAIL_API_ENDPOINT)
+        _gmail = GmailClient(creds, resource, _gmail_token_mtime() or mtime)
+        return _gmail
+
+
+def reset_gmail_client() -> None:
+    """Bỏ client hiện tại (sau khi authorize lại hoặc refresh token bị thu hồi)."""
+    global _gmail
+    with _lock:
+        _gmail = None
+
@@ -0,0 +1,129 @@
+"""
+Async transport cho Google APIs (httpx, keep-alive + HTTP/2).
+
+googleapiclient vẫn dựng request từ discovery document (URL, query, body) nhưng
+không execute: request được gửi qua một httpx.AsyncClient dùng chung của process,
+nên Sheets/Gmail call không chặn event loop và tái sử dụng kết nối.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+
+import httpx
+from google.auth.transport.requests import Request
+from googleapiclient.http import HttpRequest
+
+from app.core.config import settings
+
+# Reason Google trả về khi vượt rate/quota (kèm HTTP 429 hoặc 403)
+_RATE_LIMIT_REASONS = {
+    "rateLimitExceeded",
+    "userRateLimitExceeded",
+    "dailyLimitExceeded",
+    "quotaExceeded",
+    "RATE_LIMIT_EXCEEDED",
+}
+
+
+class GoogleApiError(Exception):
+    def __init__(
+        self,
+        status_code: int,
+        message: str,
+        reasons: set[str] | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        self.status_code = status_code
+        self.reasons = reasons or set()
+        self.retry_after = retry_after
+        super().__init__(f"HTTP {status_code}: {message}")
+
+    @property
+    def is_rate_limited(self) -> bool:
+        if self.status_code == 429:
+            return True
+        return self.status_code == 403 and bool(self.reasons & _RATE_LIMIT_REASONS)
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "GoogleApiError":
+        message = response.text
+        reasons: set[str] = set()
+        try:
+            error = response.json().get("error", {})
+        except ValueError:
+            error = {}
+        if isinstance(error, dict):
+            message = error.get("message", message)
+            for item in [*error.get("errors", []), *error.get("details", [])]:
+                if isinstance(item, dict) and item.get("reason"):
+                    reasons.add(item["reason"])
+        try:
+            retry_after = float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+        return cls(response.status_code, message, reasons, retry_after)
+
+
+@dataclass
+class _LoopState:
+    loop: asyncio.AbstractEventLoop
+    client: httpx.AsyncClient
+    refresh_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+_state: _LoopState | None = None
+
+
+def _get_state() -> _LoopState:
+    # AsyncClient gắn với event loop tạo ra nó → mỗi loop một client
+    global _state
+    loop = asyncio.get_running_loop()
+    if _state is None or _state.loop is not loop or _state.client.is_closed:
+        client = httpx.AsyncClient(
+            http2=True,
+            timeout=settings.GOOGLE_HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GOOGLE_HTTP_MAX_CONNECTIONS,
+            ),
+        )
+        _state = _LoopState(loop=loop, client=client)
+    return _state
+
+
+async def close_http_client() -> None:
+    global _state
+    if _state is not None:
+        state, _state = _state, None
+        await state.client.aclose()
+
+
+async def _ensure_token(credentials, force: bool = False) -> None:
+    if credentials.valid and not force:
+        return
+    async with _get_state().refresh_lock:
+        if credentials.valid and not force:
+            return
+        # google-auth chỉ có transport sync cho refresh → chạy ngoài event loop
+        await asyncio.to_thread(credentials.refresh, Request())
+
+
+async def execute(request: HttpRequest, credentials) -> dict:
+    """Gửi request đã dựng bởi googleapiclient qua httpx. Raise GoogleApiError nếu HTTP lỗi."""
+    client = _get_state().client
+    for attempt in range(2):
+        await _ensure_token(credentials, force=attempt > 0)
+        headers = dict(request.headers)
+        credentials.apply(headers)
+        response = await client.request(
+            request.method,
+            request.uri,
+            content=request.body,
+            headers=headers,
+        )
+        # 401: access token bị thu hồi sớm → refresh và thử lại một lần
+        if response.status_code != 401:
+            break
+    if response.is_error:
+        raise GoogleApiError.from_response(response)
+    return response.json() if response.content else {}
@@ -0,0 +1,310 @@
+"""
+Process pool cho render SVG → PDF (cairosvg/lxml), thay cho ProcessPoolExecutor.
+
+- Mỗi worker là một process "spawn" nhận task qua Pipe, chạy lần lượt từng task.
+- Worker tự nghỉ sau `max_tasks_per_worker` task hoặc khi RSS vượt `max_rss_mb`
+  → process mới thay thế ngay, RAM không phình dần qua các batch lớn.
+- Mỗi task có timeout cứng: quá hạn thì kill worker đang chạy task đó và raise
+  RenderTimeoutError (chỉ task đó lỗi, các task khác không bị ảnh hưởng).
+- initializer chạy một lần khi worker khởi động (warm-up font/fontconfig); prestart()
+  tạo sẵn worker và worker nghỉ được thay ngay → phần warm-up không nằm trên đường render.
+- stats(): kích thước pool, số worker bận/rảnh, số task đang chờ, số lần recycle/timeout.
+
+Việc chờ worker + chờ kết quả chạy trong thread pool riêng của pool (`size` thread, không
+dùng default executor của loop) nên render chậm không chiếm thread của asyncio.to_thread,
+và pool không gắn với event loop nào, dùng được từ API, worker và script.
+"""
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import pickle
+import signal
+import threading
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from multiprocessing.process import BaseProcess
+from typing import Any, Callable
+
+
+class RenderTimeoutError(Exception):
+    """Render quá `timeout` giây — worker đã bị kill."""
+
+
+class RenderWorkerError(Exception):
+    """Worker chết giữa chừng (bị OOM kill, crash trong thư viện C, ...)."""
+
+
+def _current_rss() -> int:
+    """RSS hiện tại (bytes) của process. 0 nếu không đọc được."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # Không có /proc (macOS): dùng peak RSS, đơn vị bytes trên macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        return 0
+
+
+def _worker_main(
+    conn: Connection,
+    max_tasks: int,
+    max_rss_bytes: int,
+    initializer: tuple[Callable[..., Any], tuple] | None,
+) -> None:
+    # Ctrl+C gửi SIGINT cho cả process group → để process cha quyết định việc dừng
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if initializer is not None:
+        fn, args = initializer
+        try:
+            fn(*args)
+        except Exception:
+            # Warm-up lỗi không chặn render — task đầu tiên sẽ tự khởi tạo
+            pass
+    done = 0
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        fn, args = message
+        try:
+            status, payload = "ok", fn(*args)
+        except Exception as exc:
+            status, payload = "error", exc
+        done += 1
+        retire = done >= max_tasks or (max_rss_bytes > 0 and _current_rss() > max_rss_bytes)
+        try:
+            conn.send((status, payload, retire))
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Exception không pickle được → gửi lại dạng chuỗi
+            conn.send(("error", RuntimeError(f"{type(payload).__name__}: {payload}"), retire))
+        if retire:
+            return
+
+
+@dataclass(eq=False)
+class _Worker:
+    process: BaseProcess
+    conn: Connection
+
+
+class RenderPool:
+    def __init__(
+        self,
+        size: int,
+        max_tasks_per_worker: int,
+        max_rss_mb: int,
+        timeout_seconds: float,
+        initializer: tuple[Callable[..., Any], tuple] | None = None,
+    ) -> None:
+        self.size = max(1, size)
+        self.max_tasks_per_worker = max(1, max_tasks_per_worker)
+        self.max_rss_mb = max(0, max_rss_mb)
+        self.timeout_seconds = timeout_seconds
+        self.initializer = initializer
+        # "spawn" thay vì fork: fork một process đang chạy event loop + threads
+        # có thể copy lock đang bị giữ sang process con.
+        self._ctx = multiprocessing.get_context("spawn")
+
+        self._cond = threading.Condition()
+        self._idle: list[_Worker] = []
+        self._workers: set[_Worker] = set()
+        self._starting = 0
+        # Task đã submit mà chưa xong (đang render + đang chờ worker)
+        self._inflight = 0
+        self._closed = False
+        # Mỗi task giữ một thread suốt lúc render → đủ `size` thread, task dư chờ trong queue
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.size, thread_name_prefix="render-pool"
+        )
+        self._counters = {"renders": 0, "recycled": 0, "timeouts": 0, "crashes": 0}
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Chạy fn(*args) trong một worker process. fn phải import được ở module top-level."""
+        with self._cond:
+            if self._closed:
+                raise RenderWorkerError("Render pool đã đóng.")
+            self._inflight += 1
+        try:
+            future = self._executor.submit(self._run, fn, args)
+        except RuntimeError as exc:
+            # close() chạy ngay sau lần kiểm tra ở trên
+            with self._cond:
+                self._inflight -= 1
+            raise RenderWorkerError("Render pool đã đóng.") from exc
+        future.add_done_callback(self._task_done)
+        return await asyncio.wrap_future(future)
+
+    def prestart(self) -> None:
+        """Tạo đủ `size` worker ngay (chúng chạy initializer song song trong lúc chờ task)."""
+        while self._spawn_idle():
+            pass
+
+    def stats(self) -> dict[str, int | float]:
+        with self._cond:
+            alive = len(self._workers)
+            idle = len(self._idle)
+            return {
+                "size": self.size,
+                "alive": alive,
+                "busy": alive - idle,
+                "idle": idle,
+                "queued": max(0, self._inflight - (alive - idle)),
+                **self._counters,
+                "max_tasks_per_worker": self.max_tasks_per_worker,
+                "max_rss_mb": self.max_rss_mb,
+                "timeout_seconds": self.timeout_seconds,
+            }
+
+    def close(self) -> None:
+        """Dừng mọi worker. Task đang chạy nhận RenderWorkerError."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            busy = [worker for worker in self._workers if worker not in idle]
+            self._idle.clear()
+            self._workers.clear()
+            self._cond.notify_all()
+        for worker in idle:
+            self._discard(worker, graceful=True)
+        for worker in busy:
+            self._discard(worker, graceful=False)
+        # Task còn trong queue vẫn chạy và nhận RenderWorkerError từ _acquire
+        self._executor.shutdown(wait=False)
+
+    def _task_done(self, _: concurrent.futures.Future) -> None:
+        with self._cond:
+            self._inflight -= 1
+
+    def _run(self, fn: Callable[..., Any], args: tuple) -> Any:
+        worker = self._acquire()
+        reusable = retired = False
+        try:
+            worker.conn.send((fn, args))
+            if not worker.conn.poll(self.timeout_seconds):
+                self._count("timeouts")
+                raise RenderTimeoutError(f"Render quá {self.timeout_seconds:g}s, worker đã bị dừng.")
+            status, payload, retire = worker.conn.recv()
+            self._count("renders")
+            if retire:
+                self._count("recycled")
+                retired = True
+            else:
+                reusable = True
+            if status == "error":
+                raise payload
+            return payload
+        except (EOFError, OSError) as exc:
+            self._count("crashes")
+            worker.process.join(timeout=1)
+            raise RenderWorkerError(
+                f"Render worker dừng đột ngột (exit code {worker.process.exitcode})."
+            ) from exc
+        finally:
+            self._release(worker, reusable, retired)
+
+    def _acquire(self) -> _Worker:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RenderWorkerError("Render pool đã đóng.")
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._workers) + self._starting < self.size:
+                    self._starting += 1
+                    break
+                self._cond.wait()
+
+        # Spawn ngoài lock (import app trong process con mất vài trăm ms)
+        worker = None
+        try:
+            worker = self._spawn()
+            return worker
+        finally:
+            with self._cond:
+                self._starting -= 1
+                if worker is not None:
+                    self._workers.add(worker)
+                self._cond.notify()
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.max_tasks_per_worker, self.max_rss_mb * 1024 * 1024, self.initializer),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process=process, conn=parent_conn)
+
+    def _release(self, worker: _Worker, reusable: bool, retired: bool) -> None:
+        with self._cond:
+            if reusable and not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+            self._workers.discard(worker)
+            self._cond.notify()
+        # Worker tự nghỉ (đủ task / RSS cao) → chờ nó thoát; timeout / crash → kill
+        self._discard(worker, graceful=reusable or retired)
+        # Thay ngay bằng worker mới để nó warm-up trước khi có task tiếp theo
+        try:
+            self._spawn_idle()
+        except OSError:
+            # Không tạo được process lúc này → _acquire sẽ spawn lại khi cần
+            pass
+
+    def _spawn_idle(self) -> bool:
+        """Thêm một worker rảnh nếu pool chưa đủ `size`. False nếu đã đủ / đã đóng."""
+        with self._cond:
+            if self._closed or len(self._workers) + self._starting >= self.size:
+                return False
+            self._starting += 1
+
+        try:
+            worker = self._spawn()
+        except BaseException:
+            with self._cond:
+                self._starting -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._starting -= 1
+            added = not self._closed
+            if added:
+                self._workers.add(worker)
+                self._idle.append(worker)
+            self._cond.notify()
+        if not added:
+            # close() chạy trong lúc spawn
+            self._discard(worker, graceful=True)
+        return added
+
+    @staticmethod
+    def _discard(worker: _Worker, graceful: bool) -> None:
+        if graceful:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+            worker.process.join(timeout=1)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=5)
+        worker.conn.close()
+
+    def _count(self, name: str) -> None:
+        with self._cond:
+            self._counters[name] += 1
@@ -2,6 +2,7 @@
 Security utilities: JWT encode/decode + password hashing.
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
@@ -9,17 +10,38 @@ import bcrypt
 from jose import jwt
 
 from app.core.config import settings
+from app.core.executors import get_password_pool
 
 
 # ── Password Hashing ──────────────────────────────────────────────────────────
-def hash_password(plain_password: str) -> str:
-    return bcrypt.hashpw(plain_password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+# Bản sync tốn ~250ms CPU (cost 12) — trong async code dùng bản *_async (password pool)
+def hash_password(plain_password: str, rounds: int | None = None) -> str:
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(plain_password.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Hash dạng $2b$<cost>$... có cost khác BCRYPT_ROUNDS."""
+    try:
+        return int(hashed_password.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+
+async def hash_password_async(plain_password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_pool(), hash_password, plain_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_password_pool(), verify_password, plain_password, hashed_password)
+
+
 # ── JWT ───────────────────────────────────────────────────────────────────────
 def _create_token(data: dict[str, Any], expires_delta: timedelta) -> str:
     payload = data.copy()
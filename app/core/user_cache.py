@@ -0,0 +1,84 @@
+"""
+Cache user đã xác thực trong RAM của API process (deps.get_current_user).
+
+Mỗi request có token hợp lệ trước đây tốn một SELECT users; giờ chỉ SELECT khi cache
+miss hoặc entry quá USER_CACHE_TTL_SECONDS. Giới hạn USER_CACHE_MAX_ENTRIES user, đầy
+thì bỏ user ít dùng nhất (LRU).
+
+Cache giữ snapshot các cột (tuple bất biến), không giữ ORM object: mỗi lần hit trả về
+một Users transient mới → không dính session của request khác. UserRepository.update /
+delete gọi invalidate() ngay và lần nữa sau khi transaction commit (bản cũ có thể được put()
+lại trong khoảng giữa); process khác (nhiều worker uvicorn) thấy thay đổi chậm nhất sau TTL.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.core.config import settings
+from app.models.user import Users
+
+_COLUMNS = ("id", "email", "name", "role", "hashed_password", "created_at")
+
+
+class UserCache:
+    def __init__(
+        self,
+        ttl_seconds: float = settings.USER_CACHE_TTL_SECONDS,
+        max_entries: int = settings.USER_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_seconds = max(0.0, ttl_seconds)
+        self.max_entries = max(0, max_entries)
+        # user_id → (hết hạn lúc (monotonic), giá trị các cột)
+        self._items: OrderedDict[uuid.UUID, tuple[float, tuple]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, user_id: uuid.UUID) -> Users | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._items.get(user_id)
+            if entry is None:
+                return None
+            expires_at, values = entry
+            if expires_at <= time.monotonic():
+                del self._items[user_id]
+                return None
+            self._items.move_to_end(user_id)
+        return Users(**dict(zip(_COLUMNS, values)))
+
+    def put(self, user: Users) -> None:
+        if not self.enabled:
+            return
+        values = tuple(getattr(user, column) for column in _COLUMNS)
+        with self._lock:
+            self._items.pop(user.id, None)
+            self._items[user.id] = (time.monotonic() + self.ttl_seconds, values)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._items.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_cache: UserCache | None = None
+_cache_lock = threading.Lock()
+
+
+def shared_user_cache() -> UserCache:
+    """UserCache dùng chung của process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UserCache()
+        return _cache
@@ -1,14 +1,27 @@
 import os
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
+from app.api.deps import get_token_claims
 from app.api.v1.router import api_router
 from app.core.config import settings
 from app.core.exception_handlers import register_exception_handlers
+from app.core.executors import get_render_pool, prestart_render_pool, shutdown_executors
+from app.core.google_http import close_http_client
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await prestart_render_pool()
+    yield
+    await close_http_client()
+    shutdown_executors()
+
 
 app = FastAPI(
     title="GDGoC Certificate System API",
@@ -16,6 +29,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 if settings.APP_ENV == "development":
@@ -25,6 +39,8 @@ if settings.APP_ENV == "development":
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # FE đọc cursor trang sau + ETag của preview
+        expose_headers=["X-Next-Cursor", "ETag"],
     )
 
 register_exception_handlers(app)
@@ -36,6 +52,15 @@ async def health() -> dict[str, str]:
     return {"status": "ok", "version": "1.0.0"}
 
 
+@app.get("/health/render-pool", tags=["Health"], dependencies=[Depends(get_token_claims)])
+async def render_pool_health() -> dict[str, int | float]:
+    """
+    Trạng thái render pool của API process (worker process có pool riêng, xem log).
+    Cần access token — liveness không cần đăng nhập dùng `/health`.
+    """
+    return get_render_pool().stats()
+
+
 STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "static"))
 
 if os.path.exists(STATIC_DIR):
@@ -4,5 +4,7 @@ from app.models.event import Events
 from app.models.template import Templates
 from app.models.generation_log import GenerationLog
 from app.models.generated_asset import GeneratedAssets
+from app.models.generation_job import GenerationJobs
+from app.models.gmail_send_quota import GmailSendQuota
 
-__all__ = ["Base", "Users", "Events", "Templates", "GeneratedAssets", "GenerationLog"]
\ No newline at end of file
+__all__ = ["Base", "Users", "Events", "Templates", "GeneratedAssets", "GenerationLog", "GenerationJobs", "GmailSendQuota"]
\ No newline at end of file
@@ -13,7 +13,8 @@ class Events(Base):
     __tablename__ = 'events'
     __table_args__ = (
         ForeignKeyConstraint(['created_by'], ['users.id'], name='FK_Events_Users'),
-        PrimaryKeyConstraint('id', name='PK__events__3213E83FE6B789F9')
+        PrimaryKeyConstraint('id', name='PK__events__3213E83FE6B789F9'),
+        Index('IX_events_created_at', 'created_at', 'id'),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, server_default=text('(newid())'))
@@ -2,7 +2,7 @@ import datetime
 import uuid
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKeyConstraint, PrimaryKeyConstraint, String, Unicode, text
+from sqlalchemy import DateTime, ForeignKeyConstraint, Index, Integer, PrimaryKeyConstraint, String, Unicode, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER as Uuid
 
@@ -13,7 +13,20 @@ class GeneratedAssets(Base):
     __tablename__ = 'generated_assets'
     __table_args__ = (
         ForeignKeyConstraint(['generation_log_id'], ['generation_log.id'], ondelete='CASCADE', name='FK_GeneratedAssets_GenerationLog'),
-        PrimaryKeyConstraint('id', name='PK__generate__3213E83FC395744C')
+        PrimaryKeyConstraint('id', name='PK__generate__3213E83FC395744C'),
+        # Checkpoint resume (get_checkpoints) đọc hết từ index, không lookup về bảng
+        Index('IX_generated_assets_log_row', 'generation_log_id', 'row_index',
+              mssql_include=['row_hash', 'email_status', 'pdf_key']),
+        # Keyset (created_at, id) — list không filter / filter theo log / status / email
+        Index('IX_generated_assets_created_at', 'created_at', 'id'),
+        Index('IX_generated_assets_log_created_at', 'generation_log_id', 'created_at', 'id'),
+        Index('IX_generated_assets_status_created_at', 'email_status', 'created_at', 'id'),
+        Index('IX_generated_assets_email_created_at', 'participant_email', 'created_at', 'id'),
+        # Đếm / lấy asset theo trạng thái của một log (count_by_status, resend-failed)
+        Index('IX_generated_assets_log_status_row', 'generation_log_id', 'email_status', 'row_index'),
+        # Throughput theo phút của một log (GET /generation-log/{id}/stats?bucket_minutes=)
+        Index('IX_generated_assets_log_updated_at', 'generation_log_id', 'updated_at',
+              mssql_include=['email_status']),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, server_default=text('(newid())'))
@@ -23,5 +36,11 @@ class GeneratedAssets(Base):
     email_status: Mapped[str] = mapped_column(String(50, 'SQL_Latin1_General_CP1_CI_AS'), nullable=False, server_default=text("('PENDING')"))
     drive_file_id: Mapped[Optional[str]] = mapped_column(String(255, 'SQL_Latin1_General_CP1_CI_AS'))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
+    # UTC, lần đổi email_status gần nhất (SENT / FAILED) — NULL = chưa xử lý hoặc trước migration 010
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    row_index: Mapped[Optional[int]] = mapped_column(Integer)
+    row_hash: Mapped[Optional[str]] = mapped_column(String(64, 'SQL_Latin1_General_CP1_CI_AS'))
+    row_data: Mapped[Optional[str]] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'))
+    pdf_key: Mapped[Optional[str]] = mapped_column(String(64, 'SQL_Latin1_General_CP1_CI_AS'))
 
     generation_log: Mapped['GenerationLog'] = relationship('GenerationLog', back_populates='generated_assets')
\ No newline at end of file
@@ -0,0 +1,37 @@
+import datetime
+import uuid
+from typing import Optional
+
+from sqlalchemy import DateTime, ForeignKeyConstraint, Index, Integer, PrimaryKeyConstraint, String, Unicode, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER as Uuid
+
+from app.models.base import Base
+
+
+class GenerationJobs(Base):
+    __tablename__ = 'generation_jobs'
+    __table_args__ = (
+        ForeignKeyConstraint(['generation_log_id'], ['generation_log.id'], ondelete='CASCADE', name='FK_GenerationJobs_GenerationLog'),
+        PrimaryKeyConstraint('id', name='PK_generation_jobs'),
+        Index('IX_generation_jobs_status_created_at', 'status', 'created_at'),
+        # Job mới nhất của log theo kind (get_latest_by_log_id) + has_active không lookup
+        Index('IX_generation_jobs_log_kind_created_at', 'generation_log_id', 'kind', 'created_at',
+              mssql_include=['status']),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, server_default=text('(newid())'))
+    generation_log_id: Mapped[uuid.UUID] = mapped_column(Uuid, nullable=False)
+    status: Mapped[str] = mapped_column(String(50, 'SQL_Latin1_General_CP1_CI_AS'), nullable=False, server_default=text("('QUEUED')"))
+    kind: Mapped[str] = mapped_column(String(50, 'SQL_Latin1_General_CP1_CI_AS'), nullable=False, server_default=text("('GENERATE')"))
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('((0))'))
+    column_mapping: Mapped[Optional[str]] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'))
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(255, 'SQL_Latin1_General_CP1_CI_AS'))
+    lease_expires_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    heartbeat_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    available_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'))
+    created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
+
+    generation_log: Mapped['GenerationLog'] = relationship('GenerationLog', back_populates='generation_jobs')
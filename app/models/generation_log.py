@@ -2,7 +2,7 @@ import datetime
 import uuid
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKeyConstraint, Integer, PrimaryKeyConstraint, String, Unicode, text
+from sqlalchemy import DateTime, ForeignKeyConstraint, Index, Integer, PrimaryKeyConstraint, String, Unicode, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER as Uuid
 
@@ -13,7 +13,11 @@ class GenerationLog(Base):
     __tablename__ = 'generation_log'
     __table_args__ = (
         ForeignKeyConstraint(['template_id'], ['templates.id'], name='FK_GenerationLog_Templates'),
-        PrimaryKeyConstraint('id', name='PK__generati__3213E83F8C66FEFF')
+        PrimaryKeyConstraint('id', name='PK__generati__3213E83F8C66FEFF'),
+        # Keyset (created_at, id) — list không filter / filter theo status / template (event)
+        Index('IX_generation_log_created_at', 'created_at', 'id'),
+        Index('IX_generation_log_status_created_at', 'status', 'created_at', 'id'),
+        Index('IX_generation_log_template_created_at', 'template_id', 'created_at', 'id'),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, server_default=text('(newid())'))
@@ -28,3 +32,4 @@ class GenerationLog(Base):
 
     template: Mapped['Templates'] = relationship('Templates', back_populates='generation_log')
     generated_assets: Mapped[list['GeneratedAssets']] = relationship('GeneratedAssets', back_populates='generation_log')
+    generation_jobs: Mapped[list['GenerationJobs']] = relationship('GenerationJobs', back_populates='generation_log')
@@ -0,0 +1,22 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, Float, Integer, PrimaryKeyConstraint, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class GmailSendQuota(Base):
+    __tablename__ = 'gmail_send_quota'
+    __table_args__ = (
+        PrimaryKeyConstraint('sender', name='PK_gmail_send_quota'),
+    )
+
+    sender: Mapped[str] = mapped_column(String(255, 'SQL_Latin1_General_CP1_CI_AS'), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False, server_default=text('((0))'))
+    refilled_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    quota_day: Mapped[Optional[datetime.date]] = mapped_column(Date)
+    sent_today: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('((0))'))
+    blocked_until: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
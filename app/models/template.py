@@ -2,7 +2,7 @@ import datetime
 import uuid
 from typing import Optional
 
-from sqlalchemy import DateTime, ForeignKeyConstraint, PrimaryKeyConstraint, Unicode, text
+from sqlalchemy import DateTime, ForeignKeyConstraint, Index, PrimaryKeyConstraint, String, Unicode, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.mssql import UNIQUEIDENTIFIER as Uuid
 
@@ -13,14 +13,23 @@ class Templates(Base):
     __tablename__ = 'templates'
     __table_args__ = (
         ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE', name='FK_Templates_Events'),
-        PrimaryKeyConstraint('id', name='PK__template__3213E83F16B290F0')
+        PrimaryKeyConstraint('id', name='PK__template__3213E83F16B290F0'),
+        # Keyset (created_at, id) — list không filter / filter theo event
+        Index('IX_templates_created_at', 'created_at', 'id'),
+        Index('IX_templates_event_created_at', 'event_id', 'created_at', 'id'),
     )
 
     id: Mapped[uuid.UUID] = mapped_column(Uuid, primary_key=True, server_default=text('(newid())'))
     event_id: Mapped[uuid.UUID] = mapped_column(Uuid, nullable=False)
     name: Mapped[str] = mapped_column(Unicode(255, 'SQL_Latin1_General_CP1_CI_AS'), nullable=False)
     svg_content: Mapped[str] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'), nullable=False)
+    # Bản đã tối ưu (app/services/svg_optimizer.py) dùng để render; NULL → render svg_content
+    svg_optimized: Mapped[Optional[str]] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'))
+    # sha256 của svg_content — version của body, list view trả về mà không cần đọc SVG
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64, 'SQL_Latin1_General_CP1_CI_AS'))
     variables: Mapped[str] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'), nullable=False)
+    # JSON list tên file font trong FONTS_DIR mà template dùng (app/core/fonts.py)
+    fonts: Mapped[Optional[str]] = mapped_column(Unicode(collation='SQL_Latin1_General_CP1_CI_AS'))
     created_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
 
     event: Mapped['Events'] = relationship('Events', back_populates='templates')
@@ -5,6 +5,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.event import Events
 from app.models.template import Templates
+from app.repositories.pagination import paginate
+from app.repositories.template_repository import SUMMARY_COLUMNS
+from app.schemas.pagination import Page, PageParams
 
 
 class EventRepository:
@@ -15,11 +18,8 @@ class EventRepository:
         result = await self._db.execute(select(Events).where(Events.id == event_id))
         return result.scalar_one_or_none()
 
-    async def get_all(self) -> list[Events]:
-        result = await self._db.execute(
-            select(Events).order_by(Events.created_at.desc())
-        )
-        return list(result.scalars().all())
+    async def get_page(self, params: PageParams) -> Page[Events]:
+        return await paginate(self._db, select(Events), Events, params)
 
     async def create(self, event: Events) -> Events:
         self._db.add(event)
@@ -37,6 +37,8 @@ class EventRepository:
         await self._db.flush()
 
     async def get_templates(self, event_id: uuid.UUID) -> list[Templates]:
-        # simple query by foreign key
-        result = await self._db.execute(select(Templates).where(Templates.event_id == event_id))
+        # simple query by foreign key — chỉ cột summary, không kéo svg_content
+        result = await self._db.execute(
+            select(Templates).options(SUMMARY_COLUMNS).where(Templates.event_id == event_id)
+        )
         return list(result.scalars().all())
\ No newline at end of file
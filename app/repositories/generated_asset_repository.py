@@ -1,19 +1,40 @@
+import datetime
 import uuid
-from sqlalchemy import select
+from collections import defaultdict
+
+from sqlalchemy import Integer, String, Unicode, Uuid, column, func, insert, literal_column, select, update, values
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.generated_asset import GeneratedAssets
+from app.repositories.pagination import paginate
+from app.schemas.pagination import Page, PageParams
+
+# SQL Server giới hạn 2100 tham số / câu lệnh
+_IN_CHUNK_SIZE = 1000
+# set_pdf_keys: 3 tham số / dòng
+_PDF_KEY_CHUNK_SIZE = 600
 
 
 class GeneratedAssetRepository:
     def __init__(self, db: AsyncSession) -> None:
         self._db = db
 
-    async def get_all(self) -> list[GeneratedAssets]:
-        result = await self._db.execute(
-            select(GeneratedAssets).order_by(GeneratedAssets.created_at.desc())
-        )
-        return list(result.scalars().all())
+    async def get_page(
+        self,
+        params: PageParams,
+        email_status: str | None = None,
+        log_id: uuid.UUID | None = None,
+        email: str | None = None,
+    ) -> Page[GeneratedAssets]:
+        stmt = select(GeneratedAssets)
+        if email_status is not None:
+            stmt = stmt.where(GeneratedAssets.email_status == email_status)
+        if log_id is not None:
+            stmt = stmt.where(GeneratedAssets.generation_log_id == log_id)
+        if email is not None:
+            # Collation CI → so sánh không phân biệt hoa thường, vẫn dùng được index
+            stmt = stmt.where(GeneratedAssets.participant_email == email)
+        return await paginate(self._db, stmt, GeneratedAssets, params)
 
     async def get_by_id(self, asset_id: uuid.UUID) -> GeneratedAssets | None:
         result = await self._db.execute(
@@ -29,12 +50,191 @@ class GeneratedAssetRepository:
         )
         return list(result.scalars().all())
 
+    async def get_by_log_id_and_status(
+        self,
+        log_id: uuid.UUID,
+        email_status: str,
+    ) -> list[GeneratedAssets]:
+        result = await self._db.execute(
+            select(GeneratedAssets)
+            .where(
+                GeneratedAssets.generation_log_id == log_id,
+                GeneratedAssets.email_status == email_status,
+            )
+            .order_by(GeneratedAssets.row_index.asc())
+        )
+        return list(result.scalars().all())
+
+    async def count_by_status(self, log_id: uuid.UUID, email_status: str) -> int:
+        result = await self._db.execute(
+            select(func.count())
+            .select_from(GeneratedAssets)
+            .where(
+                GeneratedAssets.generation_log_id == log_id,
+                GeneratedAssets.email_status == email_status,
+            )
+        )
+        return result.scalar_one()
+
+    async def count_by_status_for_logs(
+        self,
+        log_ids: list[uuid.UUID],
+    ) -> dict[uuid.UUID, dict[str, int]]:
+        """{log_id: {email_status: count}} — GROUP BY (generation_log_id, email_status), không load asset."""
+        counts: defaultdict[uuid.UUID, dict[str, int]] = defaultdict(dict)
+        for start in range(0, len(log_ids), _IN_CHUNK_SIZE):
+            chunk = log_ids[start:start + _IN_CHUNK_SIZE]
+            result = await self._db.execute(
+                select(
+                    GeneratedAssets.generation_log_id,
+                    GeneratedAssets.email_status,
+                    func.count().label("count"),
+                )
+                .where(GeneratedAssets.generation_log_id.in_(chunk))
+                .group_by(GeneratedAssets.generation_log_id, GeneratedAssets.email_status)
+            )
+            for row in result.all():
+                counts[row.generation_log_id][row.email_status] = row.count
+        return dict(counts)
+
+    async def throughput(
+        self,
+        log_id: uuid.UUID,
+        bucket_minutes: int,
+    ) -> list[tuple[datetime.datetime, str, int]]:
+        """
+        (đầu bucket, email_status, count) theo updated_at, mỗi bucket `bucket_minutes` phút.
+        DATEADD(minute, DATEDIFF(minute, 0, updated_at) / n * n, 0) — hằng số viết thẳng vào
+        câu lệnh để biểu thức ở SELECT và GROUP BY giống hệt nhau (SQL Server yêu cầu).
+        """
+        minutes = func.datediff(
+            literal_column("minute"), literal_column("0"), GeneratedAssets.updated_at, type_=Integer
+        )
+        width = literal_column(str(int(bucket_minutes)), Integer)
+        bucket = func.dateadd(
+            literal_column("minute"), minutes // width * width, literal_column("0"),
+            type_=GeneratedAssets.updated_at.type,
+        )
+        bucket_col = bucket.label("bucket")
+        result = await self._db.execute(
+            select(bucket_col, GeneratedAssets.email_status, func.count().label("count"))
+            .where(
+                GeneratedAssets.generation_log_id == log_id,
+                GeneratedAssets.updated_at.is_not(None),
+            )
+            .group_by(bucket, GeneratedAssets.email_status)
+            .order_by(bucket_col)
+        )
+        return [(row.bucket, row.email_status, row.count) for row in result.all()]
+
+    async def get_status_changes(
+        self,
+        log_id: uuid.UUID,
+        since: datetime.datetime | None,
+        recent_seconds: int = 0,
+    ) -> list[tuple[uuid.UUID, str, datetime.datetime]]:
+        """
+        (asset_id, email_status, updated_at) đổi trạng thái sau `since`, cũ trước.
+        since = None → trong `recent_seconds` giây gần nhất theo đồng hồ DB (updated_at
+        cũng do DB ghi) → không so giờ của máy API với giờ của máy worker.
+        """
+        bound = since
+        if bound is None:
+            bound = func.dateadd(literal_column("second"), -recent_seconds, func.sysutcdatetime())
+        result = await self._db.execute(
+            select(GeneratedAssets.id, GeneratedAssets.email_status, GeneratedAssets.updated_at)
+            .where(
+                GeneratedAssets.generation_log_id == log_id,
+                GeneratedAssets.updated_at > bound,
+            )
+            .order_by(GeneratedAssets.updated_at.asc())
+        )
+        return [(row.id, row.email_status, row.updated_at) for row in result.all()]
+
     async def create(self, asset: GeneratedAssets) -> GeneratedAssets:
         self._db.add(asset)
         await self._db.flush()
         await self._db.refresh(asset)
         return asset
 
+    async def bulk_create(
+        self,
+        log_id: uuid.UUID,
+        participants: list[tuple[str, str, int | None, str | None, str | None, str | None]],
+    ) -> list[uuid.UUID]:
+        """
+        Insert nhiều asset PENDING cho một log.
+        participants: (participant_name, participant_email, row_index, row_hash, row_data, pdf_key).
+        Trả về id theo đúng thứ tự đầu vào.
+
+        id được sinh phía client để SQLAlchemy dùng làm sentinel cho
+        insertmanyvalues: gom thành các câu INSERT nhiều dòng
+        (… OUTPUT inserted.id VALUES (…), (…)) thay vì mỗi dòng một round-trip.
+        """
+        if not participants:
+            return []
+
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "generation_log_id": log_id,
+                "participant_name": name,
+                "participant_email": email,
+                "email_status": "PENDING",
+                "row_index": row_index,
+                "row_hash": row_hash,
+                "row_data": row_data,
+                "pdf_key": pdf_key,
+            }
+            for name, email, row_index, row_hash, row_data, pdf_key in participants
+        ]
+        result = await self._db.execute(
+            insert(GeneratedAssets).returning(GeneratedAssets.id, sort_by_parameter_order=True),
+            rows,
+        )
+        return list(result.scalars().all())
+
+    async def get_checkpoints(
+        self,
+        log_id: uuid.UUID,
+    ) -> dict[tuple[int, str], tuple[uuid.UUID, str, str | None]]:
+        """(row_index, row_hash) → (asset_id, email_status, pdf_key) của các dòng đã tạo cho log."""
+        result = await self._db.execute(
+            select(
+                GeneratedAssets.row_index,
+                GeneratedAssets.row_hash,
+                GeneratedAssets.id,
+                GeneratedAssets.email_status,
+                GeneratedAssets.pdf_key,
+            ).where(
+                GeneratedAssets.generation_log_id == log_id,
+                GeneratedAssets.row_index.is_not(None),
+            )
+        )
+        return {
+            (row.row_index, row.row_hash): (row.id, row.email_status, row.pdf_key)
+            for row in result.all()
+        }
+
+    async def set_pdf_keys(self, items: list[tuple[uuid.UUID, str, str]]) -> None:
+        """Cập nhật (asset_id, row_data, pdf_key) — asset cũ được xử lý lại với template hiện tại."""
+        if not items:
+            return
+        # Một câu UPDATE ... FROM (VALUES ...) cho mỗi chunk, không dùng executemany
+        for start in range(0, len(items), _PDF_KEY_CHUNK_SIZE):
+            staged = values(
+                column("id", Uuid),
+                column("row_data", Unicode),
+                column("pdf_key", String(64)),
+                name="staged",
+            ).data(items[start:start + _PDF_KEY_CHUNK_SIZE])
+            await self._db.execute(
+                update(GeneratedAssets)
+                .where(GeneratedAssets.id == staged.c.id)
+                .values(row_data=staged.c.row_data, pdf_key=staged.c.pdf_key)
+                .execution_options(synchronize_session=False)
+            )
+
     async def update(self, asset: GeneratedAssets) -> GeneratedAssets:
         await self._db.flush()
         await self._db.refresh(asset)
@@ -51,9 +251,26 @@ class GeneratedAssetRepository:
             return None
 
         asset.email_status = email_status
+        asset.updated_at = func.sysutcdatetime()
         if drive_file_id:
             asset.drive_file_id = drive_file_id
 
         await self._db.flush()
         await self._db.refresh(asset)
-        return asset
\ No newline at end of file
+        return asset
+
+    async def bulk_update_status(
+        self,
+        asset_ids: list[uuid.UUID],
+        email_status: str,
+    ) -> None:
+        for start in range(0, len(asset_ids), _IN_CHUNK_SIZE):
+            chunk = asset_ids[start:start + _IN_CHUNK_SIZE]
+            await self._db.execute(
+                update(GeneratedAssets)
+                .where(GeneratedAssets.id.in_(chunk))
+                .values(
+                    email_status=email_status,
+                    updated_at=func.sysutcdatetime(),
+                )
+            )
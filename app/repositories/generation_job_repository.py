@@ -0,0 +1,224 @@
+import datetime
+import uuid
+
+from sqlalchemy import and_, func, literal_column, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.generation_job import GenerationJobs
+
+
+# SQL Server bỏ qua with_for_update() → khoá hàng bằng table hint
+_CLAIM_HINT = "WITH (UPDLOCK, ROWLOCK, READPAST)"
+
+
+def _utc_now():
+    # Dùng đồng hồ của DB cho lease → không phụ thuộc đồng hồ từng worker
+    return func.sysutcdatetime()
+
+
+def _utc_after(seconds: int):
+    return func.dateadd(literal_column("second"), seconds, func.sysutcdatetime())
+
+
+class GenerationJobRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+
+    async def get_by_id(self, job_id: uuid.UUID) -> GenerationJobs | None:
+        result = await self._db.execute(
+            select(GenerationJobs).where(GenerationJobs.id == job_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_latest_by_log_id(
+        self,
+        log_id: uuid.UUID,
+        kind: str | None = None,
+    ) -> GenerationJobs | None:
+        query = select(GenerationJobs).where(GenerationJobs.generation_log_id == log_id)
+        if kind is not None:
+            query = query.where(GenerationJobs.kind == kind)
+        result = await self._db.execute(
+            query
+            .order_by(GenerationJobs.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def has_active(self, log_id: uuid.UUID) -> bool:
+        result = await self._db.execute(
+            select(GenerationJobs.id)
+            .where(
+                GenerationJobs.generation_log_id == log_id,
+                GenerationJobs.status.in_(("QUEUED", "RUNNING")),
+            )
+            .limit(1)
+        )
+        return result.first() is not None
+
+    async def create(self, job: GenerationJobs) -> GenerationJobs:
+        self._db.add(job)
+        await self._db.flush()
+        await self._db.refresh(job)
+        return job
+
+    async def claim(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> GenerationJobs | None:
+        """
+        Lấy job QUEUED cũ nhất (hoặc job RUNNING đã hết lease) và giữ lease.
+        UPDLOCK + READPAST: nhiều worker claim song song không bao giờ lấy trùng job.
+        """
+        result = await self._db.execute(
+            select(GenerationJobs)
+            .where(
+                or_(
+                    GenerationJobs.status == "QUEUED",
+                    and_(
+                        GenerationJobs.status == "RUNNING",
+                        GenerationJobs.lease_expires_at < _utc_now(),
+                    ),
+                ),
+                GenerationJobs.attempts < max_attempts,
+                or_(
+                    GenerationJobs.available_at.is_(None),
+                    GenerationJobs.available_at <= _utc_now(),
+                ),
+            )
+            .order_by(GenerationJobs.created_at.asc())
+            .limit(1)
+            .with_hint(GenerationJobs, _CLAIM_HINT, "mssql")
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+
+        job.status = "RUNNING"
+        job.attempts += 1
+        job.lease_owner = worker_id
+        job.lease_expires_at = _utc_after(lease_seconds)
+        job.heartbeat_at = _utc_now()
+        job.updated_at = _utc_now()
+        await self._db.flush()
+        await self._db.refresh(job)
+        return job
+
+    async def heartbeat(self, job_id: uuid.UUID, worker_id: str, lease_seconds: int) -> bool:
+        """Gia hạn lease. False = worker đã mất lease (job bị worker khác lấy)."""
+        result = await self._db.execute(
+            update(GenerationJobs)
+            .where(
+                GenerationJobs.id == job_id,
+                GenerationJobs.lease_owner == worker_id,
+                GenerationJobs.status == "RUNNING",
+            )
+            .values(heartbeat_at=_utc_now(), lease_expires_at=_utc_after(lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    async def finish(
+        self,
+        job_id: uuid.UUID,
+        worker_id: str,
+        status: str,
+        last_error: str | None = None,
+    ) -> None:
+        """Kết thúc job (DONE/FAILED)."""
+        await self._db.execute(
+            update(GenerationJobs)
+            .where(GenerationJobs.id == job_id, GenerationJobs.lease_owner == worker_id)
+            .values(
+                status=status,
+                last_error=last_error,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=_utc_now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def release(self, job_id: uuid.UUID, worker_id: str) -> None:
+        """Trả job về QUEUED khi worker tắt có chủ đích — không tính là một lần thử."""
+        await self._db.execute(
+            update(GenerationJobs)
+            .where(GenerationJobs.id == job_id, GenerationJobs.lease_owner == worker_id)
+            .values(
+                status="QUEUED",
+                attempts=GenerationJobs.attempts - 1,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=_utc_now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def defer(self, job_id: uuid.UUID, worker_id: str, available_at: datetime.datetime) -> None:
+        """Hoãn job (hết quota Gmail): QUEUED lại, chỉ claim được sau available_at (UTC)."""
+        await self._db.execute(
+            update(GenerationJobs)
+            .where(GenerationJobs.id == job_id, GenerationJobs.lease_owner == worker_id)
+            .values(
+                status="QUEUED",
+                attempts=GenerationJobs.attempts - 1,
+                available_at=available_at,
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=_utc_now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def retry(
+        self,
+        job_id: uuid.UUID,
+        worker_id: str,
+        delay_seconds: int,
+        last_error: str | None = None,
+    ) -> None:
+        """Batch lỗi nhưng còn lượt thử: QUEUED lại sau delay_seconds — lần chạy vừa rồi vẫn tính."""
+        await self._db.execute(
+            update(GenerationJobs)
+            .where(GenerationJobs.id == job_id, GenerationJobs.lease_owner == worker_id)
+            .values(
+                status="QUEUED",
+                last_error=last_error,
+                available_at=_utc_after(delay_seconds),
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=_utc_now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def fail_exhausted(self, max_attempts: int) -> list[uuid.UUID]:
+        """Đánh FAILED các job đã hết lease và hết lượt thử. Trả về generation_log_id."""
+        result = await self._db.execute(
+            select(GenerationJobs.id, GenerationJobs.generation_log_id)
+            .where(
+                GenerationJobs.status == "RUNNING",
+                GenerationJobs.lease_expires_at < _utc_now(),
+                GenerationJobs.attempts >= max_attempts,
+            )
+            .with_hint(GenerationJobs, _CLAIM_HINT, "mssql")
+        )
+        rows = result.all()
+        if not rows:
+            return []
+
+        await self._db.execute(
+            update(GenerationJobs)
+            .where(GenerationJobs.id.in_([row.id for row in rows]))
+            .values(
+                status="FAILED",
+                last_error="Worker mất lease quá số lần thử cho phép.",
+                lease_owner=None,
+                lease_expires_at=None,
+                updated_at=_utc_now(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return [row.generation_log_id for row in rows]
@@ -1,10 +1,13 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.generation_log import GenerationLog
+from app.models.template import Templates
+from app.repositories.pagination import paginate
+from app.schemas.pagination import Page, PageParams
 
 
 class GenerationLogRepository:
@@ -17,12 +20,34 @@ class GenerationLogRepository:
 		)
 		return result.scalar_one_or_none()
 
-	async def get_all(self) -> list[GenerationLog]:
+	async def get_by_ids(self, log_ids: list[uuid.UUID]) -> list[GenerationLog]:
+		if not log_ids:
+			return []
 		result = await self._db.execute(
-			select(GenerationLog).order_by(GenerationLog.created_at.desc())
+			select(GenerationLog).where(GenerationLog.id.in_(log_ids))
 		)
 		return list(result.scalars().all())
 
+	async def get_page(
+		self,
+		params: PageParams,
+		status: str | None = None,
+		template_id: uuid.UUID | None = None,
+		event_id: uuid.UUID | None = None,
+	) -> Page[GenerationLog]:
+		stmt = select(GenerationLog)
+		if status is not None:
+			stmt = stmt.where(GenerationLog.status == status)
+		if template_id is not None:
+			stmt = stmt.where(GenerationLog.template_id == template_id)
+		if event_id is not None:
+			stmt = stmt.where(
+				GenerationLog.template_id.in_(
+					select(Templates.id).where(Templates.event_id == event_id)
+				)
+			)
+		return await paginate(self._db, stmt, GenerationLog, params)
+
 	async def create(self, log: GenerationLog) -> GenerationLog:
 		self._db.add(log)
 		await self._db.flush()
@@ -56,3 +81,26 @@ class GenerationLogRepository:
 		log.processed += 1
 		log.updated_at = datetime.now(timezone.utc)
 		await self._db.flush()
+
+	async def add_processed(self, log_id: uuid.UUID, count: int) -> None:
+		"""processed = processed + count, tính phía DB (không SELECT trước)."""
+		await self._db.execute(
+			update(GenerationLog)
+			.where(GenerationLog.id == log_id)
+			.values(
+				processed=GenerationLog.processed + count,
+				updated_at=datetime.now(timezone.utc),
+			)
+		)
+
+	async def add_total_records(self, log_id: uuid.UUID, count: int, processed: int = 0) -> None:
+		"""total_records += count (và processed += processed) khi đọc thêm một trang sheet."""
+		await self._db.execute(
+			update(GenerationLog)
+			.where(GenerationLog.id == log_id)
+			.values(
+				total_records=GenerationLog.total_records + count,
+				processed=GenerationLog.processed + processed,
+				updated_at=datetime.now(timezone.utc),
+			)
+		)
@@ -0,0 +1,63 @@
+import datetime
+
+from sqlalchemy import DateTime, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.gmail_send_quota import GmailSendQuota
+
+
+# Giữ khoá hàng tới hết transaction → các worker lấy token lần lượt
+_LOCK_HINT = "WITH (UPDLOCK, ROWLOCK)"
+
+
+def _db_now():
+    # Đồng hồ của DB (UTC) → mọi worker dùng chung một mốc thời gian
+    return func.sysutcdatetime(type_=DateTime)
+
+
+class GmailQuotaRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+
+    async def get(self, sender: str) -> tuple[GmailSendQuota | None, datetime.datetime]:
+        """Đọc trạng thái bucket (không khoá) kèm thời điểm hiện tại của DB."""
+        result = await self._db.execute(
+            select(GmailSendQuota, _db_now()).where(GmailSendQuota.sender == sender)
+        )
+        row = result.first()
+        if row is None:
+            return None, await self.now()
+        return row[0], row[1]
+
+    async def now(self) -> datetime.datetime:
+        result = await self._db.execute(select(_db_now()))
+        return result.scalar_one()
+
+    async def lock(self, sender: str) -> tuple[GmailSendQuota, datetime.datetime]:
+        """
+        SELECT ... WITH (UPDLOCK, ROWLOCK) hàng của sender (tạo mới nếu chưa có).
+        Caller sửa object rồi commit để nhả khoá.
+        """
+        row = await self._select_locked(sender)
+        if row is None:
+            try:
+                async with self._db.begin_nested():
+                    self._db.add(GmailSendQuota(sender=sender))
+            except IntegrityError:
+                # Worker khác vừa tạo cùng lúc → dùng hàng của nó
+                pass
+            row = await self._select_locked(sender)
+        return row
+
+    async def _select_locked(self, sender: str) -> tuple[GmailSendQuota, datetime.datetime] | None:
+        result = await self._db.execute(
+            select(GmailSendQuota, _db_now())
+            .where(GmailSendQuota.sender == sender)
+            .with_hint(GmailSendQuota, _LOCK_HINT, "mssql")
+            .execution_options(populate_existing=True)
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return row[0], row[1]
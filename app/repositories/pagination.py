@@ -0,0 +1,68 @@
+"""
+Keyset pagination cho các list endpoint.
+
+Thứ tự cố định (created_at DESC, id DESC); cursor mã hoá (created_at, id) của dòng cuối
+trang trước. Trang sau = WHERE (created_at, id) < cursor ... TOP(limit + 1): không OFFSET,
+không COUNT(*) → thời gian mỗi trang không phụ thuộc số dòng của bảng.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+import uuid
+
+from sqlalchemy import Select, and_, cast, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import BadRequestException
+from app.schemas.pagination import Page, PageParams
+
+
+def encode_cursor(created_at: datetime.datetime | None, row_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime | None, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return (
+            datetime.datetime.fromisoformat(created_at) if created_at else None,
+            uuid.UUID(row_id),
+        )
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequestException("Cursor không hợp lệ.")
+
+
+async def paginate(db: AsyncSession, stmt: Select, model, params: PageParams) -> Page:
+    """Áp keyset (model.created_at, model.id) lên `stmt` (đã có filter) và lấy một trang."""
+    created_col, id_col = model.created_at, model.id
+
+    if params.cursor:
+        created_at, row_id = decode_cursor(params.cursor)
+        if created_at is None:
+            # NULL đứng cuối khi sắp DESC (SQL Server) → chỉ còn các dòng NULL phía sau
+            stmt = stmt.where(created_col.is_(None), id_col < row_id)
+        else:
+            if db.get_bind().dialect.name == "mssql":
+                # Cột DATETIME (3.33ms) so với tham số datetime2 bị lệch → ép tham số về DATETIME
+                created_at = cast(created_at, created_col.type)
+            stmt = stmt.where(
+                or_(
+                    created_col < created_at,
+                    and_(created_col == created_at, id_col < row_id),
+                    created_col.is_(None),
+                )
+            )
+
+    stmt = stmt.order_by(created_col.desc(), id_col.desc()).limit(params.limit + 1)
+    rows = list((await db.execute(stmt)).scalars().all())
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return Page(items=rows, next_cursor=next_cursor)
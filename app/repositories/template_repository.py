@@ -2,8 +2,24 @@ import uuid
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
 from app.models.template import Templates
+from app.repositories.pagination import paginate
+from app.schemas.pagination import Page, PageParams
+
+# List view chỉ SELECT các cột nhẹ: svg_content / svg_optimized (1–5 MB mỗi template) ở lại DB.
+# raiseload: lỡ đọc body trên object summary thì báo lỗi ngay thay vì lazy load từng dòng.
+SUMMARY_COLUMNS = load_only(
+    Templates.id,
+    Templates.event_id,
+    Templates.name,
+    Templates.variables,
+    Templates.fonts,
+    Templates.content_hash,
+    Templates.created_at,
+    raiseload=True,
+)
 
 
 class TemplateRepository:
@@ -16,15 +32,31 @@ class TemplateRepository:
         )
         return result.scalar_one_or_none()
 
-    async def get_all(self) -> list[Templates]:
+    async def get_summary_by_id(self, template_id: uuid.UUID) -> Templates | None:
         result = await self._db.execute(
-            select(Templates).order_by(Templates.created_at.desc())
+            select(Templates).options(SUMMARY_COLUMNS).where(Templates.id == template_id)
         )
-        return list(result.scalars().all())
+        return result.scalar_one_or_none()
+
+    async def load_body(self, template: Templates) -> Templates:
+        """Nạp svg_content / svg_optimized cho object lấy bằng get_summary_by_id."""
+        await self._db.refresh(template, attribute_names=["svg_content", "svg_optimized"])
+        return template
+
+    async def get_page(
+        self,
+        params: PageParams,
+        event_id: uuid.UUID | None = None,
+    ) -> Page[Templates]:
+        stmt = select(Templates).options(SUMMARY_COLUMNS)
+        if event_id is not None:
+            stmt = stmt.where(Templates.event_id == event_id)
+        return await paginate(self._db, stmt, Templates, params)
 
     async def get_by_event_id(self, event_id: uuid.UUID) -> list[Templates]:
         result = await self._db.execute(
             select(Templates)
+            .options(SUMMARY_COLUMNS)
             .where(Templates.event_id == event_id)
             .order_by(Templates.created_at.desc())
         )
@@ -1,8 +1,9 @@
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.user_cache import shared_user_cache
 from app.models.user import Users
 
 
@@ -31,8 +32,20 @@ class UserRepository:
 	async def update(self, user: Users) -> Users:
 		await self._db.flush()
 		await self._db.refresh(user)
+		# get_current_user không được trả về bản cũ (role, ...) từ cache
+		self._invalidate_cache(user.id)
 		return user
 
 	async def delete(self, user: Users) -> None:
 		await self._db.delete(user)
 		await self._db.flush()
+		self._invalidate_cache(user.id)
+
+	def _invalidate_cache(self, user_id: uuid.UUID) -> None:
+		"""
+		Xoá entry ngay và xoá lại sau khi transaction commit: giữa flush và commit (get_db),
+		request khác vẫn đọc được bản cũ từ DB và put() lại vào cache.
+		"""
+		cache = shared_user_cache()
+		cache.invalidate(user_id)
+		event.listen(self._db.sync_session, "after_commit", lambda _session: cache.invalidate(user_id), once=True)
@@ -1,3 +1,6 @@
+import uuid
+from dataclasses import dataclass
+
 from pydantic import BaseModel, EmailStr
 
 
@@ -20,4 +23,12 @@ class TokenResponse(BaseModel):
 
 
 class RefreshRequest(BaseModel):
-    refresh_token: str
\ No newline at end of file
+    refresh_token: str
+
+
+@dataclass(frozen=True)
+class TokenClaims:
+    """Claims đã ký của access token (app/api/deps.get_token_claims). role = None với token cũ."""
+
+    user_id: uuid.UUID
+    role: str | None
@@ -52,3 +52,44 @@ class GenerationLogStatusResponse(BaseModel):
 		if total == 0:
 			return 0.0
 		return round((processed / total) * 100, 2)
+
+
+class GenerationQuotaResponse(BaseModel):
+	"""Quota Gmail còn lại và thời điểm dự kiến gửi xong (mọi mốc thời gian là UTC)."""
+
+	generation_log_id: uuid.UUID
+	sender: str
+	rate_per_second: float
+	burst: int
+	daily_quota: int
+	sent_today: int
+	remaining_today: int
+	resets_at: datetime
+	blocked_until: datetime | None = None
+	remaining_records: int
+	projected_finish_at: datetime | None = None
+
+
+class ThroughputBucket(BaseModel):
+	"""Số asset đổi trạng thái trong một bucket thời gian (UTC, theo generated_assets.updated_at)."""
+
+	bucket_start: datetime
+	sent: int = 0
+	failed: int = 0
+
+
+class GenerationLogStatsResponse(BaseModel):
+	"""Số asset theo email_status của một log, đếm bằng GROUP BY phía DB."""
+
+	generation_log_id: uuid.UUID
+	status: str
+	total_records: int
+	processed: int
+	total_assets: int = 0
+	sent: int = 0
+	failed: int = 0
+	pending: int = 0
+	# Đầy đủ mọi email_status có trong DB (kể cả giá trị ngoài SENT / FAILED / PENDING)
+	by_status: dict[str, int] = {}
+	# Chỉ có khi gọi với ?bucket_minutes=
+	throughput: list[ThroughputBucket] | None = None
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageParams:
+    """Query ?cursor=&limit= của các list endpoint (app/api/deps.get_page_params)."""
+
+    cursor: str | None
+    limit: int
+
+
+@dataclass
+class Page(Generic[T]):
+    """Một trang kết quả. next_cursor = None khi đã tới trang cuối (trả về qua header X-Next-Cursor)."""
+
+    items: list[T]
+    next_cursor: str | None
+
+    def set_cursor_header(self, response) -> None:
+        if self.next_cursor:
+            response.headers[NEXT_CURSOR_HEADER] = self.next_cursor
@@ -10,22 +10,29 @@ class TemplateCreate(BaseModel):
     name: str
     svg_content: str
     variables: list[str]
+    # Tên file trong FONTS_DIR (GET /templates/fonts) chứa các font-family SVG sử dụng
+    fonts: list[str] = []
 
 
 class TemplateUpdate(BaseModel):
     name: str | None = None
     svg_content: str | None = None
     variables: list[str] | None = None
+    fonts: list[str] | None = None
 
 
-class TemplateResponse(BaseModel):
+class TemplateSummaryResponse(BaseModel):
+    """List view: không có svg_content (1–5 MB mỗi template), body lấy qua GET /templates/{id}."""
+
     model_config = ConfigDict(from_attributes=True)
 
     id: uuid.UUID
     event_id: uuid.UUID
     name: str
-    svg_content: str
     variables: list[str]
+    fonts: list[str] = []
+    # sha256 của svg_content — khớp bản client đã có thì không cần tải lại body
+    content_hash: str | None = None
     created_at: datetime | None = None
 
     @field_validator("variables", mode="before")
@@ -40,6 +47,25 @@ class TemplateResponse(BaseModel):
             return json.loads(v)
         return v
 
+    @field_validator("fonts", mode="before")
+    @classmethod
+    def parse_fonts(cls, v: str | list | None) -> list[str]:
+        """Same JSON string format as variables; NULL (templates cũ) → []."""
+        if v is None:
+            return []
+        if isinstance(v, str):
+            return json.loads(v)
+        return v
+
+
+class TemplateResponse(TemplateSummaryResponse):
+    svg_content: str
+
+
+class FontFileResponse(BaseModel):
+    filename: str
+    families: list[str]
+
 
 class PreviewRequest(BaseModel):
     sample_data: dict[str, str]
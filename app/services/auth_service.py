@@ -7,8 +7,9 @@ from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    password_needs_rehash,
+    verify_password_async,
 )
 from app.models.user import Users
 from app.repositories.user_repository import UserRepository
@@ -28,7 +29,7 @@ class AuthService:
             email=payload.email,
             name=payload.name,
             role=payload.role,
-            hashed_password=hash_password(payload.password),
+            hashed_password=await hash_password_async(payload.password),
         )
         return await self.user_repo.create(new_user)
 
@@ -37,9 +38,14 @@ class AuthService:
         if not user or not user.hashed_password:
             raise UnauthorizedException("Email hoặc mật khẩu không đúng.")
 
-        if not verify_password(payload.password, user.hashed_password):
+        if not await verify_password_async(payload.password, user.hashed_password):
             raise UnauthorizedException("Email hoặc mật khẩu không đúng.")
 
+        # BCRYPT_ROUNDS đã đổi → hash lại bằng cost mới khi đang có mật khẩu gốc
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await hash_password_async(payload.password)
+            await self.user_repo.update(user)
+
         return TokenResponse(
             access_token=create_access_token(str(user.id), extra={"role": user.role}),
             refresh_token=create_refresh_token(str(user.id)),
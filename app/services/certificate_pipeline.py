@@ -0,0 +1,263 @@
+"""
+Pipeline render → send → bookkeeping cho batch certificate.
+
+    participants ──► render_q ──► [render workers] ──► send_q ──► [send workers]
+                                        │ (process pool)              │ (async httpx)
+                                        └──────────► result_q ◄───────┘
+                                                        │
+                                                   [collector] → on_result (DB)
+
+Mỗi stage có concurrency riêng, các queue đều bounded nên số PDF nằm trong RAM
+bị giới hạn. Collector là consumer duy nhất của result_q: AsyncSession không
+an toàn khi dùng đồng thời, nên mọi thao tác DB được tuần tự hoá tại đây,
+theo thứ tự hoàn thành (không theo thứ tự participant).
+
+Có rate limiter: mỗi lần gửi lấy 1 token Gmail. Hết quota → các certificate còn
+lại được trả về với status DEFERRED (asset giữ PENDING) và `run()` trả về mốc
+thời gian có thể gửi tiếp.
+
+Có PdfStore: job có `pdf_key` đã nằm trong kho thì bỏ qua render; PDF mới render
+được ghi vào kho để resend/download sau này không phải render lại.
+
+Template tách được layer (CompiledTemplate.layers): layer tĩnh render một lần vào kho,
+mỗi certificate chỉ render phần text có placeholder rồi ghép lên layer tĩnh
+(CertificateRenderer — preview của template editor cũng render qua đây).
+
+Render quá RENDER_TIMEOUT_SECONDS hoặc worker render chết → chỉ certificate đó FAILED.
+"""
+
+import asyncio
+import datetime
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import AsyncIterable, Awaitable, Callable, Iterable
+
+from app.core.config import settings
+from app.core.executors import get_render_pool
+from app.services.gmail_rate_limiter import GmailQuotaExceeded, GmailRateLimiter
+from app.services.gmail_service import GmailRateLimitError, GmailService
+from app.services.pdf_store import PdfStore, static_layer_key
+from app.services.render_worker import render_certificate, render_layered, render_layered_png, render_png
+from app.services.svg_service import CompiledTemplate
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class CertificateJob:
+    asset_id: uuid.UUID
+    data: dict[str, str]
+    participant_name: str
+    participant_email: str
+    pdf_key: str | None = None
+
+
+@dataclass
+class CertificateResult:
+    asset_id: uuid.UUID
+    email_status: str
+    error: str | None = None
+
+
+class CertificateRenderer:
+    """
+    Render PDF (hoặc PNG preview) của một certificate — dùng chung cho pipeline và preview
+    của template editor để hai nơi luôn ra cùng một kết quả.
+
+    Template tách được layer + GENERATION_LAYERED_RENDER + có kho PDF: layer tĩnh render
+    một lần vào kho, mỗi lần chỉ render overlay rồi ghép lên. Ngược lại render một lượt.
+    """
+
+    def __init__(
+        self,
+        template: CompiledTemplate,
+        pdf_store: PdfStore | None,
+        layered: bool | None = None,
+    ) -> None:
+        if layered is None:
+            layered = settings.GENERATION_LAYERED_RENDER
+        self._template = template
+        self._pdf_store = pdf_store
+        self._layers = template.layers if layered and pdf_store is not None else None
+        self._static_lock = asyncio.Lock()
+        self._static_path: str | None = None
+
+    async def _ensure_static_layer(self, refresh: bool = False) -> str:
+        """Đường dẫn PDF layer tĩnh trong kho (render một lần nếu chưa có)."""
+        async with self._static_lock:
+            if self._static_path is None or refresh:
+                key = static_layer_key(self._template)
+                if not await self._pdf_store.touch(key):
+                    pdf_bytes = await get_render_pool().run(render_certificate, self._layers.static_svg)
+                    await self._pdf_store.put(key, pdf_bytes)
+                self._static_path = self._pdf_store.path(key)
+            return self._static_path
+
+    async def render(self, data: dict[str, str]) -> bytes:
+        if self._layers is None:
+            # Splice placeholder ngay trên loop (đã compile → chỉ là nối chuỗi),
+            # phần cairosvg nặng CPU chạy trong process pool.
+            svg_rendered = self._template.render(data)
+            return await get_render_pool().run(render_certificate, svg_rendered)
+        overlay_svg = self._layers.overlay.render(data)
+        try:
+            path = await self._ensure_static_layer()
+            return await get_render_pool().run(render_layered, path, overlay_svg)
+        except FileNotFoundError:
+            # Layer tĩnh vừa bị evict khỏi kho → render lại một lần
+            path = await self._ensure_static_layer(refresh=True)
+            return await get_render_pool().run(render_layered, path, overlay_svg)
+
+    async def render_png(self, data: dict[str, str], width: int) -> bytes:
+        """PNG rộng `width` px, ghép layer theo đúng thứ tự như render()."""
+        if self._layers is None:
+            return await get_render_pool().run(render_png, self._template.render(data), width)
+        return await get_render_pool().run(
+            render_layered_png, self._layers.static_svg, self._layers.overlay.render(data), width
+        )
+
+
+class CertificatePipeline:
+    def __init__(
+        self,
+        gmail_service: GmailService,
+        render_workers: int,
+        send_workers: int,
+        queue_size: int,
+        rate_limiter: GmailRateLimiter | None = None,
+        pdf_store: PdfStore | None = None,
+    ) -> None:
+        self._gmail = gmail_service
+        self._rate_limiter = rate_limiter
+        self._pdf_store = pdf_store
+        self._render_workers = max(1, render_workers)
+        self._send_workers = max(1, send_workers)
+        self._queue_size = max(1, queue_size)
+
+    async def run(
+        self,
+        jobs: Iterable[CertificateJob] | AsyncIterable[CertificateJob],
+        template: CompiledTemplate,
+        event_name: str,
+        on_result: Callable[[CertificateResult], Awaitable[None]],
+    ) -> datetime.datetime | None:
+        """Chạy toàn bộ jobs. Trả về mốc gửi tiếp nếu bị hoãn do hết quota, None nếu xong."""
+        render_q: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        send_q: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        result_q: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        deferred_until: datetime.datetime | None = None
+        renderer = CertificateRenderer(template, self._pdf_store)
+
+        async def render(job: CertificateJob) -> bytes:
+            use_store = self._pdf_store is not None and job.pdf_key is not None
+            if use_store:
+                pdf_bytes = await self._pdf_store.get(job.pdf_key)
+                if pdf_bytes is not None:
+                    return pdf_bytes
+            pdf_bytes = await renderer.render(job.data)
+            if use_store:
+                try:
+                    await self._pdf_store.put(job.pdf_key, pdf_bytes)
+                except OSError:
+                    # Kho chỉ là cache → ghi lỗi (đầy đĩa, ...) vẫn gửi mail bình thường
+                    logger.warning("PDF store: cannot write %s", job.pdf_key, exc_info=True)
+            return pdf_bytes
+
+        async def render_worker() -> None:
+            while (job := await render_q.get()) is not _STOP:
+                if deferred_until is not None:
+                    # Đã hết quota → không render nữa, để lần chạy sau xử lý
+                    await result_q.put(CertificateResult(job.asset_id, "DEFERRED"))
+                    continue
+                try:
+                    pdf_bytes = await render(job)
+                except Exception as exc:
+                    await result_q.put(CertificateResult(job.asset_id, "FAILED", str(exc)))
+                    continue
+                await send_q.put((job, pdf_bytes))
+
+        async def send(job: CertificateJob, pdf_bytes: bytes) -> None:
+            await self._gmail.send_certificate(
+                to_email=job.participant_email,
+                participant_name=job.participant_name,
+                event_name=event_name,
+                pdf_bytes=pdf_bytes,
+                filename=f"{job.participant_name or job.asset_id}.pdf",
+            )
+
+        async def send_with_quota(job: CertificateJob, pdf_bytes: bytes) -> None:
+            if self._rate_limiter is None:
+                await send(job, pdf_bytes)
+                return
+            for attempt in range(settings.GMAIL_MAX_SEND_RETRIES + 1):
+                await self._rate_limiter.acquire()
+                try:
+                    await send(job, pdf_bytes)
+                    return
+                except GmailRateLimitError as exc:
+                    # 429 → chặn mọi worker một lúc rồi thử lại với token mới
+                    blocked_until = await self._rate_limiter.backoff(exc.retry_after)
+                    if attempt == settings.GMAIL_MAX_SEND_RETRIES:
+                        # Vẫn bị 429 sau nhiều lần → hoãn thay vì đánh FAILED
+                        raise GmailQuotaExceeded(blocked_until) from exc
+
+        async def send_worker() -> None:
+            nonlocal deferred_until
+            while (item := await send_q.get()) is not _STOP:
+                job, pdf_bytes = item
+                if deferred_until is not None:
+                    await result_q.put(CertificateResult(job.asset_id, "DEFERRED"))
+                    continue
+                try:
+                    await send_with_quota(job, pdf_bytes)
+                except GmailQuotaExceeded as exc:
+                    deferred_until = max(deferred_until or exc.retry_at, exc.retry_at)
+                    await result_q.put(CertificateResult(job.asset_id, "DEFERRED"))
+                    continue
+                except Exception as exc:
+                    await result_q.put(CertificateResult(job.asset_id, "FAILED", str(exc)))
+                    continue
+                await result_q.put(CertificateResult(job.asset_id, "SENT"))
+
+        async def collector() -> None:
+            while (result := await result_q.get()) is not _STOP:
+                await on_result(result)
+
+        renderers = [asyncio.create_task(render_worker()) for _ in range(self._render_workers)]
+        senders = [asyncio.create_task(send_worker()) for _ in range(self._send_workers)]
+
+        async def drive() -> None:
+            # Async iterable (đọc sheet theo trang): job đầu tiên vào pipeline
+            # ngay khi trang đầu về, không chờ tải hết sheet.
+            if isinstance(jobs, AsyncIterable):
+                async for job in jobs:
+                    await render_q.put(job)
+            else:
+                for job in jobs:
+                    await render_q.put(job)
+            for _ in renderers:
+                await render_q.put(_STOP)
+            await asyncio.gather(*renderers)
+            for _ in senders:
+                await send_q.put(_STOP)
+            await asyncio.gather(*senders)
+            await result_q.put(_STOP)
+
+        collector_task = asyncio.create_task(collector())
+        driver_task = asyncio.create_task(drive())
+        try:
+            # Collector lỗi (VD: mất kết nối DB) → dừng cả pipeline thay vì
+            # để các stage phía trước treo trên queue đã đầy.
+            done, _ = await asyncio.wait(
+                {driver_task, collector_task},
+                return_when=asyncio.FIRST_EXCEPTION,
+            )
+            for task in done:
+                task.result()
+            return deferred_until
+        finally:
+            for task in (*renderers, *senders, collector_task, driver_task):
+                task.cancel()
@@ -7,6 +7,7 @@ from app.models.user import Users
 from app.repositories.event_repository import EventRepository
 from app.repositories.user_repository import UserRepository
 from app.schemas.event import EventCreate, EventUpdate
+from app.schemas.pagination import Page, PageParams
 from app.models.template import Templates
 
 
@@ -15,8 +16,8 @@ class EventService:
         self.event_repo = event_repo
         self.user_repo = user_repo
 
-    async def get_all(self) -> List[Events]:
-        return await self.event_repo.get_all()
+    async def get_page(self, params: PageParams) -> Page[Events]:
+        return await self.event_repo.get_page(params)
 
     async def get_by_id(self, event_id: uuid.UUID) -> Events:
         event = await self.event_repo.get_by_id(event_id)
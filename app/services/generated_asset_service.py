@@ -1,13 +1,19 @@
+import json
 import uuid
 
-from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.exceptions import BadRequestException, NotFoundException, TooManyRequestsException
 from app.models.generated_asset import GeneratedAssets
+from app.models.template import Templates
 from app.repositories.generated_asset_repository import GeneratedAssetRepository
 from app.repositories.generation_log_repository import GenerationLogRepository
 from app.repositories.template_repository import TemplateRepository
-from app.services.gmail_service import GmailService
+from app.schemas.pagination import Page, PageParams
+from app.services.gmail_rate_limiter import GmailQuotaExceeded, GmailRateLimiter
+from app.services.gmail_service import GmailRateLimitError, GmailService
 from app.services.pdf_service import PdfService
+from app.services.pdf_store import PdfStore, pdf_key
 from app.services.svg_service import SvgService
+from app.services.write_behind import WriteBehindBuffer
 
 
 class GeneratedAssetService:
@@ -19,6 +25,8 @@ class GeneratedAssetService:
         svg_service: SvgService,
         pdf_service: PdfService,
         gmail_service: GmailService,
+        rate_limiter: GmailRateLimiter,
+        pdf_store: PdfStore,
     ) -> None:
         self.asset_repo = asset_repo
         self.log_repo = log_repo
@@ -26,9 +34,19 @@ class GeneratedAssetService:
         self.svg_service = svg_service
         self.pdf_service = pdf_service
         self.gmail_service = gmail_service
+        self.rate_limiter = rate_limiter
+        self.pdf_store = pdf_store
 
-    async def get_all(self) -> list[GeneratedAssets]:
-        return await self.asset_repo.get_all()
+    async def get_page(
+        self,
+        params: PageParams,
+        email_status: str | None = None,
+        log_id: uuid.UUID | None = None,
+        email: str | None = None,
+    ) -> Page[GeneratedAssets]:
+        return await self.asset_repo.get_page(
+            params, email_status=email_status, log_id=log_id, email=email
+        )
 
     async def get_by_id(self, asset_id: uuid.UUID) -> GeneratedAssets:
         asset = await self.asset_repo.get_by_id(asset_id)
@@ -36,11 +54,55 @@ class GeneratedAssetService:
             raise NotFoundException("Generated asset không tồn tại.")
         return asset
 
+    async def get_pdf(self, asset_id: uuid.UUID) -> tuple[bytes, str]:
+        """
+        (PDF bytes, filename) của asset — đọc từ kho PDF, chỉ render khi chưa có.
+        Chỉ đọc: không ghi pdf_key (pipeline / resend mới ghi, tránh đụng set_pdf_keys của worker).
+        """
+        asset = await self.get_by_id(asset_id)
+        pdf_bytes, _, _ = await self._load_pdf(asset)
+        return pdf_bytes, f"{asset.participant_name}.pdf"
+
     async def resend_email(self, asset_id: uuid.UUID) -> GeneratedAssets:
         asset = await self.get_by_id(asset_id)
         if asset.email_status != "FAILED":
             raise BadRequestException("Chỉ có bản ghi thất bại mới được gửi lại email.")
+        self.gmail_service.ensure_authorized()
+
+        pdf_bytes, template, key = await self._load_pdf(asset)
+        if asset.pdf_key != key:
+            asset.pdf_key = key
+        filename: str = f"{asset.participant_name}.pdf"
+
+        try:
+            await self.rate_limiter.acquire()
+        except GmailQuotaExceeded as exc:
+            raise TooManyRequestsException(
+                f"Đã hết quota Gmail, thử lại sau {exc.retry_at.isoformat()} (UTC)."
+            ) from exc
 
+        async with WriteBehindBuffer(self.asset_repo, self.log_repo) as writer:
+            try:
+                await self.gmail_service.send_certificate(
+                    to_email=asset.participant_email,
+                    participant_name=asset.participant_name,
+                    event_name=template.name,
+                    pdf_bytes=pdf_bytes,
+                    filename=filename,
+                )
+                await writer.record(asset_id, "SENT")
+            except GmailRateLimitError as exc:
+                # Bị Gmail chặn: giữ nguyên FAILED để gửi lại sau, không tính là lỗi mới
+                await self.rate_limiter.backoff(exc.retry_after)
+                raise TooManyRequestsException("Gmail đang giới hạn tốc độ gửi, thử lại sau.") from exc
+            except Exception:
+                await writer.record(asset_id, "FAILED")
+
+        # Bulk UPDATE đồng bộ lại object trong session (synchronize_session="auto")
+        return asset
+
+    async def _load_pdf(self, asset: GeneratedAssets) -> tuple[bytes, Templates, str]:
+        """(PDF bytes, template, pdf_key theo template hiện tại). Không sửa `asset`."""
         log = await self.log_repo.get_by_id(asset.generation_log_id)
         if not log:
             raise NotFoundException("Generation log không tồn tại.")
@@ -49,24 +111,21 @@ class GeneratedAssetService:
         if not template:
             raise NotFoundException("Template không tồn tại.")
 
-        data: dict[str, str] = {
-            "participant_name": asset.participant_name,
-            "participant_email": asset.participant_email,
-        }
-        svg_rendered: str = self.svg_service.render(template.svg_content, data)
-        pdf_bytes: bytes = self.pdf_service.convert(svg_rendered)
-        filename: str = f"{asset.participant_name}.pdf"
-
-        try:
-            self.gmail_service.send_certificate(
-                to_email=asset.participant_email,
-                participant_name=asset.participant_name,
-                event_name=template.name,
-                pdf_bytes=pdf_bytes,
-                filename=filename,
-            )
-            updated = await self.asset_repo.update_status(asset_id, "SENT")
-        except Exception:
-            updated = await self.asset_repo.update_status(asset_id, "FAILED")
+        if asset.row_data:
+            data: dict[str, str] = json.loads(asset.row_data)
+        else:
+            # Asset tạo trước khi lưu row_data → chỉ còn tên + email
+            data = {
+                "participant_name": asset.participant_name,
+                "participant_email": asset.participant_email,
+            }
+        compiled = self.svg_service.compile(template.svg_optimized or template.svg_content, template.id)
+        # Key tính theo template hiện tại → template đã sửa thì render lại
+        key = pdf_key(compiled, data)
 
-        return updated if updated is not None else asset
+        pdf_bytes = await self.pdf_store.get(key)
+        if pdf_bytes is None:
+            svg_rendered: str = compiled.render(data)
+            pdf_bytes = await self.pdf_service.convert_in_pool(svg_rendered)
+            await self.pdf_store.put(key, pdf_bytes)
+        return pdf_bytes, template, key
@@ -1,45 +1,96 @@
+import asyncio
+import datetime
+import hashlib
+import json
 import uuid
+from typing import AsyncIterable, AsyncIterator, Iterable
 
-from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.exceptions import NotFoundException
+from app.core.config import settings
+from app.core.exceptions import BadRequestException, ConflictException, NotFoundException
+from app.models.generation_job import GenerationJobs
 from app.models.generation_log import GenerationLog
 from app.models.generated_asset import GeneratedAssets
 from app.models.template import Templates
 from app.repositories.generated_asset_repository import GeneratedAssetRepository
+from app.repositories.generation_job_repository import GenerationJobRepository
 from app.repositories.generation_log_repository import GenerationLogRepository
 from app.repositories.template_repository import TemplateRepository
-from app.schemas.generation_log import GenerationLogCreate
+from app.schemas.generation_log import (
+	GenerationLogCreate,
+	GenerationLogStatsResponse,
+	GenerationQuotaResponse,
+	ThroughputBucket,
+)
+from app.schemas.pagination import Page, PageParams
+from app.services.certificate_pipeline import CertificateJob, CertificatePipeline, CertificateResult
+from app.services.gmail_rate_limiter import GmailRateLimiter
 from app.services.gmail_service import GmailService
 from app.services.google_sheets_service import GoogleSheetsService
 from app.services.pdf_service import PdfService
-from app.services.svg_service import SvgService
+from app.services.pdf_store import PdfStore, pdf_key
+from app.services.svg_service import CompiledTemplate, SvgService
+from app.services.write_behind import WriteBehindBuffer
+
+
+def _row_hash(participant: dict[str, str]) -> str:
+	"""Hash ổn định của nội dung một dòng sheet (không phụ thuộc thứ tự key)."""
+	payload = json.dumps(participant, sort_keys=True, ensure_ascii=False)
+	return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _stats_response(log: GenerationLog, counts: dict[str, int]) -> GenerationLogStatsResponse:
+	return GenerationLogStatsResponse(
+		generation_log_id=log.id,
+		status=log.status,
+		total_records=log.total_records,
+		processed=log.processed,
+		total_assets=sum(counts.values()),
+		sent=counts.get("SENT", 0),
+		failed=counts.get("FAILED", 0),
+		pending=counts.get("PENDING", 0),
+		by_status=counts,
+	)
 
 
 class GenerationLogService:
 	def __init__(
 		self,
 		generation_log_repo: GenerationLogRepository,
+		generation_job_repo: GenerationJobRepository,
 		generated_asset_repo: GeneratedAssetRepository,
 		template_repo: TemplateRepository,
 		svg_service: SvgService,
 		pdf_service: PdfService,
 		sheets_service: GoogleSheetsService,
 		gmail_service: GmailService,
+		rate_limiter: GmailRateLimiter,
+		pdf_store: PdfStore,
 		db: AsyncSession,
 	) -> None:
 		self._log_repo = generation_log_repo
+		self._job_repo = generation_job_repo
 		self._asset_repo = generated_asset_repo
 		self._template_repo = template_repo
 		self._svg = svg_service
 		self._pdf = pdf_service
 		self._sheets = sheets_service
 		self._gmail = gmail_service
+		self._rate_limiter = rate_limiter
+		self._pdf_store = pdf_store
 		self._db = db
 
-	async def get_all(self) -> list[GenerationLog]:
-		return await self._log_repo.get_all()
+	async def get_page(
+		self,
+		params: PageParams,
+		status: str | None = None,
+		template_id: uuid.UUID | None = None,
+		event_id: uuid.UUID | None = None,
+	) -> Page[GenerationLog]:
+		return await self._log_repo.get_page(
+			params, status=status, template_id=template_id, event_id=event_id
+		)
 
 	async def get_by_id(self, log_id: uuid.UUID) -> GenerationLog:
 		log = await self._log_repo.get_by_id(log_id)
@@ -51,14 +102,66 @@ class GenerationLogService:
 		await self.get_by_id(log_id)
 		return await self._asset_repo.get_by_log_id(log_id)
 
-	async def trigger(
+	async def get_quota_status(self, log_id: uuid.UUID) -> GenerationQuotaResponse:
+		"""Quota Gmail còn lại + thời điểm dự kiến gửi xong phần còn lại của log."""
+		log = await self.get_by_id(log_id)
+		quota = await self._rate_limiter.status()
+		remaining_records = max(0, log.total_records - log.processed)
+		projected_finish_at = None
+		if log.status in ("PENDING", "PROCESSING"):
+			projected_finish_at = self._rate_limiter.project_finish(quota, remaining_records)
+		return GenerationQuotaResponse(
+			generation_log_id=log.id,
+			sender=quota.sender,
+			rate_per_second=self._rate_limiter.rate,
+			burst=self._rate_limiter.burst,
+			daily_quota=self._rate_limiter.daily_quota,
+			sent_today=quota.sent_today,
+			remaining_today=quota.remaining_today,
+			resets_at=quota.resets_at,
+			blocked_until=quota.blocked_until,
+			remaining_records=remaining_records,
+			projected_finish_at=projected_finish_at,
+		)
+
+	async def get_stats(
 		self,
-		payload: GenerationLogCreate,
-		background_tasks: BackgroundTasks,
-	) -> GenerationLog:
+		log_id: uuid.UUID,
+		bucket_minutes: int | None = None,
+	) -> GenerationLogStatsResponse:
+		"""Số asset theo email_status (+ throughput theo bucket nếu có `bucket_minutes`)."""
+		log = await self.get_by_id(log_id)
+		counts = await self._asset_repo.count_by_status_for_logs([log_id])
+		stats = _stats_response(log, counts.get(log_id, {}))
+		if bucket_minutes:
+			buckets: dict[datetime.datetime, ThroughputBucket] = {}
+			for start, email_status, count in await self._asset_repo.throughput(log_id, bucket_minutes):
+				bucket = buckets.setdefault(start, ThroughputBucket(bucket_start=start))
+				if email_status == "SENT":
+					bucket.sent += count
+				elif email_status == "FAILED":
+					bucket.failed += count
+			stats.throughput = list(buckets.values())
+		return stats
+
+	async def get_stats_bulk(self, log_ids: list[uuid.UUID]) -> list[GenerationLogStatsResponse]:
+		"""Stats cho nhiều log (trang của GET /generation-log) — log không tồn tại bị bỏ qua."""
+		log_ids = list(dict.fromkeys(log_ids))
+		logs = {log.id: log for log in await self._log_repo.get_by_ids(log_ids)}
+		counts = await self._asset_repo.count_by_status_for_logs(list(logs))
+		return [
+			_stats_response(logs[log_id], counts.get(log_id, {}))
+			for log_id in log_ids
+			if log_id in logs
+		]
+
+	async def trigger(self, payload: GenerationLogCreate) -> GenerationLog:
+		"""Tạo log + job QUEUED. Worker (python -m app.worker) sẽ claim và xử lý."""
 		template = await self._template_repo.get_by_id(payload.template_id)
 		if not template:
 			raise NotFoundException("Template không tồn tại.")
+		# Báo lỗi ngay tại request thay vì để worker đánh FAILED
+		self._gmail.ensure_authorized()
 
 		new_log = GenerationLog(
 			template_id=payload.template_id,
@@ -66,99 +169,298 @@ class GenerationLogService:
 			drive_folder_id=payload.drive_folder_id,
 			status="PENDING",
 		)
-
 		log = await self._log_repo.create(new_log)
-		await self._db.commit()
 
-		background_tasks.add_task(
-			self._process_batch,
-			log_id=log.id,
-			template=template,
-			column_mapping=payload.column_mapping,
+		await self._job_repo.create(
+			GenerationJobs(
+				generation_log_id=log.id,
+				status="QUEUED",
+				column_mapping=(
+					json.dumps(payload.column_mapping, ensure_ascii=False)
+					if payload.column_mapping
+					else None
+				),
+			)
 		)
+		await self._db.commit()
 		return log
 
+	async def resume(self, log_id: uuid.UUID) -> GenerationLog:
+		"""
+		Enqueue lại một log đã dừng giữa chừng. Worker sẽ bỏ qua các dòng đã SENT
+		(theo row_index + row_hash) và chỉ xử lý phần còn lại.
+		"""
+		log = await self.get_by_id(log_id)
+		if log.status == "COMPLETED":
+			raise ConflictException("Generation Log đã hoàn thành.")
+		if await self._job_repo.has_active(log_id):
+			raise ConflictException("Generation Log đang được xử lý.")
+		self._gmail.ensure_authorized()
+
+		previous = await self._job_repo.get_latest_by_log_id(log_id, kind="GENERATE")
+		await self._job_repo.create(
+			GenerationJobs(
+				generation_log_id=log_id,
+				status="QUEUED",
+				column_mapping=previous.column_mapping if previous else None,
+			)
+		)
+		await self._log_repo.update_status(log_id, "PENDING")
+		await self._db.commit()
+		return await self.get_by_id(log_id)
+
+	async def resend_failed(self, log_id: uuid.UUID) -> GenerationLog:
+		"""
+		Enqueue job RESEND_FAILED: worker gửi lại mọi asset FAILED của log trong một lần chạy
+		(template compile một lần, PDF lấy từ kho, gửi song song có giới hạn).
+		Chỉ cho log đã COMPLETED: log dừng giữa chừng còn dòng sheet chưa tạo asset → dùng resume,
+		nếu không job này sẽ đánh COMPLETED và các dòng đó không bao giờ được tạo.
+		"""
+		log = await self.get_by_id(log_id)
+		if log.status != "COMPLETED":
+			raise ConflictException("Generation Log chưa hoàn thành, hãy dùng resume.")
+		if await self._job_repo.has_active(log_id):
+			raise ConflictException("Generation Log đang được xử lý.")
+		failed_count = await self._asset_repo.count_by_status(log_id, "FAILED")
+		if failed_count == 0:
+			raise BadRequestException("Generation Log không có bản ghi thất bại nào.")
+		self._gmail.ensure_authorized()
+
+		await self._job_repo.create(
+			GenerationJobs(
+				generation_log_id=log_id,
+				status="QUEUED",
+				kind="RESEND_FAILED",
+			)
+		)
+		# Tiến độ: các asset FAILED được tính là chưa xử lý, worker cộng dần lên total_records
+		await self._log_repo.update_status(
+			log.id,
+			"PENDING",
+			processed=max(0, log.total_records - failed_count),
+		)
+		await self._db.commit()
+		return await self.get_by_id(log_id)
+
+	async def run_job(self, job: GenerationJobs) -> datetime.datetime | None:
+		"""
+		Chạy job đã được worker claim (session riêng của worker).
+		Trả về mốc thời gian (UTC) nếu job bị hoãn do hết quota Gmail, None nếu đã xong.
+		Batch lỗi → exception được raise lại cho worker (retry / FAILED).
+		"""
+		log = await self.get_by_id(job.generation_log_id)
+		template = await self._template_repo.get_by_id(log.template_id)
+		if not template:
+			await self._log_repo.update_status(log.id, "FAILED")
+			await self._db.commit()
+			return None
+
+		if job.kind == "RESEND_FAILED":
+			return await self._resend_failed_batch(log.id, template)
+		column_mapping = json.loads(job.column_mapping) if job.column_mapping else None
+		return await self._process_batch(log.id, template, column_mapping=column_mapping)
+
+	async def _run_pipeline(
+		self,
+		log_id: uuid.UUID,
+		jobs: Iterable[CertificateJob] | AsyncIterable[CertificateJob],
+		template: CompiledTemplate,
+		event_name: str,
+		db_lock: asyncio.Lock,
+	) -> datetime.datetime | None:
+		"""Chạy pipeline render → send, ghi kết quả qua write-behind. Trả về mốc hoãn (hết quota) nếu có."""
+		pipeline = CertificatePipeline(
+			gmail_service=self._gmail,
+			render_workers=settings.GENERATION_RENDER_WORKERS,
+			send_workers=settings.GENERATION_SEND_WORKERS,
+			queue_size=settings.GENERATION_STAGE_QUEUE_SIZE,
+			rate_limiter=self._rate_limiter,
+			pdf_store=self._pdf_store,
+		)
+		async with WriteBehindBuffer(
+			self._asset_repo,
+			self._log_repo,
+			commit=self._db.commit,
+			rollback=self._db.rollback,
+			lock=db_lock,
+		) as writer:
+
+			async def on_result(result: CertificateResult) -> None:
+				if result.email_status == "DEFERRED":
+					# Asset giữ nguyên status → lần chạy sau xử lý lại
+					return
+				await writer.record(result.asset_id, result.email_status, log_id=log_id)
+
+			return await pipeline.run(
+				jobs,
+				template=template,
+				event_name=event_name,
+				on_result=on_result,
+			)
+
+	async def _resend_failed_batch(self, log_id: uuid.UUID, template: Templates) -> datetime.datetime | None:
+		try:
+			failed = await self._asset_repo.get_by_log_id_and_status(log_id, "FAILED")
+			compiled = self._svg.compile(template.svg_optimized or template.svg_content, template.id)
+
+			jobs: list[CertificateJob] = []
+			stale_keys: list[tuple[uuid.UUID, str, str]] = []
+			for asset in failed:
+				if asset.row_data:
+					data: dict[str, str] = json.loads(asset.row_data)
+					row_data = asset.row_data
+				else:
+					# Asset tạo trước khi lưu row_data → chỉ còn tên + email
+					data = {
+						"participant_name": asset.participant_name,
+						"participant_email": asset.participant_email,
+					}
+					row_data = json.dumps(data, ensure_ascii=False)
+				key = pdf_key(compiled, data)
+				if asset.pdf_key != key:
+					stale_keys.append((asset.id, row_data, key))
+				jobs.append(
+					CertificateJob(
+						asset_id=asset.id,
+						data=data,
+						participant_name=asset.participant_name,
+						participant_email=asset.participant_email,
+						pdf_key=key,
+					)
+				)
+
+			log = await self.get_by_id(log_id)
+			await self._asset_repo.set_pdf_keys(stale_keys)
+			await self._log_repo.update_status(
+				log_id,
+				"PROCESSING",
+				processed=max(0, log.total_records - len(jobs)),
+			)
+			await self._db.commit()
+
+			deferred_until = await self._run_pipeline(
+				log_id, jobs, compiled, template.name, db_lock=asyncio.Lock()
+			)
+			if deferred_until is not None:
+				# Asset chưa gửi vẫn FAILED → job chạy lại sẽ lấy tiếp
+				return deferred_until
+
+			await self._log_repo.update_status(log_id, "COMPLETED")
+			await self._db.commit()
+			return None
+		except Exception:
+			# Worker quyết định: xếp job chạy lại hoặc đánh FAILED (cả job lẫn log)
+			await self._db.rollback()
+			raise
+
 	async def _process_batch(
 		self,
 		log_id: uuid.UUID,
 		template: Templates,
 		column_mapping: dict[str, str] | None = None,
-	) -> None:
+	) -> datetime.datetime | None:
 		try:
-			await self._log_repo.update_status(log_id, "PROCESSING")
+			# total_records / processed được cộng dần theo từng trang sheet
+			await self._log_repo.update_status(log_id, "PROCESSING", total_records=0, processed=0)
 			await self._db.commit()
 
 			log = await self._log_repo.get_by_id(log_id)
 			if log is None:
 				raise NotFoundException("Generation Log không tồn tại.")
 
-			participants = self._sheets.read_participants(
-				log.google_sheet_url,
-				column_mapping=column_mapping,
-			)
+			# Checkpoint: các dòng đã tạo ở lần chạy trước (job bị crash / resume)
+			checkpoints = await self._asset_repo.get_checkpoints(log_id)
+			compiled = self._svg.compile(template.svg_optimized or template.svg_content, template.id)
+			# ingest() và write-behind flush dùng chung self._db từ 2 task khác nhau
+			db_lock = asyncio.Lock()
 
-			await self._log_repo.update_status(
-				log_id,
-				"PROCESSING",
-				total_records=len(participants),
-				processed=0,
-			)
-			await self._db.commit()
+			async def ingest() -> AsyncIterator[CertificateJob]:
+				"""Đọc sheet theo trang: tạo asset + cộng total_records cho từng trang rồi đẩy job vào pipeline."""
+				async for page in self._sheets.iter_participant_pages(
+					log.google_sheet_url,
+					column_mapping=column_mapping,
+				):
+					jobs: list[CertificateJob] = []
+					already_sent = 0
+					new_rows: list[tuple[str, str, int, str, str, str]] = []
+					new_row_data: list[dict[str, str]] = []
+					stale_keys: list[tuple[uuid.UUID, str, str]] = []
+					for row_index, participant in page:
+						row_hash = _row_hash(participant)
+						key = pdf_key(compiled, participant)
+						row_data = json.dumps(participant, ensure_ascii=False)
 
-			for participant in participants:
-				# Resolve participant_name / participant_email from data.
-				# column_mapping keys = SVG variable names, so "name" might be the key.
-				# Also support explicit "participant_name" / "participant_email" keys.
-				p_name = (
-					participant.get("participant_name")
-					or participant.get("name")
-					or participant.get("name")
-					or ""
-				)
-				p_email = (
-					participant.get("participant_email")
-					or participant.get("email")
-					or participant.get("Email")
-					or ""
-				)
+						# Resolve participant_name / participant_email from data.
+						# column_mapping keys = SVG variable names, so "name" might be the key.
+						# Also support explicit "participant_name" / "participant_email" keys.
+						p_name = (
+							participant.get("participant_name")
+							or participant.get("name")
+							or participant.get("name")
+							or ""
+						)
+						p_email = (
+							participant.get("participant_email")
+							or participant.get("email")
+							or participant.get("Email")
+							or ""
+						)
 
-				asset = GeneratedAssets(
-					generation_log_id=log_id,
-					participant_name=p_name,
-					participant_email=p_email,
-					email_status="PENDING",
-				)
-				asset = await self._asset_repo.create(asset)
-				await self._db.commit()
+						checkpoint = checkpoints.get((row_index, row_hash))
+						if checkpoint is None:
+							new_rows.append((p_name, p_email, row_index, row_hash, row_data, key))
+							new_row_data.append(participant)
+							continue
 
-				try:
-					svg_rendered = self._svg.render(template.svg_content, participant)
-					pdf_bytes = self._pdf.convert(svg_rendered)
+						asset_id, email_status, asset_pdf_key = checkpoint
+						if email_status == "SENT":
+							already_sent += 1
+							continue
+						if asset_pdf_key != key:
+							# Template đã đổi (hoặc asset tạo trước khi có kho PDF)
+							stale_keys.append((asset_id, row_data, key))
+						# PENDING/FAILED từ lần chạy trước → xử lý lại trên chính asset đó
+						jobs.append(
+							CertificateJob(
+								asset_id=asset_id,
+								data=participant,
+								participant_name=p_name,
+								participant_email=p_email,
+								pdf_key=key,
+							)
+						)
 
-					filename = f"{p_name or asset.id}.pdf"
+					async with db_lock:
+						# Tạo trước asset PENDING của cả trang bằng bulk insert → pipeline chỉ update
+						asset_ids = await self._asset_repo.bulk_create(log_id, new_rows)
+						await self._asset_repo.set_pdf_keys(stale_keys)
+						await self._log_repo.add_total_records(log_id, len(page), processed=already_sent)
+						await self._db.commit()
 
-					self._gmail.send_certificate(
-						to_email=p_email,
-						participant_name=p_name,
-						event_name=template.name,
-						pdf_bytes=pdf_bytes,
-						filename=filename,
+					jobs.extend(
+						CertificateJob(
+							asset_id=asset_id,
+							data=participant,
+							participant_name=p_name,
+							participant_email=p_email,
+							pdf_key=key,
+						)
+						for asset_id, participant, (p_name, p_email, _, _, _, key) in zip(asset_ids, new_row_data, new_rows)
 					)
+					for job in jobs:
+						yield job
 
-					await self._asset_repo.update_status(
-						asset.id,
-						"SENT",
-					)
-					await self._db.commit()
-				except Exception:
-					await self._asset_repo.update_status(asset.id, "FAILED")
-					await self._db.commit()
-				finally:
-					await self._log_repo.increment_processed(log_id)
-					await self._db.commit()
+			deferred_until = await self._run_pipeline(
+				log_id, ingest(), compiled, template.name, db_lock=db_lock
+			)
+			if deferred_until is not None:
+				# Hết quota Gmail: log vẫn PROCESSING, worker xếp job lại tới deferred_until
+				return deferred_until
 
 			await self._log_repo.update_status(log_id, "COMPLETED")
 			await self._db.commit()
+			return None
 		except Exception:
-			await self._log_repo.update_status(log_id, "FAILED")
-			await self._db.commit()
+			# Worker quyết định: xếp job chạy lại hoặc đánh FAILED (cả job lẫn log)
+			await self._db.rollback()
+			raise
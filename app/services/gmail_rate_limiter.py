@@ -0,0 +1,161 @@
+"""
+Token bucket cho Gmail send, dùng chung giữa mọi worker process qua bảng gmail_send_quota.
+
+Mỗi lần gửi lấy 1 token trong một transaction ngắn (SELECT ... UPDLOCK → UPDATE → COMMIT):
+- bucket nạp lại `rate` token/giây, tối đa `burst` token,
+- `sent_today` giới hạn số mail/ngày (UTC) của sender,
+- Gmail trả 429 → `backoff()` chặn mọi worker tới `blocked_until`.
+
+Khi phải chờ quá `max_wait` giây (hết quota ngày, bị chặn lâu) → raise GmailQuotaExceeded
+để job được hoãn và xếp lại hàng đợi thay vì đánh FAILED.
+"""
+
+import asyncio
+import datetime
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.models.gmail_send_quota import GmailSendQuota
+from app.repositories.gmail_quota_repository import GmailQuotaRepository
+
+
+class GmailQuotaExceeded(Exception):
+    """Hết quota Gmail — chỉ gửi tiếp được từ `retry_at` (UTC, đồng hồ DB)."""
+
+    def __init__(self, retry_at: datetime.datetime) -> None:
+        self.retry_at = retry_at
+        super().__init__(f"Gmail quota exhausted until {retry_at.isoformat()}")
+
+
+@dataclass
+class GmailQuotaStatus:
+    sender: str
+    now: datetime.datetime
+    tokens: float
+    sent_today: int
+    remaining_today: int
+    resets_at: datetime.datetime
+    blocked_until: datetime.datetime | None
+
+
+def _next_midnight(now: datetime.datetime) -> datetime.datetime:
+    return datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
+
+
+class GmailRateLimiter:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        sender: str = settings.GMAIL_SENDER_EMAIL,
+        rate_per_second: float = settings.GMAIL_SEND_RATE_PER_SECOND,
+        burst: int = settings.GMAIL_SEND_BURST,
+        daily_quota: int = settings.GMAIL_DAILY_QUOTA,
+        max_wait_seconds: float = settings.GMAIL_MAX_WAIT_SECONDS,
+    ) -> None:
+        # Session riêng cho mỗi lần lấy token: không đụng session của batch
+        # (đang dùng ở collector) và nhả khoá hàng ngay sau commit.
+        self._session_factory = session_factory
+        self.sender = sender
+        self.rate = max(rate_per_second, 1e-6)
+        self.burst = max(1, burst)
+        self.daily_quota = max(1, daily_quota)
+        self._max_wait = max_wait_seconds
+
+    async def acquire(self) -> None:
+        """Chờ tới khi lấy được 1 token. Raise GmailQuotaExceeded nếu phải chờ quá lâu."""
+        while True:
+            async with self._session_factory() as session:
+                row, now = await GmailQuotaRepository(session).lock(self.sender)
+                wait = self._take(row, now)
+                await session.commit()
+            if wait <= 0:
+                return
+            if wait > self._max_wait:
+                raise GmailQuotaExceeded(now + datetime.timedelta(seconds=wait))
+            await asyncio.sleep(wait)
+
+    async def backoff(self, seconds: float | None = None) -> datetime.datetime:
+        """Gmail báo rate limit → dừng gửi trên mọi worker trong `seconds` giây. Trả về blocked_until."""
+        if seconds is None:
+            seconds = settings.GMAIL_RATE_LIMIT_BACKOFF_SECONDS
+        async with self._session_factory() as session:
+            row, now = await GmailQuotaRepository(session).lock(self.sender)
+            until = now + datetime.timedelta(seconds=seconds)
+            if row.blocked_until is None or row.blocked_until < until:
+                row.blocked_until = until
+            row.tokens = 0.0
+            row.refilled_at = now
+            row.updated_at = now
+            blocked_until = row.blocked_until
+            await session.commit()
+        return blocked_until
+
+    async def status(self) -> GmailQuotaStatus:
+        async with self._session_factory() as session:
+            row, now = await GmailQuotaRepository(session).get(self.sender)
+        if row is None:
+            return GmailQuotaStatus(
+                sender=self.sender,
+                now=now,
+                tokens=float(self.burst),
+                sent_today=0,
+                remaining_today=self.daily_quota,
+                resets_at=_next_midnight(now),
+                blocked_until=None,
+            )
+        sent_today = row.sent_today if row.quota_day == now.date() else 0
+        return GmailQuotaStatus(
+            sender=self.sender,
+            now=now,
+            tokens=self._refilled_tokens(row, now),
+            sent_today=sent_today,
+            remaining_today=max(0, self.daily_quota - sent_today),
+            resets_at=_next_midnight(now),
+            blocked_until=row.blocked_until if row.blocked_until and row.blocked_until > now else None,
+        )
+
+    def project_finish(self, status: GmailQuotaStatus, remaining: int) -> datetime.datetime:
+        """Ước lượng thời điểm gửi xong `remaining` mail với rate + quota hiện tại."""
+        start = max(status.now, status.blocked_until or status.now)
+        if remaining <= 0:
+            return status.now
+        if remaining <= status.remaining_today:
+            count, tokens = remaining, status.tokens
+        else:
+            # Phần vượt quota hôm nay dồn sang các ngày sau, mỗi ngày bắt đầu với bucket đầy
+            full_days, count = divmod(remaining - status.remaining_today - 1, self.daily_quota)
+            count += 1
+            start = status.resets_at + datetime.timedelta(days=full_days)
+            tokens = float(self.burst)
+        return start + datetime.timedelta(seconds=max(0.0, count - tokens) / self.rate)
+
+    def _refilled_tokens(self, row: GmailSendQuota, now: datetime.datetime) -> float:
+        if row.refilled_at is None:
+            return float(self.burst)
+        elapsed = max(0.0, (now - row.refilled_at).total_seconds())
+        return min(float(self.burst), row.tokens + elapsed * self.rate)
+
+    def _take(self, row: GmailSendQuota, now: datetime.datetime) -> float:
+        """Cập nhật bucket trên hàng đang khoá. Trả về số giây phải chờ (0 = đã lấy token)."""
+        tokens = self._refilled_tokens(row, now)
+        if row.quota_day != now.date():
+            row.quota_day = now.date()
+            row.sent_today = 0
+
+        if row.blocked_until is not None and row.blocked_until > now:
+            wait = (row.blocked_until - now).total_seconds()
+        elif row.sent_today >= self.daily_quota:
+            wait = (_next_midnight(now) - now).total_seconds()
+        elif tokens >= 1:
+            tokens -= 1
+            row.sent_today += 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+
+        row.tokens = tokens
+        row.refilled_at = now
+        row.updated_at = now
+        return wait
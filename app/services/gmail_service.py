@@ -4,24 +4,42 @@ from email.mime.base import MIMEBase
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from googleapiclient.discovery import build
+from google.auth.exceptions import RefreshError
 
 from app.core.config import settings
 from app.core.exceptions import BadRequestException
-from app.core.google_oauth import get_gmail_credentials
+from app.core.google_clients import GmailClient, get_gmail_client, reset_gmail_client
+from app.core.google_http import GoogleApiError, execute
+
+
+class GmailRateLimitError(BadRequestException):
+    """Gmail từ chối vì rate limit/quota — nên hoãn lại thay vì đánh FAILED."""
+
+    def __init__(self, detail: str, retry_after: float | None = None) -> None:
+        super().__init__(detail)
+        self.retry_after = retry_after
 
 
 class GmailService:
-    def __init__(self) -> None:
-        creds = get_gmail_credentials()
-        if creds is None:
+    """
+    Gửi certificate qua Gmail. Không tạo client khi khởi tạo — client dùng chung
+    (app/core/google_clients.py) chỉ được lấy khi thực sự gửi mail.
+    """
+
+    def _client(self) -> GmailClient:
+        client = get_gmail_client()
+        if client is None:
             raise BadRequestException(
                 "Gmail chưa được authorize. "
                 "Truy cập GET /api/v1/oauth/gmail/authorize để authorize."
             )
-        self._service = build("gmail", "v1", credentials=creds)
+        return client
+
+    def ensure_authorized(self) -> None:
+        """Raise BadRequestException nếu Gmail chưa được authorize."""
+        self._client()
 
-    def send_certificate(
+    async def send_certificate(
         self,
         to_email: str,
         participant_name: str,
@@ -61,10 +79,22 @@ class GmailService:
         msg.attach(attachment)
 
         raw = base64.urlsafe_b64encode(msg.as_bytes()).decode()
+        client = self._client()
+        request = client.resource.users().messages().send(
+            userId="me",
+            body={"raw": raw},
+        )
         try:
-            self._service.users().messages().send(
-                userId="me",
-                body={"raw": raw},
-            ).execute()
+            await execute(request, client.credentials)
+        except GoogleApiError as exc:
+            if exc.is_rate_limited:
+                raise GmailRateLimitError(
+                    f"Gmail rate limit: {str(exc)}", retry_after=exc.retry_after
+                ) from exc
+            raise BadRequestException(f"Không thể gửi email: {str(exc)}") from exc
+        except RefreshError as exc:
+            # Refresh token bị thu hồi → lần gửi sau đọc lại token file
+            reset_gmail_client()
+            raise BadRequestException(f"Không thể gửi email: {str(exc)}") from exc
         except Exception as exc:
             raise BadRequestException(f"Không thể gửi email: {str(exc)}") from exc
\ No newline at end of file
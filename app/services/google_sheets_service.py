@@ -1,12 +1,15 @@
+import asyncio
 import re
-
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from typing import AsyncIterator, Callable
 
 from app.core.config import settings
 from app.core.exceptions import BadRequestException
+from app.core.google_clients import get_sheets_client
+from app.core.google_http import execute
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+# Cột được đọc khi không có column_mapping
+_FIRST_COL = "A"
+_LAST_COL = "Z"
 
 
 def _col_letter_to_index(letter: str) -> int:
@@ -17,13 +20,18 @@ def _col_letter_to_index(letter: str) -> int:
 	return result - 1
 
 
+def _col_index_to_letter(index: int) -> str:
+	"""Convert 0-based index to column letter (0 → A, 25 → Z, 26 → AA)."""
+	letters = ""
+	index += 1
+	while index:
+		index, rem = divmod(index - 1, 26)
+		letters = chr(ord("A") + rem) + letters
+	return letters
+
+
 class GoogleSheetsService:
-	def __init__(self) -> None:
-		credentials = service_account.Credentials.from_service_account_file(
-			settings.GOOGLE_SERVICE_ACCOUNT_FILE,
-			scopes=SCOPES,
-		)
-		self._service = build("sheets", "v4", credentials=credentials)
+	"""Đọc participant từ Google Sheets qua client dùng chung (tạo ở lần gọi đầu)."""
 
 	def extract_spreadsheet_id(self, url: str) -> str:
 		match = re.search(r"/spreadsheets/d/([\w-]+)", url)
@@ -31,11 +39,11 @@ class GoogleSheetsService:
 			raise BadRequestException("Không thể parse Spreadsheet ID từ URL.")
 		return match.group(1)
 
-	def read_participants(
+	async def read_participants(
 		self,
 		sheet_url: str,
 		column_mapping: dict[str, str] | None = None,
-		range_: str = "Sheet1!A:Z",
+		sheet_name: str = "Sheet1",
 	) -> list[dict[str, str]]:
 		"""
 		Read participants from Google Sheets.
@@ -45,38 +53,158 @@ class GoogleSheetsService:
 		  Keys become the dict keys in the returned list.
 		  If None, falls back to using sheet headers as keys.
 		"""
+		return [
+			participant
+			async for _, participant in self.iter_participants(sheet_url, column_mapping, sheet_name)
+		]
+
+	async def iter_participants(
+		self,
+		sheet_url: str,
+		column_mapping: dict[str, str] | None = None,
+		sheet_name: str = "Sheet1",
+		page_rows: int = settings.SHEETS_PAGE_ROWS,
+	) -> AsyncIterator[tuple[int, dict[str, str]]]:
+		"""Như read_participants nhưng yield (số dòng trên sheet, participant) ngay khi từng trang về."""
+		async for page in self.iter_participant_pages(sheet_url, column_mapping, sheet_name, page_rows):
+			for item in page:
+				yield item
+
+	async def iter_participant_pages(
+		self,
+		sheet_url: str,
+		column_mapping: dict[str, str] | None = None,
+		sheet_name: str = "Sheet1",
+		page_rows: int = settings.SHEETS_PAGE_ROWS,
+	) -> AsyncIterator[list[tuple[int, dict[str, str]]]]:
+		"""
+		Đọc sheet theo cửa sổ dòng (A2:Z1001, A1002:Z2001, ...) và yield từng trang
+		[(số dòng trên sheet, participant), ...]. Trang kế tiếp được tải trước trong
+		lúc caller xử lý trang hiện tại.
+
+		Có column_mapping: chỉ tải các cột được map, bằng một values.batchGet
+		(majorDimension=COLUMNS) trên các dải cột liền nhau — VD {"name": "A",
+		"participant_email": "C", "role": "D"} → A2:A1001 + C2:D1001.
+
+		Sheets cắt các dòng rỗng ở cuối mỗi range → trang thiếu dòng KHÔNG có nghĩa là hết
+		sheet. Số trang lấy theo gridProperties.rowCount (spreadsheets.get, chạy song song
+		với trang đầu).
+		"""
 		spreadsheet_id = self.extract_spreadsheet_id(sheet_url)
-		result = (
-			self._service.spreadsheets()
-			.values()
-			.get(spreadsheetId=spreadsheet_id, range=range_)
-			.execute()
-		)
-		rows = result.get("values", [])
-
-		if len(rows) < 2:
-			return []
-
-		# ── Column-letter mapping (from UI DATA MAPPING) ──────────
+		credentials, service = get_sheets_client()
+		values = service.spreadsheets().values()
+		page_rows = max(1, page_rows)
+
+		async def fetch(range_: str) -> list[list[str]]:
+			request = values.get(spreadsheetId=spreadsheet_id, range=range_)
+			result = await execute(request, credentials)
+			return result.get("values", [])
+
+		async def fetch_row_count() -> int:
+			request = service.spreadsheets().get(
+				spreadsheetId=spreadsheet_id,
+				ranges=[sheet_name],
+				fields="sheets(properties(gridProperties(rowCount)))",
+			)
+			result = await execute(request, credentials)
+			sheets = result.get("sheets") or [{}]
+			return int(sheets[0].get("properties", {}).get("gridProperties", {}).get("rowCount", 0))
+
+		header_task: asyncio.Task | None = None
 		if column_mapping:
-			index_map: dict[str, int] = {}
-			for var_name, col_letter in column_mapping.items():
-				index_map[var_name] = _col_letter_to_index(col_letter)
-
-			participants: list[dict[str, str]] = []
-			for row in rows[1:]:
-				entry: dict[str, str] = {}
-				for var_name, col_idx in index_map.items():
-					entry[var_name] = row[col_idx].strip() if col_idx < len(row) else ""
-				participants.append(entry)
-			return participants
-
-		# ── Fallback: use sheet headers as keys ─────────────────────
-		raw_headers = [h.strip().lower() for h in rows[0]]
-
-		participants = []
-		for row in rows[1:]:
-			row_padded = row + [""] * (len(raw_headers) - len(row))
-			participants.append(dict(zip(raw_headers, row_padded)))
-
-		return participants
+			index_map = {
+				var_name: _col_letter_to_index(col_letter)
+				for var_name, col_letter in column_mapping.items()
+			}
+			column_runs = _contiguous_runs(sorted(set(index_map.values())))
+
+			async def load(first_row: int, last_row: int) -> list[dict[str, str]]:
+				# ── Column-letter mapping (from UI DATA MAPPING) ──────────
+				request = values.batchGet(
+					spreadsheetId=spreadsheet_id,
+					ranges=[
+						f"{sheet_name}!{_col_index_to_letter(start)}{first_row}:"
+						f"{_col_index_to_letter(end)}{last_row}"
+						for start, end in column_runs
+					],
+					majorDimension="COLUMNS",
+				)
+				result = await execute(request, credentials)
+				columns: dict[int, list[str]] = {}
+				for (start, _), value_range in zip(column_runs, result.get("valueRanges", [])):
+					for offset, column in enumerate(value_range.get("values", [])):
+						columns[start + offset] = column
+				# Mỗi cột đã bị cắt ô rỗng ở cuối → số dòng của trang = cột dài nhất
+				row_count = max((len(column) for column in columns.values()), default=0)
+				return [
+					{
+						var_name: _cell(columns.get(col_idx), i).strip()
+						for var_name, col_idx in index_map.items()
+					}
+					for i in range(row_count)
+				]
+		else:
+			header_task = asyncio.create_task(fetch(f"{sheet_name}!{_FIRST_COL}1:{_LAST_COL}1"))
+			to_participant: Callable[[list[str]], dict[str, str]] | None = None
+
+			async def load(first_row: int, last_row: int) -> list[dict[str, str]]:
+				nonlocal to_participant
+				rows = await fetch(f"{sheet_name}!{_FIRST_COL}{first_row}:{_LAST_COL}{last_row}")
+				if to_participant is None:
+					header_rows = await header_task
+					if not header_rows:
+						return []
+					to_participant = _header_row_reader(header_rows[0])
+				return [to_participant(row) for row in rows]
+
+		def load_page(first_row: int) -> asyncio.Task:
+			return asyncio.create_task(load(first_row, first_row + page_rows - 1))
+
+		# Dòng 1 là header → dữ liệu bắt đầu từ dòng 2
+		first_row = 2
+		row_count_task = asyncio.create_task(fetch_row_count())
+		next_page: asyncio.Task | None = load_page(first_row)
+		try:
+			row_count = await row_count_task
+			while next_page is not None:
+				participants = await next_page
+				next_first_row = first_row + page_rows
+				next_page = load_page(next_first_row) if next_first_row <= row_count else None
+				if participants:
+					yield [
+						(first_row + offset, participant)
+						for offset, participant in enumerate(participants)
+					]
+				first_row += page_rows
+		finally:
+			for task in (next_page, header_task, row_count_task):
+				if task is not None:
+					task.cancel()
+
+
+def _cell(column: list[str] | None, index: int) -> str:
+	if column is None or index >= len(column):
+		return ""
+	return column[index]
+
+
+def _contiguous_runs(indexes: list[int]) -> list[tuple[int, int]]:
+	"""[0, 2, 3, 4, 7] → [(0, 0), (2, 4), (7, 7)] — gộp các cột liền nhau thành một range."""
+	runs: list[tuple[int, int]] = []
+	for index in indexes:
+		if runs and runs[-1][1] == index - 1:
+			runs[-1] = (runs[-1][0], index)
+		else:
+			runs.append((index, index))
+	return runs
+
+
+def _header_row_reader(header_row: list[str]) -> Callable[[list[str]], dict[str, str]]:
+	# ── Fallback: use sheet headers as keys ─────────────────────
+	raw_headers = [h.strip().lower() for h in header_row]
+
+	def read(row: list[str]) -> dict[str, str]:
+		row_padded = row + [""] * (len(raw_headers) - len(row))
+		return dict(zip(raw_headers, row_padded))
+
+	return read
@@ -1,3 +1,7 @@
+import io
+
+from pypdf import PageObject, PdfReader, PdfWriter
+
 from app.core.exceptions import BadRequestException
 
 
@@ -11,3 +15,48 @@ class PdfService:
 			raise BadRequestException(
 				f"Không thể convert SVG sang PDF: {str(exc)}"
 			) from exc
+
+	def convert_png(self, svg_string: str, width: int) -> bytes:
+		"""Raster cùng engine với convert() (cairosvg), rộng `width` px, giữ tỉ lệ."""
+		try:
+			import cairosvg
+
+			return cairosvg.svg2png(bytestring=svg_string.encode("utf-8"), output_width=width)
+		except Exception as exc:
+			raise BadRequestException(
+				f"Không thể convert SVG sang PNG: {str(exc)}"
+			) from exc
+
+	async def convert_in_pool(self, svg_string: str) -> bytes:
+		"""convert() trong render pool (process riêng, recycle theo task/RSS, có timeout)."""
+		# Import tại chỗ: render_worker import ngược lại PdfService
+		from app.services.render_worker import render_certificate
+
+		return await self._run_in_pool(render_certificate, svg_string)
+
+	@staticmethod
+	async def _run_in_pool(fn, *args) -> bytes:
+		from app.core.executors import get_render_pool
+		from app.core.render_pool import RenderTimeoutError, RenderWorkerError
+
+		try:
+			return await get_render_pool().run(fn, *args)
+		except (RenderTimeoutError, RenderWorkerError) as exc:
+			raise BadRequestException(
+				f"Không thể render SVG: {str(exc)}"
+			) from exc
+
+	def read_page(self, pdf_bytes: bytes) -> PageObject:
+		"""Trang đầu của PDF — dùng làm nền cho overlay()."""
+		return PdfReader(io.BytesIO(pdf_bytes)).pages[0]
+
+	def overlay(self, base: PageObject, svg_string: str) -> bytes:
+		"""Render SVG (chỉ phần text biến đổi) rồi vẽ đè lên trang nền đã render sẵn."""
+		overlay_page = self.read_page(self.convert(svg_string))
+		writer = PdfWriter()
+		# add_page clone trang nền sang writer → `base` dùng lại được cho người tiếp theo
+		page = writer.add_page(base)
+		page.merge_page(overlay_page)
+		buffer = io.BytesIO()
+		writer.write(buffer)
+		return buffer.getvalue()
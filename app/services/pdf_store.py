@@ -0,0 +1,162 @@
+"""
+Kho PDF đã render, địa chỉ hoá theo nội dung (content-addressed), nằm trên đĩa local.
+
+    key  = sha256(content hash của template + giá trị các biến template dùng tới)
+    file = {PDF_STORE_DIR}/{key[:2]}/{key}.pdf
+
+Cùng template + cùng dữ liệu → cùng key → render một lần, resend/download chỉ đọc file.
+Dung lượng giới hạn bởi PDF_STORE_MAX_BYTES: vượt ngưỡng thì xoá file ít được dùng
+nhất (mtime được cập nhật mỗi lần đọc → LRU). API và worker dùng chung thư mục;
+file bị xoá chỉ làm lần sau phải render lại, không mất dữ liệu.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from app.core.config import settings
+from app.services.svg_service import CompiledTemplate
+
+logger = logging.getLogger(__name__)
+
+# Dọn xuống còn chừng này phần max_bytes để không phải evict sau mỗi lần ghi
+_EVICT_TARGET_RATIO = 0.9
+
+
+def pdf_key(template: CompiledTemplate, data: dict[str, str]) -> str:
+    """Key của PDF render từ `template` với `data` (chỉ tính các biến template dùng tới)."""
+    values = {name: data.get(name) for name in template.variables}
+    payload = json.dumps(values, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{template.content_hash}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def static_layer_key(template: CompiledTemplate) -> str:
+    """Key của layer tĩnh (TemplateLayers.static_svg) — một file cho mỗi version template."""
+    return hashlib.sha256(f"{template.content_hash}\nstatic".encode("utf-8")).hexdigest()
+
+
+class PdfStore:
+    def __init__(
+        self,
+        root: str = settings.PDF_STORE_DIR,
+        max_bytes: int = settings.PDF_STORE_MAX_BYTES,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max(1, max_bytes)
+        self._lock = threading.Lock()
+        # Ước lượng dung lượng hiện tại (None = chưa quét thư mục)
+        self._size: int | None = None
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    async def get(self, key: str) -> bytes | None:
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key: str, pdf_bytes: bytes) -> None:
+        await asyncio.to_thread(self._put, key, pdf_bytes)
+
+    async def touch(self, key: str) -> bool:
+        """Đánh dấu vừa dùng (LRU) mà không đọc file. False nếu không có trong kho."""
+        return await asyncio.to_thread(self._touch, key)
+
+    def _touch(self, key: str) -> bool:
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _get(self, key: str) -> bytes | None:
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def _put(self, key: str, pdf_bytes: bytes) -> None:
+        path = self.path(key)
+        if self._touch(key):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # Ghi file tạm rồi rename → process khác không bao giờ đọc được file dở
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(pdf_bytes)
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _entries(self) -> list[os.DirEntry]:
+        entries: list[os.DirEntry] = []
+        try:
+            buckets = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return entries
+        for bucket in buckets:
+            if bucket.is_dir():
+                entries.extend(e for e in os.scandir(bucket.path) if e.name.endswith(".pdf"))
+        return entries
+
+    def _stats(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) của các file trong kho (process khác có thể đang xoá)."""
+        files = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._stats())
+
+    def _evict(self) -> int:
+        """Xoá file cũ nhất (theo mtime) tới khi dưới ngưỡng. Trả về dung lượng còn lại."""
+        files = self._stats()
+        total = sum(size for _, size, _ in files)
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        logger.info("PDF store: evicted %d file(s), %d bytes left", removed, total)
+        return total
+
+
+_store: PdfStore | None = None
+_store_lock = threading.Lock()
+
+
+def shared_pdf_store() -> PdfStore:
+    """PdfStore dùng chung của process."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PdfStore()
+        return _store
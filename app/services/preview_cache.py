@@ -0,0 +1,65 @@
+"""
+Cache preview đã render (PNG/PDF) của template editor, nằm trong RAM của API process.
+
+    key = sha256(Templates.content_hash + sample data + format + width + layered)
+
+Key cũng là ETag của response và chỉ cần cột content_hash → client gửi If-None-Match thì
+trả 304 mà không đọc body SVG, không compile, không render. Sửa template → content hash
+đổi → key mới. Giới hạn dung lượng
+PREVIEW_CACHE_MAX_BYTES, đầy thì bỏ preview ít dùng nhất (LRU).
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from app.core.config import settings
+
+
+def preview_key(content_hash: str, data: dict[str, str], fmt: str, width: int, layered: bool) -> str:
+    # Chưa compile nên chưa biết template dùng biến nào → key theo toàn bộ sample data
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    raw = f"{content_hash}\n{payload}\n{fmt}\n{width}\n{'layered' if layered else 'single'}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class PreviewCache:
+    def __init__(self, max_bytes: int = settings.PREVIEW_CACHE_MAX_BYTES) -> None:
+        self.max_bytes = max(0, max_bytes)
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_cache: PreviewCache | None = None
+_cache_lock = threading.Lock()
+
+
+def shared_preview_cache() -> PreviewCache:
+    """PreviewCache dùng chung của process."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PreviewCache()
+        return _cache
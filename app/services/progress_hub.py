@@ -0,0 +1,253 @@
+"""
+Pub/sub tiến độ generation log cho SSE (GET /generation-log/{id}/events).
+
+Hai nguồn event, cùng đổ vào một channel cho mỗi log đang có người xem:
+- Poller (nguồn chính): batch chạy ở worker process (python -m app.worker), không cùng
+  process với SSE endpoint → mỗi channel có MỘT poller chung: mỗi PROGRESS_POLL_SECONDS
+  đọc log (status, processed, total_records) và các asset có updated_at mới (index
+  IX_generated_assets_log_updated_at). N người xem một log vẫn chỉ tốn 2 query / chu kỳ,
+  thay vì N lần JWT + SELECT user + SELECT log mỗi giây.
+- publish(): WriteBehindBuffer gọi sau mỗi lần flush đã commit. Chỉ có tác dụng khi batch
+  chạy trong CÙNG process với người xem (VD chạy batch trong API khi dev/test); ở worker
+  process không ai subscribe nên là no-op.
+
+updated_at do DB ghi (SYSUTCDATETIME()) và watermark chỉ lấy từ updated_at đã đọc được →
+không phụ thuộc đồng hồ của máy API hay máy worker.
+
+Event gửi cho client:
+    progress  {"status", "processed", "total_records", "progress_percent"}  (khi có thay đổi)
+    asset     {"asset_id", "email_status"}                                 (mỗi lần đổi trạng thái)
+    complete  {"status"}                                                    (COMPLETED / FAILED → đóng stream)
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import math
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionFactory
+from app.models.generation_log import GenerationLog
+from app.repositories.generated_asset_repository import GeneratedAssetRepository
+from app.repositories.generation_log_repository import GenerationLogRepository
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = frozenset({"COMPLETED", "FAILED"})
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    event: str
+    data: dict
+
+    def to_sse(self) -> str:
+        return f"event: {self.event}\ndata: {json.dumps(self.data, ensure_ascii=False)}\n\n"
+
+
+def _progress_event(status: str, processed: int, total_records: int) -> ProgressEvent:
+    percent = round(processed / total_records * 100, 2) if total_records else 0.0
+    return ProgressEvent(
+        "progress",
+        {
+            "status": status,
+            "processed": processed,
+            "total_records": total_records,
+            "progress_percent": percent,
+        },
+    )
+
+
+@dataclass
+class _Channel:
+    subscribers: set[asyncio.Queue] = field(default_factory=set)
+    poller: asyncio.Task | None = None
+    # (status, processed, total_records) đã gửi gần nhất
+    snapshot: tuple[str, int, int] | None = None
+    # asset_id → (email_status, updated_at) — bỏ trùng giữa publish() và các lần poll đọc chồng nhau.
+    # updated_at = None: mới biết qua publish(), chờ poll đọc được giá trị của DB
+    emitted: dict[uuid.UUID, tuple[str, datetime.datetime | None]] = field(default_factory=dict)
+    done: bool = False
+
+
+class ProgressHub:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionFactory,
+        poll_seconds: float = settings.PROGRESS_POLL_SECONDS,
+        heartbeat_seconds: float = settings.PROGRESS_HEARTBEAT_SECONDS,
+        queue_size: int = settings.PROGRESS_QUEUE_SIZE,
+    ) -> None:
+        self._session_factory = session_factory
+        self._poll_seconds = max(0.1, poll_seconds)
+        self._heartbeat_seconds = max(1.0, heartbeat_seconds)
+        self._queue_size = max(1, queue_size)
+        # updated_at được ghi trước khi commit → đọc lùi lại một đoạn để không sót dòng commit muộn
+        self._overlap = datetime.timedelta(seconds=max(5, math.ceil(2 * self._poll_seconds)))
+        self._channels: dict[uuid.UUID, _Channel] = {}
+
+    def watching(self, log_id: uuid.UUID) -> int:
+        channel = self._channels.get(log_id)
+        return len(channel.subscribers) if channel else 0
+
+    # ── Publish (in-process) ─────────────────────────────────
+
+    def publish(
+        self,
+        log_id: uuid.UUID,
+        assets: dict[uuid.UUID, str],
+        processed_delta: int = 0,
+    ) -> None:
+        """Trạng thái asset vừa commit (+ processed tăng thêm) của log. Không ai xem → bỏ qua."""
+        channel = self._channels.get(log_id)
+        if channel is None or channel.done:
+            return
+        for asset_id, email_status in assets.items():
+            self._emit_asset(channel, asset_id, email_status)
+        if processed_delta and channel.snapshot is not None:
+            status, processed, total = channel.snapshot
+            self._emit_progress(channel, status, processed + processed_delta, total)
+
+    # ── Subscribe ────────────────────────────────────────────
+
+    async def subscribe(self, log: GenerationLog) -> AsyncIterator[ProgressEvent | None]:
+        """
+        Event của `log` cho tới khi log kết thúc. Yield None khi không có gì mới trong
+        PROGRESS_HEARTBEAT_SECONDS (để caller gửi keep-alive).
+        """
+        log_id = log.id
+        if log.status in TERMINAL_STATUSES:
+            yield _progress_event(log.status, log.processed, log.total_records)
+            yield ProgressEvent("complete", {"status": log.status})
+            return
+
+        channel = self._channels.get(log_id)
+        if channel is None or channel.done:
+            channel = _Channel()
+            self._channels[log_id] = channel
+            channel.poller = asyncio.create_task(self._poll(log_id, channel))
+
+        queue: asyncio.Queue[ProgressEvent] = asyncio.Queue(maxsize=self._queue_size)
+        channel.subscribers.add(queue)
+        if channel.snapshot is None:
+            self._emit_progress(channel, log.status, log.processed, log.total_records)
+        else:
+            queue.put_nowait(_progress_event(*channel.snapshot))
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), self._heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.event == "complete":
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+            if not channel.subscribers:
+                self._close(log_id, channel)
+
+    async def sse(self, log: GenerationLog) -> AsyncIterator[str]:
+        """subscribe() ở dạng text/event-stream; keep-alive là comment (`: ping`)."""
+        async for event in self.subscribe(log):
+            yield ": ping\n\n" if event is None else event.to_sse()
+
+    # ── Internals ────────────────────────────────────────────
+
+    def _broadcast(self, channel: _Channel, event: ProgressEvent) -> None:
+        for queue in channel.subscribers:
+            if queue.full():
+                # Client đọc chậm: bỏ event cũ nhất, progress/complete sau vẫn tới
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _emit_asset(
+        self,
+        channel: _Channel,
+        asset_id: uuid.UUID,
+        email_status: str,
+        updated_at: datetime.datetime | None = None,
+    ) -> None:
+        previous = channel.emitted.get(asset_id)
+        if previous is not None and previous[0] == email_status:
+            if previous[1] is None and updated_at is not None:
+                channel.emitted[asset_id] = (email_status, updated_at)
+            return
+        channel.emitted[asset_id] = (email_status, updated_at)
+        self._broadcast(channel, ProgressEvent("asset", {"asset_id": str(asset_id), "email_status": email_status}))
+
+    def _emit_progress(self, channel: _Channel, status: str, processed: int, total_records: int) -> None:
+        snapshot = (status, processed, total_records)
+        if snapshot == channel.snapshot:
+            return
+        channel.snapshot = snapshot
+        self._broadcast(channel, _progress_event(*snapshot))
+
+    def _complete(self, log_id: uuid.UUID, channel: _Channel, status: str) -> None:
+        channel.done = True
+        self._broadcast(channel, ProgressEvent("complete", {"status": status}))
+        if self._channels.get(log_id) is channel:
+            del self._channels[log_id]
+
+    def _close(self, log_id: uuid.UUID, channel: _Channel) -> None:
+        channel.done = True
+        if channel.poller is not None and channel.poller is not asyncio.current_task():
+            channel.poller.cancel()
+        if self._channels.get(log_id) is channel:
+            del self._channels[log_id]
+
+    async def _poll(self, log_id: uuid.UUID, channel: _Channel) -> None:
+        # updated_at lớn nhất đã đọc được (giờ của DB). None → chưa thấy dòng nào: đọc
+        # cửa sổ overlap gần nhất theo đồng hồ DB
+        watermark: datetime.datetime | None = None
+        while not channel.done:
+            await asyncio.sleep(self._poll_seconds)
+            try:
+                async with self._session_factory() as db:
+                    log = await GenerationLogRepository(db).get_by_id(log_id)
+                    changes = await GeneratedAssetRepository(db).get_status_changes(
+                        log_id,
+                        watermark - self._overlap if watermark is not None else None,
+                        recent_seconds=int(self._overlap.total_seconds()),
+                    )
+            except Exception:
+                logger.exception("Progress poll failed for log %s", log_id)
+                continue
+            if channel.done:
+                return
+
+            for asset_id, email_status, updated_at in changes:
+                self._emit_asset(channel, asset_id, email_status, updated_at)
+                watermark = updated_at if watermark is None else max(watermark, updated_at)
+            if watermark is not None:
+                # Dòng cũ hơn cửa sổ đọc lại (watermark - overlap) không bao giờ quay lại → quên đi
+                cutoff = watermark - 2 * self._overlap
+                stale = [a for a, (_, at) in channel.emitted.items() if at is not None and at < cutoff]
+                for asset_id in stale:
+                    del channel.emitted[asset_id]
+
+            if log is None:
+                self._complete(log_id, channel, "DELETED")
+                return
+            self._emit_progress(channel, log.status, log.processed, log.total_records)
+            if log.status in TERMINAL_STATUSES:
+                self._complete(log_id, channel, log.status)
+                return
+
+
+_hub: ProgressHub | None = None
+
+
+def shared_progress_hub() -> ProgressHub:
+    """ProgressHub dùng chung của process (API: SSE endpoint, worker: publish không ai nghe)."""
+    global _hub
+    if _hub is None:
+        _hub = ProgressHub()
+    return _hub
@@ -0,0 +1,74 @@
+"""
+Các hàm chạy bên trong render process pool.
+
+Module này được import lại trong mỗi worker process (spawn), nên chỉ import
+những gì cần cho render — không import settings/database.
+"""
+
+import io
+from collections import OrderedDict
+from xml.sax.saxutils import quoteattr
+
+from pypdf import PageObject
+
+from app.services.pdf_service import PdfService
+
+# Số layer tĩnh giữ trong RAM của mỗi worker process
+STATIC_PAGE_CACHE_SIZE = 8
+
+_pdf = PdfService()
+_static_pages: OrderedDict[str, PageObject] = OrderedDict()
+
+
+def warm_up(families: list[str]) -> None:
+    """
+    Initializer của worker: render một SVG nhỏ dùng mọi font bundle → fontconfig được
+    khởi tạo (đọc FONTCONFIG_FILE + cache) và các font face được load trước task đầu tiên.
+    """
+    texts = "".join(
+        f'<text x="0" y="{10 * (i + 1)}" font-family={quoteattr(family)}>Tiếng Việt Aa 0123</text>'
+        for i, family in enumerate(["sans-serif", *families])
+    )
+    _pdf.convert(f'<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">{texts}</svg>')
+
+
+def render_certificate(svg_rendered: str) -> bytes:
+    """Convert SVG đã thay placeholder (CompiledTemplate.render) sang PDF bytes."""
+    return _pdf.convert(svg_rendered)
+
+
+def render_png(svg_rendered: str, width: int) -> bytes:
+    """Preview PNG của SVG đã thay placeholder."""
+    return _pdf.convert_png(svg_rendered, width)
+
+
+def render_layered(static_path: str, overlay_svg: str) -> bytes:
+    """
+    Render overlay (text biến đổi) và ghép lên layer tĩnh đọc từ kho PDF.
+    Layer tĩnh được đọc một lần rồi giữ trong process. Raise FileNotFoundError
+    nếu file đã bị evict — caller render lại layer tĩnh rồi thử lại.
+    """
+    base = _static_pages.get(static_path)
+    if base is None:
+        with open(static_path, "rb") as f:
+            base = _pdf.read_page(f.read())
+        _static_pages[static_path] = base
+        while len(_static_pages) > STATIC_PAGE_CACHE_SIZE:
+            _static_pages.popitem(last=False)
+    else:
+        _static_pages.move_to_end(static_path)
+    return _pdf.overlay(base, overlay_svg)
+
+
+def render_layered_png(static_svg: str, overlay_svg: str, width: int) -> bytes:
+    """Preview PNG của template tách layer: overlay ghép đè lên layer tĩnh như render_layered."""
+    from PIL import Image
+
+    base = Image.open(io.BytesIO(_pdf.convert_png(static_svg, width))).convert("RGBA")
+    overlay = Image.open(io.BytesIO(_pdf.convert_png(overlay_svg, width))).convert("RGBA")
+    if overlay.size != base.size:
+        overlay = overlay.resize(base.size)
+    base.alpha_composite(overlay)
+    buffer = io.BytesIO()
+    base.save(buffer, format="PNG")
+    return buffer.getvalue()
@@ -0,0 +1,430 @@
+"""
+Tối ưu SVG của template lúc lưu (create/update) — bản gốc giữ nguyên ở svg_content,
+bản tối ưu lưu ở svg_optimized và được dùng cho render.
+
+- Bỏ metadata của editor (Figma/Illustrator/Inkscape/Sketch): comment, <metadata>,
+  element/attribute thuộc namespace của editor, namespace không còn dùng.
+- Bỏ phần tử trong <defs> không được tham chiếu (lặp tới khi ổn định).
+- Làm tròn toạ độ của path/polyline/polygon (SVG_PATH_PRECISION chữ số thập phân).
+- Ảnh base64: down-sample về SVG_IMAGE_DPI theo kích thước hiển thị trên trang,
+  nén lại (PNG tối ưu / JPEG SVG_IMAGE_JPEG_QUALITY) nếu nhỏ hơn; ảnh trùng nhau
+  chỉ giữ một bản, các chỗ còn lại dùng <use>.
+
+Không đụng tới text (placeholder {{...}} giữ nguyên).
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import math
+import re
+
+from lxml import etree
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+_XLINK_HREF = f"{{{XLINK_NS}}}href"
+
+# Namespace của editor — renderer bỏ qua, chỉ làm SVG to ra
+_EDITOR_NAMESPACES = {
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://www.bohemiancoding.com/sketch/ns",
+    "http://www.figma.com/figma/ns",
+    "http://ns.adobe.com/AdobeIllustrator/10.0/",
+    "http://ns.adobe.com/AdobeSVGViewerExtensions/3.0/",
+    "http://ns.adobe.com/Extensibility/1.0/",
+    "http://ns.adobe.com/Flows/1.0/",
+    "http://ns.adobe.com/GenericCustomNamespace/1.0/",
+    "http://ns.adobe.com/Graphs/1.0/",
+    "http://ns.adobe.com/ImageReplacement/1.0/",
+    "http://ns.adobe.com/SaveForWeb/1.0/",
+    "http://ns.adobe.com/Variables/1.0/",
+    "http://ns.adobe.com/XPath/1.0/",
+    "http://purl.org/dc/elements/1.1/",
+    "http://creativecommons.org/ns#",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+}
+# Được tham chiếu theo tên (font-family) chứ không theo id → không bao giờ xoá
+_KEEP_IN_DEFS = {"style", "font", "font-face"}
+
+_URL_REF_RE = re.compile(r"url\(\s*['\"]?#([^)'\"\s]+)")
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_PATH_TOKEN_RE = re.compile(r"[MmZzLlHhVvCcSsQqTt]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+_LENGTH_RE = re.compile(r"^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*(px|pt|pc|mm|cm|in)?\s*$")
+_DATA_URI_RE = re.compile(r"^data:(image/(?:png|jpeg|jpg));base64,(.*)$", re.DOTALL | re.IGNORECASE)
+
+# Số inch của một đơn vị độ dài SVG
+_INCHES_PER_UNIT = {"px": 1 / 96, "pt": 1 / 72, "pc": 1 / 6, "mm": 1 / 25.4, "cm": 1 / 2.54, "in": 1.0}
+# Chỉ down-sample khi ảnh lớn hơn đích ít nhất chừng này (tránh nén lại vô ích)
+_DOWNSAMPLE_THRESHOLD = 1.1
+
+
+def _local(tag) -> str:
+    return etree.QName(tag).localname if isinstance(tag, str) else ""
+
+
+def _namespace(tag) -> str | None:
+    return etree.QName(tag).namespace if isinstance(tag, str) else None
+
+
+def _remove_keep_tail(node) -> None:
+    """Xoá node nhưng giữ tail text (text nằm sau node thuộc về phần tử cha)."""
+    parent = node.getparent()
+    if node.tail:
+        previous = node.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + node.tail
+        else:
+            parent.text = (parent.text or "") + node.tail
+    parent.remove(node)
+
+
+def parse_svg(svg_content: str):
+    """
+    Parse SVG của template. huge_tree: ảnh base64 vài MB vượt giới hạn 10MB/attribute
+    mặc định của libxml2. Không resolve entity (template do người dùng upload).
+    """
+    parser = etree.XMLParser(huge_tree=True, resolve_entities=False, no_network=True)
+    return etree.fromstring(svg_content.encode(), parser)
+
+
+def _href(node) -> str | None:
+    return node.get("href") or node.get(_XLINK_HREF)
+
+
+# ── Metadata ────────────────────────────────────────────────
+
+
+def strip_metadata(root) -> None:
+    for node in list(root.iter(etree.Comment, etree.ProcessingInstruction)):
+        if node.getparent() is not None:
+            _remove_keep_tail(node)
+
+    for node in list(root.iter()):
+        if node is root or node.getparent() is None:
+            continue
+        if _local(node.tag) == "metadata" or _namespace(node.tag) in _EDITOR_NAMESPACES:
+            _remove_keep_tail(node)
+
+    for node in root.iter():
+        if not isinstance(node.tag, str):
+            continue
+        for name in list(node.attrib):
+            if _namespace(name) in _EDITOR_NAMESPACES:
+                del node.attrib[name]
+    etree.cleanup_namespaces(root)
+
+
+# ── Unreferenced defs ───────────────────────────────────────
+
+
+def _referenced_ids(root) -> set[str]:
+    ids: set[str] = set()
+    for node in root.iter():
+        if not isinstance(node.tag, str):
+            continue
+        href = _href(node)
+        if href and href.startswith("#"):
+            ids.add(href[1:])
+        for value in node.attrib.values():
+            ids.update(_URL_REF_RE.findall(value))
+        if _local(node.tag) == "style" and node.text:
+            ids.update(_URL_REF_RE.findall(node.text))
+    return ids
+
+
+def remove_unused_defs(root) -> int:
+    """Xoá con của <defs> không được tham chiếu. Trả về số phần tử đã xoá."""
+    removed = 0
+    while True:
+        referenced = _referenced_ids(root)
+        unused = [
+            child
+            for defs in root.iter(f"{{{SVG_NS}}}defs", "defs")
+            for child in defs
+            if isinstance(child.tag, str)
+            and _local(child.tag) not in _KEEP_IN_DEFS
+            and not any(
+                node.get("id") in referenced
+                for node in child.iter()
+                if isinstance(node.tag, str) and node.get("id")
+            )
+        ]
+        if not unused:
+            break
+        for child in unused:
+            _remove_keep_tail(child)
+        removed += len(unused)
+
+    for defs in list(root.iter(f"{{{SVG_NS}}}defs", "defs")):
+        if len(defs) == 0 and not (defs.text or "").strip() and defs.getparent() is not None:
+            _remove_keep_tail(defs)
+    return removed
+
+
+# ── Paths ───────────────────────────────────────────────────
+
+
+def _format_number(value: float, precision: int) -> str:
+    text = f"{value:.{precision}f}"
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+
+def _join_tokens(tokens: list[str]) -> str:
+    parts: list[str] = []
+    previous_is_number = False
+    for token in tokens:
+        is_number = not token.isalpha()
+        if is_number and previous_is_number and not token.startswith("-"):
+            parts.append(" ")
+        parts.append(token)
+        previous_is_number = is_number
+    return "".join(parts)
+
+
+def round_path_data(d: str, precision: int) -> str:
+    """Làm tròn số trong path data. Path có cung (A/a — cờ có thể viết liền) hoặc ký tự lạ giữ nguyên."""
+    if re.search(r"[Aa]", d) or _PATH_TOKEN_RE.sub("", d).strip(" ,\t\r\n"):
+        return d
+    tokens = _PATH_TOKEN_RE.findall(d)
+    rounded = [token if token.isalpha() else _format_number(float(token), precision) for token in tokens]
+    return _join_tokens(rounded)
+
+
+def round_geometry(root, precision: int) -> None:
+    for node in root.iter():
+        if not isinstance(node.tag, str):
+            continue
+        tag = _local(node.tag)
+        if tag == "path" and node.get("d"):
+            node.set("d", round_path_data(node.get("d"), precision))
+        elif tag in ("polyline", "polygon") and node.get("points"):
+            numbers = [_format_number(float(n), precision) for n in _NUMBER_RE.findall(node.get("points"))]
+            node.set("points", " ".join(numbers))
+
+
+# ── Embedded rasters ────────────────────────────────────────
+
+
+def _parse_length(value: str | None) -> tuple[float, str] | None:
+    """(số, đơn vị) — None nếu không có / là phần trăm."""
+    if not value:
+        return None
+    match = _LENGTH_RE.match(value)
+    if not match:
+        return None
+    return float(match.group(1)), match.group(2) or "px"
+
+
+def _inches_per_user_unit(root) -> float:
+    """Kích thước (inch) của một đơn vị user space của root <svg> trên trang PDF."""
+    # Không có viewBox: 1 đơn vị = 1px CSS = 1/96 inch (cairosvg cũng dùng 96 dpi)
+    width = _parse_length(root.get("width"))
+    view_box = (root.get("viewBox") or "").replace(",", " ").split()
+    if width is None or len(view_box) != 4:
+        return 1 / 96
+    try:
+        view_width = float(view_box[2])
+    except ValueError:
+        return 1 / 96
+    if view_width <= 0:
+        return 1 / 96
+    return width[0] * _INCHES_PER_UNIT[width[1]] / view_width
+
+
+def _multiply(m1: tuple, m2: tuple) -> tuple:
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def _parse_transform(value: str | None) -> tuple:
+    matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    for name, raw_args in _TRANSFORM_RE.findall(value or ""):
+        args = [float(n) for n in _NUMBER_RE.findall(raw_args)]
+        if name == "matrix" and len(args) == 6:
+            step = tuple(args)
+        elif name == "translate" and args:
+            step = (1, 0, 0, 1, args[0], args[1] if len(args) > 1 else 0)
+        elif name == "scale" and args:
+            step = (args[0], 0, 0, args[1] if len(args) > 1 else args[0], 0, 0)
+        elif name == "rotate" and args:
+            angle = math.radians(args[0])
+            step = (math.cos(angle), math.sin(angle), -math.sin(angle), math.cos(angle), 0, 0)
+        elif name == "skewX" and args:
+            step = (1, 0, math.tan(math.radians(args[0])), 1, 0, 0)
+        elif name == "skewY" and args:
+            step = (1, math.tan(math.radians(args[0])), 0, 1, 0, 0)
+        else:
+            continue
+        matrix = _multiply(matrix, step)
+    return matrix
+
+
+def _display_scale(node) -> tuple[float, float]:
+    """Hệ số phóng (x, y) từ transform của node và mọi phần tử cha."""
+    matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    current = node
+    while current is not None:
+        matrix = _multiply(_parse_transform(current.get("transform")), matrix)
+        current = current.getparent()
+    a, b, c, d, _, _ = matrix
+    return math.hypot(a, b), math.hypot(c, d)
+
+
+def _encode(image, fmt: str, jpeg_quality: int) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "JPEG":
+        image.save(buffer, "JPEG", quality=jpeg_quality, optimize=True)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _optimize_raster(raw: bytes, mime: str, target: tuple[int, int] | None, jpeg_quality: int) -> bytes:
+    """Ảnh sau khi down-sample / nén lại, hoặc `raw` nếu không nhỏ hơn."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(raw)) as image:
+        image.load()
+        fmt = "JPEG" if mime.lower() in ("image/jpeg", "image/jpg") else "PNG"
+        resized = False
+        if target is not None:
+            scale = max(target[0] / image.width, target[1] / image.height)
+            if scale * _DOWNSAMPLE_THRESHOLD < 1:
+                if image.mode in ("1", "P"):
+                    # Pillow chỉ resize ảnh palette bằng NEAREST
+                    image = image.convert("RGBA")
+                size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                image = image.resize(size, Image.LANCZOS)
+                resized = True
+        # JPEG chỉ nén lại khi đã resize (nén lại JPEG nguyên kích thước chỉ làm giảm chất lượng)
+        if fmt == "JPEG" and not resized:
+            return raw
+        encoded = _encode(image, fmt, jpeg_quality)
+    return encoded if len(encoded) < len(raw) else raw
+
+
+def optimize_images(root, dpi: int, jpeg_quality: int) -> None:
+    inches_per_unit = _inches_per_user_unit(root)
+    images = [node for node in root.iter(f"{{{SVG_NS}}}image", "image")]
+    optimized: dict[str, str] = {}
+
+    for node in images:
+        href = _href(node)
+        match = _DATA_URI_RE.match(href or "")
+        if not match:
+            continue
+        mime, payload = match.group(1), re.sub(r"\s+", "", match.group(2))
+        if payload not in optimized:
+            width = _parse_length(node.get("width"))
+            height = _parse_length(node.get("height"))
+            target = None
+            if width is not None and height is not None and dpi > 0:
+                scale_x, scale_y = _display_scale(node)
+                target = (
+                    math.ceil(width[0] * _INCHES_PER_UNIT[width[1]] * 96 * inches_per_unit * scale_x * dpi),
+                    math.ceil(height[0] * _INCHES_PER_UNIT[height[1]] * 96 * inches_per_unit * scale_y * dpi),
+                )
+            try:
+                raw = base64.b64decode(payload, validate=True)
+                new_raw = _optimize_raster(raw, mime, target, jpeg_quality)
+                payload_out = payload if new_raw is raw else base64.b64encode(new_raw).decode("ascii")
+            except (binascii.Error, OSError, ValueError) as exc:
+                logger.info("SVG optimizer: skip embedded image (%s)", exc)
+                payload_out = payload
+            # Ảnh giống hệt nhau ở nhiều chỗ dùng chung kết quả của lần gặp đầu tiên
+            optimized[payload] = payload_out
+        uri = f"data:{mime};base64,{optimized[payload]}"
+        node.attrib.pop(_XLINK_HREF, None)
+        node.set("href", uri)
+
+    _dedupe_images(images)
+
+
+def _plain_number(value: str | None) -> float | None:
+    """x/y không đơn vị (mặc định 0). None nếu có đơn vị / phần trăm."""
+    try:
+        return float(value or 0)
+    except ValueError:
+        return None
+
+
+def _dedupe_images(images: list) -> None:
+    """
+    Ảnh trùng data URI và trùng mọi attribute khác (width/height, opacity, style,
+    clip-path, ...), không có transform riêng: chỉ giữ bản đầu tiên, các bản sau thành
+    <use href="#id" x=dx y=dy>. <use> không mang attribute trình bày nào — ảnh được
+    tham chiếu đã có sẵn, chép thêm lên <use> thì opacity/clip bị áp hai lần.
+    """
+    groups: dict[tuple, list] = {}
+    for node in images:
+        href = node.get("href") or ""
+        if not href.startswith("data:") or node.get("transform") is not None:
+            continue
+        if _plain_number(node.get("x")) is None or _plain_number(node.get("y")) is None:
+            continue
+        others = frozenset(
+            (name, value)
+            for name, value in node.attrib.items()
+            if name not in ("href", _XLINK_HREF, "x", "y", "id")
+        )
+        groups.setdefault((href, others), []).append(node)
+
+    for (href, _), nodes in groups.items():
+        if len(nodes) < 2:
+            continue
+        first = nodes[0]
+        image_id = first.get("id") or f"img-{hashlib.sha256(href.encode()).hexdigest()[:12]}"
+        first.set("id", image_id)
+        x0, y0 = _plain_number(first.get("x")), _plain_number(first.get("y"))
+        for node in nodes[1:]:
+            use = etree.Element(f"{{{SVG_NS}}}use")
+            use.set("href", f"#{image_id}")
+            dx = _plain_number(node.get("x")) - x0
+            dy = _plain_number(node.get("y")) - y0
+            if dx:
+                use.set("x", _format_number(dx, 6))
+            if dy:
+                use.set("y", _format_number(dy, 6))
+            if node.get("id") is not None:
+                # Phần tử khác có thể trỏ tới id của bản trùng
+                use.set("id", node.get("id"))
+            use.tail = node.tail
+            node.getparent().replace(node, use)
+
+
+# ── Entry point ─────────────────────────────────────────────
+
+
+def optimize_svg(
+    svg_content: str,
+    dpi: int = settings.SVG_IMAGE_DPI,
+    jpeg_quality: int = settings.SVG_IMAGE_JPEG_QUALITY,
+    precision: int = settings.SVG_PATH_PRECISION,
+) -> str:
+    """SVG đã tối ưu. Raise etree.XMLSyntaxError nếu SVG không hợp lệ."""
+    root = parse_svg(svg_content)
+    strip_metadata(root)
+    remove_unused_defs(root)
+    if precision >= 0:
+        round_geometry(root, precision)
+    optimize_images(root, dpi, jpeg_quality)
+    return etree.tostring(root, encoding="unicode")
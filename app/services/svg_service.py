@@ -1,33 +1,324 @@
+import hashlib
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
 from lxml import etree
 
 from app.core.exceptions import BadRequestException
+from app.services.svg_optimizer import parse_svg
+
+# {{key}} trong text/tail — key có thể chứa khoảng trắng (header sheet)
+_PLACEHOLDER_RE = re.compile(r"\{\{(.+?)\}\}")
+# Marker tạm (Private Use Area) thay cho placeholder trước khi serialize
+_MARKER_RE = re.compile("\ue000(\\d+)\ue001")
+# Tham chiếu tới id khác: href="#id", fill="url(#id)", style="...url(#id)..."
+_URL_REF_RE = re.compile(r"url\(\s*['\"]?#([^)'\"\s]+)")
+
+# Không tự vẽ, chỉ được tham chiếu (gradient, clip, font, ...) → giữ ở cả hai layer
+_RESOURCE_TAGS = {
+	"defs", "style", "linearGradient", "radialGradient", "pattern", "clipPath",
+	"mask", "filter", "symbol", "marker", "font", "font-face",
+}
+# Text nằm trong các phần tử này không được vẽ trực tiếp → không tách layer được
+_NON_RENDERED_TAGS = _RESOURCE_TAGS - {"style"}
+# Phần tử vẽ ra trang (dùng để kiểm tra thứ tự vẽ giữa hai layer)
+_GRAPHICS_TAGS = {
+	"path", "rect", "circle", "ellipse", "line", "polyline", "polygon",
+	"text", "image", "use", "foreignObject",
+}
+# Hiệu ứng áp lên cả group sau khi vẽ xong các con → group chung không tách ra hai layer được
+_GROUP_EFFECT_PROPS = ("opacity", "filter", "mask", "clip-path")
+_XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+COMPILED_CACHE_SIZE = 64
+
+
+class CompiledTemplate:
+	"""
+	SVG đã parse + serialize sẵn, tách thành các đoạn literal xen kẽ tên biến:
+	    literals[0] var[0] literals[1] var[1] ... literals[n]
+	Render = nối chuỗi, không parse lại XML.
+	"""
+
+	__slots__ = ("content_hash", "literals", "variables", "layers")
+
+	def __init__(
+		self,
+		content_hash: str,
+		literals: list[str],
+		variables: list[str],
+		layers: "TemplateLayers | None" = None,
+	) -> None:
+		self.content_hash = content_hash
+		self.literals = literals
+		self.variables = variables
+		self.layers = layers
+
+	def render(self, data: dict[str, str]) -> str:
+		parts = [self.literals[0]]
+		for name, literal in zip(self.variables, self.literals[1:]):
+			value = data.get(name)
+			# Key không có trong data → giữ nguyên placeholder như bản cũ
+			parts.append(escape(value if value is not None else "{{" + name + "}}"))
+			parts.append(literal)
+		return "".join(parts)
+
+
+class TemplateLayers:
+	"""
+	Template tách làm hai layer cùng kích thước trang:
+	- static_svg: mọi thứ trừ các <text> có placeholder → render PDF một lần cho mỗi version,
+	- overlay: chỉ các <text> có placeholder (kèm group cha + defs/style) → render cho từng người.
+	Ghép hai PDF: overlay vẽ đè lên static.
+	"""
+
+	__slots__ = ("static_svg", "overlay")
+
+	def __init__(self, static_svg: str, overlay: CompiledTemplate) -> None:
+		self.static_svg = static_svg
+		self.overlay = overlay
+
+
+class _CompiledTemplateCache:
+	def __init__(self, maxsize: int) -> None:
+		self._maxsize = maxsize
+		self._items: OrderedDict[tuple, CompiledTemplate] = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key: tuple) -> CompiledTemplate | None:
+		with self._lock:
+			compiled = self._items.get(key)
+			if compiled is not None:
+				self._items.move_to_end(key)
+			return compiled
+
+	def put(self, key: tuple, compiled: CompiledTemplate) -> None:
+		with self._lock:
+			self._items[key] = compiled
+			self._items.move_to_end(key)
+			while len(self._items) > self._maxsize:
+				self._items.popitem(last=False)
+
+
+_compiled_cache = _CompiledTemplateCache(COMPILED_CACHE_SIZE)
+
+
+def content_hash(svg_content: str) -> str:
+	return hashlib.sha256(svg_content.encode("utf-8")).hexdigest()
 
 
 class SvgService:
+	def compile(
+		self,
+		svg_content: str,
+		template_id: uuid.UUID | None = None,
+	) -> CompiledTemplate:
+		"""Compile template (có cache LRU theo template id + content hash)."""
+		digest = content_hash(svg_content)
+		key = (template_id, digest)
+		compiled = _compiled_cache.get(key)
+		if compiled is None:
+			compiled = self._compile(svg_content, digest)
+			_compiled_cache.put(key, compiled)
+		return compiled
+
 	def render(self, svg_content: str, data: dict[str, str]) -> str:
+		return self.compile(svg_content).render(data)
+
+	def validate(self, svg_content: str) -> bool:
 		try:
-			tree = etree.fromstring(svg_content.encode())
+			parse_svg(svg_content)
+			return True
 		except etree.XMLSyntaxError as exc:
 			raise BadRequestException("SVG content không hợp lệ.") from exc
 
-		# Replace {{key}} placeholders in all text nodes
-		for element in tree.iter():
-			if element.text:
-				for key, value in data.items():
-					placeholder = "{{" + key + "}}"
-					if placeholder in element.text:
-						element.text = element.text.replace(placeholder, value)
-			if element.tail:
-				for key, value in data.items():
-					placeholder = "{{" + key + "}}"
-					if placeholder in element.tail:
-						element.tail = element.tail.replace(placeholder, value)
-
-		return etree.tostring(tree, encoding="unicode")
-
-	def validate(self, svg_content: str) -> bool:
+	@staticmethod
+	def _compile(svg_content: str, digest: str, split_layers: bool = True) -> CompiledTemplate:
 		try:
-			etree.fromstring(svg_content.encode())
-			return True
+			tree = parse_svg(svg_content)
 		except etree.XMLSyntaxError as exc:
 			raise BadRequestException("SVG content không hợp lệ.") from exc
+
+		names: list[str] = []
+
+		def mark(match: re.Match) -> str:
+			names.append(match.group(1))
+			return f"\ue000{len(names) - 1}\ue001"
+
+		# Placeholder chỉ được thay trong text/tail (giống render cũ), không thay trong attribute
+		for element in tree.iter():
+			if element.text and "{{" in element.text:
+				element.text = _PLACEHOLDER_RE.sub(mark, element.text)
+			if element.tail and "{{" in element.tail:
+				element.tail = _PLACEHOLDER_RE.sub(mark, element.tail)
+
+		pieces = _MARKER_RE.split(etree.tostring(tree, encoding="unicode"))
+		return CompiledTemplate(
+			content_hash=digest,
+			literals=pieces[0::2],
+			variables=[names[int(i)] for i in pieces[1::2]],
+			layers=SvgService._split_layers(svg_content, digest) if names and split_layers else None,
+		)
+
+	@staticmethod
+	def _split_layers(svg_content: str, digest: str) -> TemplateLayers | None:
+		"""
+		Tách static / overlay. None nếu template không tách được an toàn
+		(placeholder ngoài <text>, text nằm trong defs/pattern/<switch>/..., tham chiếu chéo
+		giữa hai layer như <use>/<textPath>, có phần tử tĩnh vẽ sau text biến đổi, hoặc
+		group cha có opacity/filter/mask/clip-path chứa cả phần tử tĩnh)
+		→ render cả template như cũ.
+		"""
+		static_tree = parse_svg(svg_content)
+		overlay_tree = parse_svg(svg_content)
+		# Hai cây parse từ cùng nguồn → iter() cùng thứ tự, ghép cặp theo vị trí
+		static_nodes = [el for el in static_tree.iter() if isinstance(el.tag, str)]
+		overlay_nodes = [el for el in overlay_tree.iter() if isinstance(el.tag, str)]
+		position = {el: i for i, el in enumerate(static_nodes)}
+		overlay_position = {el: i for i, el in enumerate(overlay_nodes)}
+
+		variable: set[int] = set()
+		for el in static_nodes:
+			owners = []
+			if el.text and "{{" in el.text and _PLACEHOLDER_RE.search(el.text):
+				owners.append(el)
+			if el.tail and "{{" in el.tail and _PLACEHOLDER_RE.search(el.tail):
+				owners.append(el.getparent())
+			for owner in owners:
+				if _local(owner) in ("title", "desc", "metadata"):
+					continue
+				text = _outermost_text(owner)
+				if text is None:
+					return None
+				variable.add(position[text])
+
+		if not variable:
+			return None
+		for i in variable:
+			# <switch> chỉ vẽ con đầu tiên hợp lệ: bỏ <text> ở layer tĩnh thì switch chọn con khác
+			if any(
+				_local(a) in _NON_RENDERED_TAGS or _local(a) == "switch"
+				for a in static_nodes[i].iterancestors()
+			):
+				return None
+
+		in_variable = {
+			position[d] for i in variable for d in static_nodes[i].iter() if isinstance(d.tag, str)
+		}
+		# Overlay luôn được ghép ĐÈ lên cả layer tĩnh → phần tử tĩnh vẽ sau <text> biến đổi
+		# đầu tiên (con dấu, khung, ribbon trong suốt đè lên tên, ...) sẽ bị đổi thứ tự
+		for i in range(min(variable) + 1, len(static_nodes)):
+			el = static_nodes[i]
+			if i not in in_variable and _is_painted(el):
+				return None
+
+		# Group cha chung của text biến đổi và phần tử tĩnh: opacity/filter/mask/clip-path áp
+		# một lần cho cả group; tách ra thì mỗi layer có một bản group → áp hai lần riêng rẽ
+		shared = {position[a] for i in variable for a in static_nodes[i].iterancestors()}
+		for i in shared:
+			group = static_nodes[i]
+			if not _has_group_effect(group):
+				continue
+			for el in group.iter():
+				if isinstance(el.tag, str) and position[el] not in in_variable and _is_painted(el):
+					return None
+
+		keep_subtree = set(in_variable)
+		for i, el in enumerate(static_nodes):
+			if _local(el) in _RESOURCE_TAGS:
+				keep_subtree.update(position[d] for d in el.iter() if isinstance(d.tag, str))
+		keep_path = {
+			position[a] for i in keep_subtree for a in static_nodes[i].iterancestors()
+		}
+
+		# Tham chiếu chéo: phần tử của layer này trỏ tới id chỉ có ở layer kia
+		ids = {el.get("id"): i for i, el in enumerate(static_nodes) if el.get("id")}
+		overlay_kept = keep_subtree | keep_path
+		for i, el in enumerate(static_nodes):
+			for ref in _references(el):
+				target = ids.get(ref)
+				if target is None:
+					continue
+				if i in overlay_kept and target not in overlay_kept:
+					return None
+				if i not in in_variable and target in in_variable:
+					return None
+
+		for i in sorted(variable):
+			_remove_keep_tail(static_nodes[i])
+		for i, el in enumerate(overlay_nodes):
+			parent = el.getparent()
+			if i not in overlay_kept and parent is not None and overlay_position[parent] in keep_path:
+				_remove_keep_tail(el)
+
+		overlay_svg = etree.tostring(overlay_tree, encoding="unicode")
+		return TemplateLayers(
+			static_svg=etree.tostring(static_tree, encoding="unicode"),
+			overlay=SvgService._compile(overlay_svg, digest, split_layers=False),
+		)
+
+
+def _local(el) -> str:
+	return etree.QName(el).localname
+
+
+def _outermost_text(el):
+	"""<text> ngoài cùng chứa `el` (tspan/textPath nằm trong <text>). None nếu không có."""
+	found = None
+	for node in (el, *el.iterancestors()):
+		if _local(node) == "text":
+			found = node
+	return found
+
+
+def _is_painted(el) -> bool:
+	"""Phần tử tự vẽ ra trang (không nằm trong defs/pattern/clipPath/...)."""
+	if _local(el) not in _GRAPHICS_TAGS:
+		return False
+	return not any(_local(a) in _RESOURCE_TAGS for a in el.iterancestors())
+
+
+def _has_group_effect(el) -> bool:
+	"""opacity < 1, filter / mask / clip-path khác none — ở attribute hoặc style."""
+	props = {name: el.get(name) for name in _GROUP_EFFECT_PROPS if el.get(name) is not None}
+	for declaration in (el.get("style") or "").split(";"):
+		name, _, value = declaration.partition(":")
+		if name.strip() in _GROUP_EFFECT_PROPS:
+			props[name.strip()] = value
+	for name, value in props.items():
+		value = value.strip()
+		if name == "opacity":
+			try:
+				if float(value.rstrip("%")) / (100 if value.endswith("%") else 1) >= 1:
+					continue
+			except ValueError:
+				pass
+		elif value in ("", "none"):
+			continue
+		return True
+	return False
+
+
+def _references(el) -> list[str]:
+	refs = []
+	for name, value in el.attrib.items():
+		if name in ("href", _XLINK_HREF) and value.startswith("#"):
+			refs.append(value[1:])
+		elif "url(" in value:
+			refs.extend(_URL_REF_RE.findall(value))
+	return refs
+
+
+def _remove_keep_tail(el) -> None:
+	"""Xoá phần tử nhưng giữ lại tail (text phía sau nó) cho phần tử liền trước / cha."""
+	parent = el.getparent()
+	if el.tail:
+		previous = el.getprevious()
+		if previous is not None:
+			previous.tail = (previous.tail or "") + el.tail
+		else:
+			parent.text = (parent.text or "") + el.tail
+	parent.remove(el)
@@ -1,13 +1,27 @@
+import asyncio
+import hashlib
 import json
+import logging
 import uuid
 
 from lxml import etree
 
+from app.core.config import settings
 from app.core.exceptions import BadRequestException, NotFoundException
+from app.core.fonts import FontRegistry, referenced_families
+from app.core.render_pool import RenderTimeoutError, RenderWorkerError
 from app.models.template import Templates
 from app.repositories.event_repository import EventRepository
 from app.repositories.template_repository import TemplateRepository
+from app.schemas.pagination import Page, PageParams
 from app.schemas.template import PreviewRequest, PreviewResponse, TemplateCreate, TemplateUpdate
+from app.services.certificate_pipeline import CertificateRenderer
+from app.services.pdf_store import PdfStore
+from app.services.preview_cache import PreviewCache, preview_key
+from app.services.svg_optimizer import optimize_svg, parse_svg
+from app.services.svg_service import CompiledTemplate, SvgService, content_hash
+
+logger = logging.getLogger(__name__)
 
 
 class TemplateService:
@@ -15,12 +29,20 @@ class TemplateService:
         self,
         template_repo: TemplateRepository,
         event_repo: EventRepository,
+        font_registry: FontRegistry,
+        svg_service: SvgService,
+        preview_cache: PreviewCache,
+        pdf_store: PdfStore,
     ) -> None:
         self._template_repo = template_repo
         self._event_repo = event_repo
+        self._font_registry = font_registry
+        self._svg = svg_service
+        self._preview_cache = preview_cache
+        self._pdf_store = pdf_store
 
-    async def get_all(self) -> list[Templates]:
-        return await self._template_repo.get_all()
+    async def get_page(self, params: PageParams, event_id: uuid.UUID | None = None) -> Page[Templates]:
+        return await self._template_repo.get_page(params, event_id=event_id)
 
     async def get_by_id(self, template_id: uuid.UUID) -> Templates:
         template = await self._template_repo.get_by_id(template_id)
@@ -28,6 +50,30 @@ class TemplateService:
             raise NotFoundException("Template không tồn tại.")
         return template
 
+    async def get_with_etag(
+        self, template_id: uuid.UUID, if_none_match: str | None = None
+    ) -> tuple[str, Templates | None]:
+        """
+        (etag, template) cho GET /templates/{id}. ETag tính từ cột nhẹ + content_hash nên
+        khi `if_none_match` khớp thì trả (etag, None) mà svg_content không rời DB.
+        """
+        template = await self._template_repo.get_summary_by_id(template_id)
+        if template is None:
+            raise NotFoundException("Template không tồn tại.")
+
+        digest = template.content_hash
+        if digest is None:
+            # Dòng chưa có hash (trước migration 008) → phải đọc body để tính
+            await self._template_repo.load_body(template)
+            digest = content_hash(template.svg_content)
+
+        etag = _template_etag(template, digest)
+        if _etag_matches(if_none_match, etag):
+            return etag, None
+        if template.content_hash is not None:
+            await self._template_repo.load_body(template)
+        return etag, template
+
     async def get_by_event_id(self, event_id: uuid.UUID) -> list[Templates]:
         event = await self._event_repo.get_by_id(event_id)
         if event is None:
@@ -39,10 +85,8 @@ class TemplateService:
         if event is None:
             raise NotFoundException("Event không tồn tại.")
 
-        try:
-            etree.fromstring(payload.svg_content.encode())
-        except etree.XMLSyntaxError:
-            raise BadRequestException("SVG content không hợp lệ.")
+        # fc-match chạy subprocess → ngoài event loop
+        await asyncio.to_thread(self._validate_svg, payload.svg_content, payload.fonts)
 
         variables_json = json.dumps(payload.variables, ensure_ascii=False)
 
@@ -50,7 +94,10 @@ class TemplateService:
             event_id=payload.event_id,
             name=payload.name,
             svg_content=payload.svg_content,
+            content_hash=content_hash(payload.svg_content),
+            svg_optimized=await self._optimize_svg(payload.svg_content),
             variables=variables_json,
+            fonts=json.dumps(payload.fonts, ensure_ascii=False),
         )
         return await self._template_repo.create(new_template)
 
@@ -60,31 +107,136 @@ class TemplateService:
         if payload.name is not None:
             template.name = payload.name
 
-        if payload.svg_content is not None:
-            try:
-                etree.fromstring(payload.svg_content.encode())
-            except etree.XMLSyntaxError:
-                raise BadRequestException("SVG content không hợp lệ.")
-            template.svg_content = payload.svg_content
+        if payload.svg_content is not None or payload.fonts is not None:
+            svg_content = payload.svg_content if payload.svg_content is not None else template.svg_content
+            fonts = payload.fonts if payload.fonts is not None else json.loads(template.fonts or "[]")
+            await asyncio.to_thread(self._validate_svg, svg_content, fonts)
+            if svg_content != template.svg_content or template.svg_optimized is None:
+                template.svg_optimized = await self._optimize_svg(svg_content)
+            template.svg_content = svg_content
+            template.content_hash = content_hash(svg_content)
+            template.fonts = json.dumps(fonts, ensure_ascii=False)
 
         if payload.variables is not None:
             template.variables = json.dumps(payload.variables, ensure_ascii=False)
 
         return await self._template_repo.update(template)
 
+    def get_fonts(self) -> list[tuple[str, list[str]]]:
+        """(filename, families) của các font bundle trong FONTS_DIR."""
+        return [
+            (font.filename, sorted(font.families))
+            for font in self._font_registry.files().values()
+        ]
+
+    def _validate_svg(self, svg_content: str, fonts: list[str]) -> None:
+        """
+        SVG phải parse được và mọi font-family phải resolve được: file font template khai báo,
+        generic family hoặc font fontconfig tìm thấy — tránh cairo âm thầm fallback sang font khác.
+        """
+        try:
+            tree = parse_svg(svg_content)
+        except etree.XMLSyntaxError:
+            raise BadRequestException("SVG content không hợp lệ.")
+
+        missing_files, missing_families = self._font_registry.unresolved(fonts, referenced_families(tree))
+        if missing_files:
+            raise BadRequestException(f"Font không có trong FONTS_DIR: {', '.join(missing_files)}.")
+        if missing_families:
+            raise BadRequestException(
+                f"Không tìm thấy font-family trong fonts của template, FONTS_DIR hay font hệ thống: "
+                f"{', '.join(missing_families)}."
+            )
+
+    @staticmethod
+    async def _optimize_svg(svg_content: str) -> str | None:
+        """
+        Bản tối ưu để render (svg_optimizer). None = render svg_content: tắt tối ưu,
+        tối ưu lỗi, hoặc không nhỏ hơn bản gốc.
+        """
+        if not settings.SVG_OPTIMIZE_ENABLED:
+            return None
+        try:
+            # Decode / resize ảnh nhúng tốn CPU → chạy ngoài event loop
+            optimized = await asyncio.to_thread(optimize_svg, svg_content)
+        except Exception:
+            logger.warning("SVG optimization failed, rendering the original SVG", exc_info=True)
+            return None
+        logger.info("SVG optimized: %d → %d bytes", len(svg_content), len(optimized))
+        return optimized if len(optimized) < len(svg_content) else None
+
     async def delete(self, template_id: uuid.UUID) -> None:
-        template = await self.get_by_id(template_id)
+        template = await self._template_repo.get_summary_by_id(template_id)
+        if template is None:
+            raise NotFoundException("Template không tồn tại.")
         await self._template_repo.delete(template)
 
     async def preview(self, template_id: uuid.UUID, payload: PreviewRequest) -> PreviewResponse:
+        compiled = await self._compile(template_id)
+        # Thay {{placeholder}} giống hệt pipeline generate
+        return PreviewResponse(svg_string=compiled.render(payload.sample_data))
+
+    async def render_preview(
+        self,
+        template_id: uuid.UUID,
+        sample_data: dict[str, str],
+        fmt: str,
+        width: int,
+        if_none_match: str | None = None,
+    ) -> tuple[str, bytes | None]:
+        """
+        (etag, bytes) của preview PNG/PDF render bằng cùng engine với pipeline
+        (CertificateRenderer, kể cả layered render). bytes = None khi `if_none_match`
+        khớp etag (client đã có bản này → 304) — khi đó chỉ đọc dòng summary.
+        """
+        template = await self._template_repo.get_summary_by_id(template_id)
+        if template is None:
+            raise NotFoundException("Template không tồn tại.")
+        digest = template.content_hash
+        if digest is None:
+            # Dòng chưa có hash (trước migration 008) → phải đọc body để tính
+            await self._template_repo.load_body(template)
+            digest = content_hash(template.svg_content)
+
+        layered = settings.GENERATION_LAYERED_RENDER
+        # PDF không phụ thuộc width → cùng một key
+        key = preview_key(digest, sample_data, fmt, width if fmt == "png" else 0, layered)
+        if _etag_matches(if_none_match, key):
+            return key, None
+
+        content = self._preview_cache.get(key)
+        if content is None:
+            if template.content_hash is not None:
+                await self._template_repo.load_body(template)
+            compiled = self._svg.compile(template.svg_optimized or template.svg_content, template.id)
+            renderer = CertificateRenderer(compiled, self._pdf_store, layered=layered)
+            try:
+                if fmt == "png":
+                    content = await renderer.render_png(sample_data, width)
+                else:
+                    content = await renderer.render(sample_data)
+            except (RenderTimeoutError, RenderWorkerError) as exc:
+                raise BadRequestException(f"Không thể render SVG: {str(exc)}") from exc
+            self._preview_cache.put(key, content)
+        return key, content
+
+    async def _compile(self, template_id: uuid.UUID) -> CompiledTemplate:
         template = await self.get_by_id(template_id)
+        return self._svg.compile(template.svg_optimized or template.svg_content, template.id)
+
 
-        tree = etree.fromstring(template.svg_content.encode())
+def _template_etag(template: Templates, digest: str) -> str:
+    """ETag của TemplateResponse: đổi khi body SVG hoặc metadata (tên, variables, fonts) đổi."""
+    parts = [str(template.event_id), template.name, template.variables, template.fonts or "", digest]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
 
-        for key, value in payload.sample_data.items():
-            node = tree.find(f'.//*[@id="{key}"]')
-            if node is not None:
-                node.text = value
 
-        svg_string = etree.tostring(tree, encoding="unicode")
-        return PreviewResponse(svg_string=svg_string)
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match: "a", W/"b" hoặc * (so sánh weak như RFC 9110)."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/").strip('"') == etag:
+            return True
+    return False
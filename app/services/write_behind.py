@@ -0,0 +1,145 @@
+"""
+Write-behind buffer cho trạng thái asset và tiến độ generation log.
+
+Thay vì mỗi participant: SELECT + UPDATE asset, SELECT + UPDATE log, 2 lần commit,
+buffer gom lại và flush theo lô:
+    UPDATE generated_assets SET email_status = ? WHERE id IN (...)   -- mỗi status 1 câu
+    UPDATE generation_log SET processed = processed + n WHERE id = ?
+sau mỗi `max_rows` bản ghi hoặc `flush_interval_ms`, và luôn flush lần cuối khi
+thoát khỏi `async with` (kể cả khi có lỗi).
+Flush đã commit xong thì publish sang ProgressHub cho SSE watcher cùng process.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.repositories.generated_asset_repository import GeneratedAssetRepository
+from app.repositories.generation_log_repository import GenerationLogRepository
+from app.services.progress_hub import ProgressHub, shared_progress_hub
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    def __init__(
+        self,
+        asset_repo: GeneratedAssetRepository,
+        log_repo: GenerationLogRepository,
+        commit: Callable[[], Awaitable[None]] | None = None,
+        rollback: Callable[[], Awaitable[None]] | None = None,
+        max_rows: int = settings.WRITE_BEHIND_MAX_ROWS,
+        flush_interval_ms: int = settings.WRITE_BEHIND_FLUSH_MS,
+        lock: asyncio.Lock | None = None,
+        progress_hub: ProgressHub | None = None,
+    ) -> None:
+        self._asset_repo = asset_repo
+        self._log_repo = log_repo
+        self._commit = commit
+        self._rollback = rollback
+        self._max_rows = max(1, max_rows)
+        self._flush_interval = max(1, flush_interval_ms) / 1000
+
+        self._progress_hub = progress_hub or shared_progress_hub()
+
+        self._statuses: dict[uuid.UUID, str] = {}
+        # asset_id → log_id (chỉ các record có log_id) để publish theo log
+        self._asset_logs: dict[uuid.UUID, uuid.UUID] = {}
+        self._progress: defaultdict[uuid.UUID, int] = defaultdict(int)
+        self._pending = 0
+        # Các repo dùng chung một AsyncSession → không cho 2 lần flush chạy song song.
+        # Caller cũng dùng session đó ở chỗ khác thì truyền chung `lock` vào.
+        self._lock = lock or asyncio.Lock()
+        self._timer: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "WriteBehindBuffer":
+        self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if exc_type is None:
+            await self.flush()
+            return
+        # Body đã lỗi: vẫn cố ghi những gì đã xử lý, nhưng không che lỗi gốc
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Final write-behind flush failed")
+
+    async def record(
+        self,
+        asset_id: uuid.UUID,
+        email_status: str,
+        log_id: uuid.UUID | None = None,
+    ) -> None:
+        """Ghi nhận status mới của asset (+1 processed cho log nếu có)."""
+        self._statuses[asset_id] = email_status
+        if log_id is not None:
+            self._asset_logs[asset_id] = log_id
+            self._progress[log_id] += 1
+        self._pending += 1
+        if self._pending >= self._max_rows:
+            await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._pending:
+                return
+            statuses, self._statuses = self._statuses, {}
+            asset_logs, self._asset_logs = self._asset_logs, {}
+            progress, self._progress = self._progress, defaultdict(int)
+            self._pending = 0
+
+            by_status: defaultdict[str, list[uuid.UUID]] = defaultdict(list)
+            for asset_id, email_status in statuses.items():
+                by_status[email_status].append(asset_id)
+
+            try:
+                for email_status, asset_ids in by_status.items():
+                    await self._asset_repo.bulk_update_status(asset_ids, email_status)
+                for log_id, count in progress.items():
+                    await self._log_repo.add_processed(log_id, count)
+                if self._commit is not None:
+                    await self._commit()
+            except Exception:
+                if self._rollback is not None:
+                    await self._rollback()
+                # Trả lại các thay đổi chưa ghi được (bản ghi mới hơn được giữ nguyên)
+                for asset_id, email_status in statuses.items():
+                    self._statuses.setdefault(asset_id, email_status)
+                for asset_id, log_id in asset_logs.items():
+                    self._asset_logs.setdefault(asset_id, log_id)
+                for log_id, count in progress.items():
+                    self._progress[log_id] += count
+                self._pending += len(statuses)
+                raise
+
+            if self._commit is not None:
+                self._publish(statuses, asset_logs, progress)
+
+    def _publish(
+        self,
+        statuses: dict[uuid.UUID, str],
+        asset_logs: dict[uuid.UUID, uuid.UUID],
+        progress: dict[uuid.UUID, int],
+    ) -> None:
+        by_log: defaultdict[uuid.UUID, dict[uuid.UUID, str]] = defaultdict(dict)
+        for asset_id, log_id in asset_logs.items():
+            by_log[log_id][asset_id] = statuses[asset_id]
+        for log_id in by_log.keys() | progress.keys():
+            self._progress_hub.publish(log_id, by_log.get(log_id, {}), progress.get(log_id, 0))
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # Lần flush theo số dòng / flush cuối sẽ raise lỗi cho caller
+                logger.exception("Periodic write-behind flush failed")
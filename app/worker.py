@@ -0,0 +1,202 @@
+"""
+Worker xử lý generation job, chạy tách khỏi API process.
+
+    python -m app.worker
+
+Mỗi worker:
+- claim job từ bảng generation_jobs (UPDLOCK + READPAST → không lấy trùng),
+- giữ lease bằng heartbeat định kỳ trên session riêng,
+- chạy batch với AsyncSession + render pool của chính nó,
+- khi nhận SIGTERM/SIGINT: ngừng claim, huỷ job đang chạy và trả job về QUEUED,
+- hết quota Gmail: trả job về QUEUED với available_at = lúc có quota trở lại.
+
+Worker chết đột ngột → lease hết hạn → worker khác claim lại job.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import signal
+import socket
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionFactory, engine
+from app.core.executors import get_render_pool, prestart_render_pool, shutdown_executors
+from app.core.google_http import close_http_client
+from app.models.generation_job import GenerationJobs
+from app.repositories.generated_asset_repository import GeneratedAssetRepository
+from app.repositories.generation_job_repository import GenerationJobRepository
+from app.repositories.generation_log_repository import GenerationLogRepository
+from app.repositories.template_repository import TemplateRepository
+from app.services.generation_log_service import GenerationLogService
+from app.services.gmail_rate_limiter import GmailRateLimiter
+from app.services.gmail_service import GmailService
+from app.services.google_sheets_service import GoogleSheetsService
+from app.services.pdf_service import PdfService
+from app.services.pdf_store import shared_pdf_store
+from app.services.svg_service import SvgService
+
+logger = logging.getLogger("app.worker")
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _build_generation_log_service(session: AsyncSession) -> GenerationLogService:
+    return GenerationLogService(
+        generation_log_repo=GenerationLogRepository(session),
+        generation_job_repo=GenerationJobRepository(session),
+        generated_asset_repo=GeneratedAssetRepository(session),
+        template_repo=TemplateRepository(session),
+        svg_service=SvgService(),
+        pdf_service=PdfService(),
+        sheets_service=GoogleSheetsService(),
+        gmail_service=GmailService(),
+        rate_limiter=GmailRateLimiter(AsyncSessionFactory),
+        pdf_store=shared_pdf_store(),
+        db=session,
+    )
+
+
+async def _claim_job() -> GenerationJobs | None:
+    async with AsyncSessionFactory() as session:
+        job_repo = GenerationJobRepository(session)
+        log_repo = GenerationLogRepository(session)
+
+        for log_id in await job_repo.fail_exhausted(settings.WORKER_MAX_ATTEMPTS):
+            await log_repo.update_status(log_id, "FAILED")
+
+        job = await job_repo.claim(
+            WORKER_ID,
+            lease_seconds=settings.WORKER_LEASE_SECONDS,
+            max_attempts=settings.WORKER_MAX_ATTEMPTS,
+        )
+        await session.commit()
+        return job
+
+
+async def _finish_job(job: GenerationJobs, status: str, error: str | None = None) -> None:
+    async with AsyncSessionFactory() as session:
+        await GenerationJobRepository(session).finish(job.id, WORKER_ID, status, last_error=error)
+        if status == "FAILED":
+            await GenerationLogRepository(session).update_status(job.generation_log_id, "FAILED")
+        await session.commit()
+
+
+async def _defer_job(job: GenerationJobs, available_at: datetime.datetime) -> None:
+    async with AsyncSessionFactory() as session:
+        await GenerationJobRepository(session).defer(job.id, WORKER_ID, available_at)
+        await session.commit()
+
+
+async def _retry_job(job: GenerationJobs, error: str) -> None:
+    async with AsyncSessionFactory() as session:
+        await GenerationJobRepository(session).retry(
+            job.id,
+            WORKER_ID,
+            delay_seconds=settings.WORKER_RETRY_BACKOFF_SECONDS * job.attempts,
+            last_error=error,
+        )
+        await session.commit()
+
+
+async def _heartbeat(job: GenerationJobs, job_task: asyncio.Task) -> None:
+    while True:
+        await asyncio.sleep(settings.WORKER_HEARTBEAT_SECONDS)
+        try:
+            async with AsyncSessionFactory() as session:
+                alive = await GenerationJobRepository(session).heartbeat(
+                    job.id, WORKER_ID, lease_seconds=settings.WORKER_LEASE_SECONDS
+                )
+                await session.commit()
+        except Exception:
+            logger.exception("Heartbeat failed for job %s", job.id)
+            continue
+        if not alive:
+            logger.warning("Lost lease on job %s, cancelling", job.id)
+            job_task.cancel()
+            return
+
+
+async def _run_job(job: GenerationJobs, stop: asyncio.Event) -> None:
+    async def run() -> datetime.datetime | None:
+        async with AsyncSessionFactory() as session:
+            return await _build_generation_log_service(session).run_job(job)
+
+    logger.info("Running job %s (log %s, attempt %s)", job.id, job.generation_log_id, job.attempts)
+    job_task = asyncio.create_task(run())
+    heartbeat_task = asyncio.create_task(_heartbeat(job, job_task))
+    stop_task = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait({job_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+
+        if not job_task.done():
+            # Shutdown: huỷ batch, trả job về hàng đợi cho worker khác
+            job_task.cancel()
+            await asyncio.wait({job_task})
+            async with AsyncSessionFactory() as session:
+                await GenerationJobRepository(session).release(job.id, WORKER_ID)
+                await session.commit()
+            return
+        if job_task.cancelled():
+            # Mất lease — worker khác đã nhận job, không ghi đè trạng thái
+            return
+
+        exc = job_task.exception()
+        if exc is not None:
+            if job.attempts < settings.WORKER_MAX_ATTEMPTS:
+                logger.warning(
+                    "Job %s failed (attempt %s/%s), retrying: %s",
+                    job.id, job.attempts, settings.WORKER_MAX_ATTEMPTS, exc,
+                )
+                await _retry_job(job, str(exc))
+            else:
+                logger.error("Job %s failed: %s", job.id, exc, exc_info=exc)
+                await _finish_job(job, "FAILED", error=str(exc))
+        elif (deferred_until := job_task.result()) is not None:
+            logger.info("Job %s deferred until %s (Gmail quota)", job.id, deferred_until)
+            await _defer_job(job, deferred_until)
+        else:
+            await _finish_job(job, "DONE")
+    finally:
+        heartbeat_task.cancel()
+        stop_task.cancel()
+        logger.info("Render pool after job %s: %s", job.id, get_render_pool().stats())
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Worker %s started", WORKER_ID)
+    try:
+        await prestart_render_pool()
+        while not stop.is_set():
+            try:
+                job = await _claim_job()
+            except Exception:
+                logger.exception("Could not claim job")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.WORKER_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await _run_job(job, stop)
+    finally:
+        await close_http_client()
+        shutdown_executors()
+        await engine.dispose()
+        logger.info("Worker %s stopped", WORKER_ID)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main())
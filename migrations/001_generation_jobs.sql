@@ -0,0 +1,27 @@
+-- ============================================================
+-- 001: Hàng đợi generation_jobs cho worker (python -m app.worker)
+-- Chạy trên DB đã tạo từ Bugkathon_GDGoC-Certificate-System.sql
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+CREATE TABLE generation_jobs (
+    id UNIQUEIDENTIFIER NOT NULL DEFAULT NEWID(),
+    generation_log_id UNIQUEIDENTIFIER NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT 'QUEUED', -- QUEUED, RUNNING, DONE, FAILED
+    attempts INT NOT NULL DEFAULT 0,
+    column_mapping NVARCHAR(MAX) NULL, -- JSON: {"name": "A", "participant_email": "C"}
+    lease_owner VARCHAR(255) NULL, -- hostname:pid của worker đang giữ job
+    lease_expires_at DATETIME NULL, -- UTC
+    heartbeat_at DATETIME NULL, -- UTC
+    last_error NVARCHAR(MAX) NULL,
+    created_at DATETIME DEFAULT GETDATE(),
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT PK_generation_jobs PRIMARY KEY (id),
+    CONSTRAINT FK_GenerationJobs_GenerationLog FOREIGN KEY (generation_log_id) REFERENCES generation_log(id) ON DELETE CASCADE
+);
+GO
+
+CREATE INDEX IX_generation_jobs_status_created_at ON generation_jobs (status, created_at);
+GO
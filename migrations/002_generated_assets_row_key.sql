@@ -0,0 +1,15 @@
+-- ============================================================
+-- 002: Row key (số dòng sheet + hash nội dung) cho generated_assets
+-- Dùng làm checkpoint khi resume một generation job.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE generated_assets ADD
+    row_index INT NULL,
+    row_hash VARCHAR(64) NULL;
+GO
+
+CREATE INDEX IX_generated_assets_log_row ON generated_assets (generation_log_id, row_index);
+GO
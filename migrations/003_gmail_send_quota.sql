@@ -0,0 +1,23 @@
+-- ============================================================
+-- 003: Token bucket cho Gmail (rate + quota theo ngày, theo sender)
+-- và available_at cho job bị hoãn khi hết quota.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+CREATE TABLE gmail_send_quota (
+    sender VARCHAR(255) NOT NULL,
+    tokens FLOAT NOT NULL DEFAULT 0,
+    refilled_at DATETIME NULL, -- UTC
+    quota_day DATE NULL, -- ngày (UTC) của sent_today
+    sent_today INT NOT NULL DEFAULT 0,
+    blocked_until DATETIME NULL, -- UTC, Gmail trả 429 → tạm dừng gửi tới mốc này
+    updated_at DATETIME DEFAULT GETDATE(),
+    CONSTRAINT PK_gmail_send_quota PRIMARY KEY (sender)
+);
+GO
+
+ALTER TABLE generation_jobs ADD
+    available_at DATETIME NULL; -- UTC, job bị hoãn chỉ được claim sau mốc này
+GO
@@ -0,0 +1,12 @@
+-- ============================================================
+-- 004: Dữ liệu dòng + key PDF trong kho content-addressed
+-- Resend / download đọc lại PDF đã render thay vì render lại.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE generated_assets ADD
+    row_data NVARCHAR(MAX) NULL,
+    pdf_key VARCHAR(64) NULL;
+GO
@@ -0,0 +1,11 @@
+-- ============================================================
+-- 005: Loại job trong generation_jobs
+-- GENERATE: đọc sheet + render + gửi, RESEND_FAILED: gửi lại các asset FAILED của log.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE generation_jobs ADD
+    kind VARCHAR(50) NOT NULL CONSTRAINT DF_generation_jobs_kind DEFAULT 'GENERATE';
+GO
@@ -0,0 +1,11 @@
+-- ============================================================
+-- 006: Font bundle khai báo theo template
+-- JSON list tên file trong FONTS_DIR (vd. ["BeVietnamPro-Bold.ttf"]); NULL = chỉ dùng generic family.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE templates ADD
+    fonts NVARCHAR(MAX) NULL;
+GO
@@ -0,0 +1,11 @@
+-- ============================================================
+-- 007: SVG đã tối ưu của template (tạo khi create/update)
+-- NULL = template cũ / tối ưu lỗi → render từ svg_content như trước.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE templates ADD
+    svg_optimized NVARCHAR(MAX) NULL;
+GO
@@ -0,0 +1,19 @@
+-- ============================================================
+-- 008: Content hash của template SVG
+-- List view (GET /templates, GET /events/{id}/templates) không còn trả svg_content;
+-- client so content_hash với bản đã cache để biết có cần GET /templates/{id} lại không.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE templates ADD
+    content_hash VARCHAR(64) NULL;
+GO
+
+-- Backfill template cũ. HASHBYTES băm NVARCHAR dạng UTF-16 nên khác sha256(UTF-8) mà API
+-- ghi khi create/update — không sao, hash chỉ dùng làm version (so sánh bằng nhau).
+UPDATE templates
+SET content_hash = LOWER(CONVERT(VARCHAR(64), HASHBYTES('SHA2_256', svg_content), 2))
+WHERE content_hash IS NULL;
+GO
@@ -0,0 +1,39 @@
+-- ============================================================
+-- 009: Index phụ cho các query của repository
+-- List endpoint keyset theo (created_at, id) — mỗi filter có index (filter, created_at, id)
+-- để trang nào cũng là một index seek + TOP(limit), không sort cả bảng.
+-- Đo lại bằng: python scripts/bench_repositories.py --baseline <file JSON lần trước>
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+-- events / templates
+CREATE INDEX IX_events_created_at ON events (created_at, id);
+CREATE INDEX IX_templates_created_at ON templates (created_at, id);
+CREATE INDEX IX_templates_event_created_at ON templates (event_id, created_at, id);
+GO
+
+-- generation_log (event_id filter = template_id IN (templates của event))
+CREATE INDEX IX_generation_log_created_at ON generation_log (created_at, id);
+CREATE INDEX IX_generation_log_status_created_at ON generation_log (status, created_at, id);
+CREATE INDEX IX_generation_log_template_created_at ON generation_log (template_id, created_at, id);
+GO
+
+-- generated_assets
+-- Checkpoint resume đọc (row_index, row_hash, email_status, pdf_key) hoàn toàn từ index
+CREATE INDEX IX_generated_assets_log_row ON generated_assets (generation_log_id, row_index)
+    INCLUDE (row_hash, email_status, pdf_key)
+    WITH (DROP_EXISTING = ON);
+CREATE INDEX IX_generated_assets_created_at ON generated_assets (created_at, id);
+CREATE INDEX IX_generated_assets_log_created_at ON generated_assets (generation_log_id, created_at, id);
+CREATE INDEX IX_generated_assets_status_created_at ON generated_assets (email_status, created_at, id);
+CREATE INDEX IX_generated_assets_email_created_at ON generated_assets (participant_email, created_at, id);
+-- count_by_status / get_by_log_id_and_status (resend-failed, sắp theo row_index)
+CREATE INDEX IX_generated_assets_log_status_row ON generated_assets (generation_log_id, email_status, row_index);
+GO
+
+-- generation_jobs: job mới nhất của log theo kind + has_active
+CREATE INDEX IX_generation_jobs_log_kind_created_at ON generation_jobs (generation_log_id, kind, created_at)
+    INCLUDE (status);
+GO
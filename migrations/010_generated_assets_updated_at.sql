@@ -0,0 +1,15 @@
+-- ============================================================
+-- 010: Thời điểm đổi trạng thái của asset (throughput theo phút)
+-- Asset cũ giữ NULL → không xuất hiện trong throughput, vẫn được đếm theo email_status.
+-- ============================================================
+
+USE GDGoCCertificateSystemDb;
+GO
+
+ALTER TABLE generated_assets ADD
+    updated_at DATETIME NULL;
+GO
+
+CREATE INDEX IX_generated_assets_log_updated_at ON generated_assets (generation_log_id, updated_at)
+    INCLUDE (email_status);
+GO
@@ -0,0 +1,108 @@
+"""
+Benchmark độ trễ event loop khi nhiều người login cùng lúc (bcrypt verify).
+
+    python scripts/bench_password_hashing.py --logins 50 --rounds 12 --workers 2
+
+Chạy hai chế độ trên cùng một event loop:
+- inline: bcrypt.checkpw gọi thẳng trong coroutine (cách AuthService.login làm trước đây)
+- pool:   verify_password_async → password pool (app/core/executors.py)
+
+Trong lúc các lần login chạy, một coroutine "tick" ngủ --tick-ms và đo nó bị đánh thức muộn
+bao lâu — đó là độ trễ mà mọi request khác trên worker đó phải chịu. In p50/p99/max của độ
+trễ loop và thời gian của từng lần login. Cần .env như khi chạy API (settings).
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.core.executors import shutdown_executors  # noqa: E402
+from app.core.security import hash_password, verify_password, verify_password_async  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def _pct(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def _tick(stop: asyncio.Event, interval: float, lags: list[float]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run(mode: str, logins: int, hashed: str, tick_ms: float) -> dict:
+    async def login() -> float:
+        started = time.perf_counter()
+        # Nhường loop một nhịp như khi vừa SELECT user xong
+        await asyncio.sleep(0)
+        if mode == "inline":
+            ok = verify_password(PASSWORD, hashed)
+        else:
+            ok = await verify_password_async(PASSWORD, hashed)
+        assert ok
+        return (time.perf_counter() - started) * 1000
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_tick(stop, tick_ms / 1000, lags))
+    await asyncio.sleep(tick_ms / 1000 * 3)
+
+    started = time.perf_counter()
+    durations = await asyncio.gather(*(login() for _ in range(logins)))
+    wall = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    return {
+        "mode": mode,
+        "wall_s": wall,
+        "login_p50_ms": statistics.median(durations),
+        "login_p99_ms": _pct(durations, 0.99),
+        "lag_p50_ms": statistics.median(lags) if lags else 0.0,
+        "lag_p99_ms": _pct(lags, 0.99),
+        "lag_max_ms": max(lags, default=0.0),
+        "ticks": len(lags),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50, help="Số login đồng thời")
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS, help="bcrypt cost factor")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    parser.add_argument("--only", choices=("inline", "pool"), default=None)
+    args = parser.parse_args()
+
+    # Pool được tạo ở lần dùng đầu tiên → đặt trước khi chạy
+    settings.PASSWORD_HASH_WORKERS = args.workers
+    hashed = hash_password(PASSWORD, rounds=args.rounds)
+    print(f"logins={args.logins} rounds={args.rounds} workers={args.workers} tick={args.tick_ms}ms")
+    print(f"{'mode':<8}{'wall s':>9}{'login p50':>11}{'login p99':>11}{'lag p50':>10}{'lag p99':>10}{'lag max':>10}")
+    try:
+        for mode in ("inline", "pool"):
+            if args.only and mode != args.only:
+                continue
+            r = await run(mode, args.logins, hashed, args.tick_ms)
+            print(
+                f"{r['mode']:<8}{r['wall_s']:>9.2f}{r['login_p50_ms']:>11.1f}{r['login_p99_ms']:>11.1f}"
+                f"{r['lag_p50_ms']:>10.1f}{r['lag_p99_ms']:>10.1f}{r['lag_max_ms']:>10.1f}"
+            )
+    finally:
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
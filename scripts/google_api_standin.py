@@ -0,0 +1,264 @@
+"""
+Stand-in server cho Google Sheets / Gmail / OAuth token — dùng khi test local.
+
+    python scripts/google_api_standin.py --rows 3000 --latency-ms 150 \
+        --write-credentials credentials/standin
+
+Sau đó trỏ app sang server này (in ra khi khởi động):
+
+    GOOGLE_SHEETS_API_ENDPOINT=http://127.0.0.1:8765/
+    GOOGLE_GMAIL_API_ENDPOINT=http://127.0.0.1:8765/
+    GOOGLE_SERVICE_ACCOUNT_FILE=credentials/standin/service_account.json
+    GOOGLE_GMAIL_TOKEN_FILE=credentials/standin/gmail_token.json
+
+Hỗ trợ:
+- POST /token                                        (refresh token / JWT grant)
+- GET  /v4/spreadsheets/{id}                         (spreadsheets.get → gridProperties.rowCount)
+- GET  /v4/spreadsheets/{id}/values/{range}          (values.get, majorDimension)
+- GET  /v4/spreadsheets/{id}/values:batchGet         (ranges=..., majorDimension)
+- POST /gmail/v1/users/{userId}/messages/send        (--rate-limit-every N → 429)
+- GET  /stats                                        (số request đã nhận)
+
+Sheet giả lập: dòng 1 là header (name, email, role, q4, q5, ...), dòng 2..rows+1 là dữ liệu.
+--blank-rows 900-1500 để trống một đoạn dòng dữ liệu (kiểm tra đọc qua trang bị cắt ngắn).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import re
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse
+
+_A1_RE = re.compile(r"^(?:(?P<sheet>[^!]+)!)?(?P<c1>[A-Z]+)(?P<r1>\d*)(?::(?P<c2>[A-Z]+)(?P<r2>\d*))?$", re.IGNORECASE)
+
+
+def _col_index(letters: str) -> int:
+    result = 0
+    for ch in letters:
+        result = result * 26 + (ord(ch) - ord("A") + 1)
+    return result - 1
+
+
+def _col_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+class FakeSheet:
+    def __init__(self, rows: int, cols: int, blank_rows: range = range(0)) -> None:
+        self.rows = rows
+        self.cols = max(3, cols)
+        # Số thứ tự participant (1-based) bị để trống
+        self.blank_rows = blank_rows
+        self.header = ["name", "email", "role"] + [f"q{c + 1}" for c in range(3, self.cols)]
+
+    def cell(self, row: int, col: int) -> str:
+        """row, col: 1-based row, 0-based column (giống A1)."""
+        if col >= self.cols or row > self.rows + 1:
+            return ""
+        if row == 1:
+            return self.header[col]
+        n = row - 1
+        if n in self.blank_rows:
+            return ""
+        if col == 0:
+            return f"Participant {n}"
+        if col == 1:
+            return f"participant{n}@example.com"
+        if col == 2:
+            return "Member"
+        return f"answer {n}-{col + 1}"
+
+    def values(self, a1: str, major_dimension: str) -> dict:
+        match = _A1_RE.match(a1.replace("$", ""))
+        if not match:
+            return {"error": f"Unable to parse range: {a1}"}
+        sheet = match.group("sheet") or "Sheet1"
+        c1 = _col_index(match.group("c1").upper())
+        c2 = _col_index((match.group("c2") or match.group("c1")).upper())
+        r1 = int(match.group("r1") or 1)
+        r2 = int(match.group("r2") or self.rows + 1)
+        r2 = min(r2, self.rows + 1)
+        c2 = min(c2, self.cols - 1)
+
+        grid = [[self.cell(r, c) for c in range(c1, c2 + 1)] for r in range(r1, r2 + 1)]
+        if major_dimension == "COLUMNS":
+            grid = [list(col) for col in zip(*grid)] if grid else []
+        # Sheets bỏ các ô/dòng rỗng ở cuối
+        grid = [_rstrip(line) for line in grid]
+        while grid and not grid[-1]:
+            grid.pop()
+
+        last_row = r1 + (len(grid) if major_dimension != "COLUMNS" else 0) - 1
+        result = {
+            "range": f"{sheet}!{_col_letters(c1)}{r1}:{_col_letters(c2)}{max(r1, last_row)}",
+            "majorDimension": major_dimension,
+        }
+        if grid:
+            result["values"] = grid
+        return result
+
+
+def _rstrip(line: list[str]) -> list[str]:
+    while line and line[-1] == "":
+        line = line[:-1]
+    return line
+
+
+def create_app(sheet: FakeSheet, latency: float, rate_limit_every: int) -> FastAPI:
+    app = FastAPI(title="Google API stand-in")
+    stats = {"token": 0, "spreadsheet_get": 0, "values_get": 0, "batch_get": 0, "send": 0, "rate_limited": 0}
+    send_counter = itertools.count(1)
+
+    async def delay() -> None:
+        if latency:
+            await asyncio.sleep(latency)
+
+    @app.post("/token")
+    async def token() -> dict:
+        stats["token"] += 1
+        return {"access_token": f"standin-{uuid.uuid4().hex}", "expires_in": 3600, "token_type": "Bearer"}
+
+    @app.get("/v4/spreadsheets/{spreadsheet_id}")
+    async def spreadsheet_get(spreadsheet_id: str) -> JSONResponse:
+        stats["spreadsheet_get"] += 1
+        await delay()
+        return JSONResponse({
+            "spreadsheetId": spreadsheet_id,
+            "sheets": [{"properties": {"gridProperties": {"rowCount": sheet.rows + 1, "columnCount": sheet.cols}}}],
+        })
+
+    @app.get("/v4/spreadsheets/{spreadsheet_id}/values:batchGet")
+    async def batch_get(
+        spreadsheet_id: str,
+        ranges: list[str] = Query(default=[]),
+        majorDimension: str = "ROWS",
+    ) -> JSONResponse:
+        stats["batch_get"] += 1
+        await delay()
+        value_ranges = [sheet.values(r, majorDimension) for r in ranges]
+        if any("error" in v for v in value_ranges):
+            return JSONResponse({"error": {"code": 400, "message": "Unable to parse range"}}, 400)
+        return JSONResponse({"spreadsheetId": spreadsheet_id, "valueRanges": value_ranges})
+
+    @app.get("/v4/spreadsheets/{spreadsheet_id}/values/{a1:path}")
+    async def values_get(spreadsheet_id: str, a1: str, majorDimension: str = "ROWS") -> JSONResponse:
+        stats["values_get"] += 1
+        await delay()
+        result = sheet.values(a1, majorDimension)
+        if "error" in result:
+            return JSONResponse({"error": {"code": 400, "message": result["error"]}}, 400)
+        return JSONResponse(result)
+
+    @app.post("/gmail/v1/users/{user_id}/messages/send")
+    async def send(user_id: str, request: Request) -> JSONResponse:
+        body = json.loads(await request.body() or b"{}")
+        await delay()
+        if not body.get("raw"):
+            return JSONResponse({"error": {"code": 400, "message": "Missing raw"}}, 400)
+        if rate_limit_every and next(send_counter) % rate_limit_every == 0:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {
+                    "error": {
+                        "code": 429,
+                        "message": "User-rate limit exceeded",
+                        "errors": [{"reason": "rateLimitExceeded"}],
+                    }
+                },
+                429,
+                headers={"Retry-After": "1"},
+            )
+        stats["send"] += 1
+        message_id = uuid.uuid4().hex[:16]
+        return JSONResponse({"id": message_id, "threadId": message_id, "labelIds": ["SENT"]})
+
+    @app.get("/stats")
+    async def get_stats() -> dict:
+        return stats
+
+    return app
+
+
+def write_credentials(directory: str, base_url: str) -> None:
+    """Tạo service_account.json + gmail_token.json trỏ token_uri về stand-in."""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    os.makedirs(directory, exist_ok=True)
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    with open(os.path.join(directory, "service_account.json"), "w") as f:
+        json.dump(
+            {
+                "type": "service_account",
+                "project_id": "standin",
+                "private_key_id": "standin",
+                "private_key": pem,
+                "client_email": "standin@standin.iam.gserviceaccount.com",
+                "client_id": "0",
+                "token_uri": f"{base_url}token",
+            },
+            f,
+        )
+    with open(os.path.join(directory, "gmail_token.json"), "w") as f:
+        json.dump(
+            {
+                # google-auth luôn refresh user credentials qua oauth2.googleapis.com
+                # (bỏ qua token_uri) → cấp sẵn token chưa hết hạn
+                "token": "standin",
+                "expiry": "2099-01-01T00:00:00Z",
+                "refresh_token": "standin-refresh",
+                "client_id": "standin",
+                "client_secret": "standin",
+                "token_uri": f"{base_url}token",
+                "scopes": ["https://www.googleapis.com/auth/gmail.send"],
+            },
+            f,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=1000, help="Số dòng participant (không tính header)")
+    parser.add_argument("--cols", type=int, default=26, help="Số cột của sheet")
+    parser.add_argument("--blank-rows", default="", metavar="A-B", help="Để trống participant A..B")
+    parser.add_argument("--latency-ms", type=float, default=100, help="Độ trễ mỗi request")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Trả 429 cho mỗi lần gửi thứ N")
+    parser.add_argument("--write-credentials", metavar="DIR", help="Tạo credentials giả trỏ về stand-in")
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}/"
+    if args.write_credentials:
+        write_credentials(args.write_credentials, base_url)
+        print(f"GOOGLE_SERVICE_ACCOUNT_FILE={os.path.join(args.write_credentials, 'service_account.json')}")
+        print(f"GOOGLE_GMAIL_TOKEN_FILE={os.path.join(args.write_credentials, 'gmail_token.json')}")
+    print(f"GOOGLE_SHEETS_API_ENDPOINT={base_url}")
+    print(f"GOOGLE_GMAIL_API_ENDPOINT={base_url}")
+
+    blank_rows = range(0)
+    if args.blank_rows:
+        first, _, last = args.blank_rows.partition("-")
+        blank_rows = range(int(first), int(last or first) + 1)
+    app = create_app(FakeSheet(args.rows, args.cols, blank_rows), args.latency_ms / 1000, args.rate_limit_every)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
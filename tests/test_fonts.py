@@ -0,0 +1,69 @@
+import os
+import stat
+
+import pytest
+
+from app.core import fonts
+from app.core.fonts import FontRegistry, fontconfig_match
+
+
+@pytest.fixture
+def fc_match(tmp_path, monkeypatch):
+    """fc-match giả trên PATH: in family cho pattern theo bảng, mặc định là font fallback."""
+    calls = tmp_path / "calls.log"
+    script = tmp_path / "bin" / "fc-match"
+    script.parent.mkdir()
+    script.write_text(
+        "#!/bin/sh\n"
+        f'printf "%s\\n" "$2" >> "{calls}"\n'
+        'case "$2" in\n'
+        '  "DejaVu Sans") printf "DejaVu Sans" ;;\n'
+        '  "Noto Sans\\-Display") printf "Noto Sans-Display,Noto Sans Display" ;;\n'
+        '  *) printf "DejaVu Sans" ;;\n'
+        "esac\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{script.parent}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(fonts, "configure_fontconfig", lambda fonts_dir: str(tmp_path / "fonts.conf"))
+    return lambda: calls.read_text().splitlines() if calls.exists() else []
+
+
+@pytest.fixture
+def registry(tmp_path):
+    fonts_dir = tmp_path / "fonts"
+    fonts_dir.mkdir()
+    return FontRegistry(str(fonts_dir))
+
+
+def test_system_font_found_by_fontconfig_resolves(fc_match, registry):
+    assert registry.unresolved([], {"DejaVu Sans", "dejavu sans"}) == ([], [])
+
+
+def test_fallback_match_is_unresolved(fc_match, registry):
+    # fc-match luôn trả về một font → family khác tên yêu cầu = fallback
+    assert registry.unresolved([], {"Arial"}) == ([], ["Arial"])
+
+
+def test_generic_family_does_not_call_fontconfig(fc_match, registry):
+    assert registry.unresolved([], {"sans-serif", "Monospace"}) == ([], [])
+    assert fc_match() == []
+
+
+def test_pattern_special_characters_are_escaped(fc_match):
+    assert "noto sans-display" in fontconfig_match("Noto Sans-Display")
+    assert fc_match() == ["Noto Sans\\-Display"]
+
+
+def test_result_is_cached(fc_match, registry):
+    registry.unresolved([], {"DejaVu Sans"})
+    registry.unresolved([], {"DejaVu Sans", "Arial"})
+    registry.unresolved([], {"Arial"})
+    assert fc_match() == ["DejaVu Sans", "Arial"]
+
+
+def test_missing_fc_match_is_unresolved(tmp_path, monkeypatch, registry):
+    monkeypatch.setenv("PATH", str(tmp_path / "empty"))
+    monkeypatch.setattr(fonts, "configure_fontconfig", lambda fonts_dir: str(tmp_path / "fonts.conf"))
+
+    assert fontconfig_match("DejaVu Sans") is None
+    assert registry.unresolved(["missing.ttf"], {"DejaVu Sans"}) == (["missing.ttf"], ["DejaVu Sans"])
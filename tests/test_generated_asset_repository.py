@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+
+from sqlalchemy.dialects import mssql
+
+from app.repositories import generated_asset_repository
+from app.repositories.generated_asset_repository import GeneratedAssetRepository
+
+
+class _RecordingSession:
+    """Ghi lại (statement, params) thay cho AsyncSession — không cần SQL Server."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[object, object]] = []
+
+    async def execute(self, statement, params=None):
+        self.calls.append((statement, params))
+
+
+def _stale(n: int) -> list[tuple[uuid.UUID, str, str]]:
+    return [(uuid.uuid4(), f'{{"name": "P{i}"}}', f"{i:064x}") for i in range(n)]
+
+
+def test_set_pdf_keys_is_one_set_based_update():
+    db = _RecordingSession()
+    items = _stale(3)
+
+    asyncio.run(GeneratedAssetRepository(db).set_pdf_keys(items))
+
+    assert len(db.calls) == 1
+    statement, params = db.calls[0]
+    # Không truyền list tham số → không phải executemany
+    assert params is None
+    compiled = statement.compile(dialect=mssql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("UPDATE generated_assets SET row_data=staged.row_data, pdf_key=staged.pdf_key")
+    assert "(VALUES (" in sql and "AS staged (id, row_data, pdf_key)" in sql
+    assert "generated_assets.id = staged.id" in sql
+    assert set(compiled.params.values()) == {value for item in items for value in item}
+
+
+def test_set_pdf_keys_chunks_under_parameter_limit(monkeypatch):
+    # SQL Server: tối đa 2100 tham số / câu lệnh, mỗi dòng 3 tham số
+    assert generated_asset_repository._PDF_KEY_CHUNK_SIZE * 3 <= 2100
+    monkeypatch.setattr(generated_asset_repository, "_PDF_KEY_CHUNK_SIZE", 2)
+    db = _RecordingSession()
+
+    asyncio.run(GeneratedAssetRepository(db).set_pdf_keys(_stale(5)))
+
+    assert len(db.calls) == 3
+    sizes = [len(statement.compile(dialect=mssql.dialect()).params) for statement, _ in db.calls]
+    assert sizes == [6, 6, 3]
+
+
+def test_set_pdf_keys_empty_does_nothing():
+    db = _RecordingSession()
+    asyncio.run(GeneratedAssetRepository(db).set_pdf_keys([]))
+    assert db.calls == []
@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.exceptions import ConflictException
+from app.services.generation_log_service import GenerationLogService
+
+
+class _LogRepo:
+    def __init__(self, log) -> None:
+        self.log = log
+        self.status_updates: list[tuple] = []
+
+    async def get_by_id(self, log_id):
+        return self.log
+
+    async def update_status(self, log_id, status, **kwargs):
+        self.status_updates.append((status, kwargs))
+
+
+class _JobRepo:
+    def __init__(self) -> None:
+        self.created = []
+
+    async def has_active(self, log_id):
+        return False
+
+    async def create(self, job):
+        self.created.append(job)
+
+
+class _AssetRepo:
+    async def count_by_status(self, log_id, status):
+        return 2
+
+
+class _Db:
+    async def commit(self):
+        pass
+
+
+def _service(status: str):
+    log = SimpleNamespace(id=uuid.uuid4(), status=status, total_records=10)
+    log_repo, job_repo = _LogRepo(log), _JobRepo()
+    service = GenerationLogService(
+        generation_log_repo=log_repo,
+        generation_job_repo=job_repo,
+        generated_asset_repo=_AssetRepo(),
+        template_repo=None,
+        svg_service=None,
+        pdf_service=None,
+        sheets_service=None,
+        gmail_service=SimpleNamespace(ensure_authorized=lambda: None),
+        rate_limiter=None,
+        pdf_store=None,
+        db=_Db(),
+    )
+    return service, log, log_repo, job_repo
+
+
+@pytest.mark.parametrize("status", ["FAILED", "PROCESSING", "PENDING"])
+def test_resend_failed_rejects_unfinished_log(status):
+    service, log, log_repo, job_repo = _service(status)
+
+    with pytest.raises(ConflictException):
+        asyncio.run(service.resend_failed(log.id))
+
+    # Không đụng processed / status, không xếp job
+    assert job_repo.created == []
+    assert log_repo.status_updates == []
+
+
+def test_resend_failed_queues_job_for_completed_log():
+    service, log, log_repo, job_repo = _service("COMPLETED")
+
+    asyncio.run(service.resend_failed(log.id))
+
+    assert [job.kind for job in job_repo.created] == ["RESEND_FAILED"]
+    assert log_repo.status_updates == [("PENDING", {"processed": 8})]
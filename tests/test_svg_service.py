@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.svg_service import SvgService, content_hash
+
+_SVG = '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="100" height="100">{}</svg>'
+_IMAGE = '<image href="data:image/png;base64,AAAA" width="100" height="100"/>'
+
+
+def _layers(body: str):
+    svg = _SVG.format(body)
+    return SvgService._compile(svg, content_hash(svg)).layers
+
+
+def test_splits_background_and_variable_text():
+    layers = _layers(_IMAGE + '<text x="10" y="50">{{name}}</text>')
+
+    assert layers is not None
+    assert "<image" in layers.static_svg and "{{name}}" not in layers.static_svg
+    overlay = layers.overlay.render({"name": "Ada"})
+    assert "Ada" in overlay and "<image" not in overlay
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        # Thứ tự vẽ: con dấu / khung vẽ sau tên
+        '<text>{{name}}</text><rect width="10" height="10"/>',
+        '<g><text>{{name}}</text></g><g><image href="stamp.png"/></g>',
+        # <switch>: mỗi layer giữ một phần con → overlay luôn vẽ tên dù switch chọn con khác
+        '<switch><text systemLanguage="en">Certificate</text><text>{{name}}</text></switch>',
+        # Tham chiếu chéo giữa hai layer
+        '<text><textPath href="#curve">{{name}}</textPath></text><path id="curve" d="M0 0L10 10"/>',
+        '<text id="label">{{name}}</text><use href="#label" y="20"/>',
+        # Placeholder nằm trong defs / không thuộc <text>
+        '<defs><text id="t">{{name}}</text></defs>',
+        '<foreignObject><div xmlns="http://www.w3.org/1999/xhtml">{{name}}</div></foreignObject>',
+    ],
+)
+def test_falls_back_to_single_pass(body):
+    assert _layers(body) is None
+
+
+@pytest.mark.parametrize(
+    "group",
+    [
+        '<g opacity="0.5">',
+        '<g style="opacity: .5">',
+        '<g opacity="50%">',
+        '<g filter="url(#blur)">',
+        '<g mask="url(#m)">',
+        '<g clip-path="url(#c)">',
+        '<g style="fill: red; filter: url(#blur)">',
+    ],
+)
+def test_group_effect_over_static_and_variable_falls_back(group):
+    defs = (
+        '<defs><filter id="blur"><feGaussianBlur stdDeviation="1"/></filter>'
+        '<mask id="m"><rect width="100" height="100" fill="white"/></mask>'
+        '<clipPath id="c"><rect width="50" height="50"/></clipPath></defs>'
+    )
+    assert _layers(defs + group + _IMAGE + "<text>{{name}}</text></g>") is None
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        '<g opacity="1">' + _IMAGE + "<text>{{name}}</text></g>",
+        '<g filter="none">' + _IMAGE + "<text>{{name}}</text></g>",
+        # Hiệu ứng chỉ bọc text biến đổi → nằm trọn trong overlay
+        _IMAGE + '<g opacity="0.5"><text>{{name}}</text></g>',
+    ],
+)
+def test_group_effect_without_static_content_still_splits(body):
+    assert _layers(body) is not None